@@ -1,4 +1,5 @@
 import os
+import json
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -12,8 +13,65 @@ class Config:
     DATA_DIR = 'data'
     RAW_DATA_DIR = os.path.join(DATA_DIR, 'raw')
     PROCESSED_DATA_DIR = os.path.join(DATA_DIR, 'processed')
+    STATE_DIR = os.path.join(DATA_DIR, 'state')
+    CACHE_DIR = os.path.join(DATA_DIR, 'cache')
     LOGS_DIR = 'logs'
     
+    # HTTP connection pool and retry settings
+    HTTP_POOL_SIZE = int(os.getenv('CODA_HTTP_POOL_SIZE', '10'))
+    HTTP_CONNECT_TIMEOUT = float(os.getenv('CODA_HTTP_CONNECT_TIMEOUT', '10'))
+    HTTP_READ_TIMEOUT = float(os.getenv('CODA_HTTP_READ_TIMEOUT', '60'))
+    HTTP_MAX_RETRIES = int(os.getenv('CODA_HTTP_MAX_RETRIES', '5'))
+    HTTP_BACKOFF_BASE = float(os.getenv('CODA_HTTP_BACKOFF_BASE', '0.5'))
+    HTTP_BACKOFF_MAX = float(os.getenv('CODA_HTTP_BACKOFF_MAX', '60'))
+    
+    # Adaptive request rate per API token (requests/second); Coda allows ~100 reads per 6s
+    RATE_LIMIT_INITIAL = float(os.getenv('CODA_RATE_LIMIT_INITIAL', '5'))
+    RATE_LIMIT_MIN = float(os.getenv('CODA_RATE_LIMIT_MIN', '0.5'))
+    RATE_LIMIT_MAX = float(os.getenv('CODA_RATE_LIMIT_MAX', '16'))
+    RATE_LIMIT_INCREASE = float(os.getenv('CODA_RATE_LIMIT_INCREASE', '0.5'))
+    RATE_LIMIT_DECREASE = float(os.getenv('CODA_RATE_LIMIT_DECREASE', '0.5'))
+    
+    # Seconds that cached docs/tables/columns metadata stays valid (0 disables the cache)
+    METADATA_CACHE_TTL = int(os.getenv('CODA_METADATA_CACHE_TTL', '86400'))
+    
+    # JSON file of column type overrides for cleaning: {"Hours": "numeric"} applies to
+    # every table, {"table-abc": {"Hours": "numeric"}} to one table only
+    SCHEMA_OVERRIDES_FILE = os.getenv('CODA_SCHEMA_OVERRIDES', os.path.join('config', 'schema_overrides.json'))
+    
+    # Pages buffered between the fetch and processing stages of a pipelined extraction
+    PIPELINE_QUEUE_SIZE = int(os.getenv('CODA_PIPELINE_QUEUE_SIZE', '4'))
+    
+    # Requests in flight at once across all targets of a concurrent extraction
+    ASYNC_MAX_CONCURRENCY = int(os.getenv('CODA_ASYNC_MAX_CONCURRENCY', '8'))
+    
+    # Raw snapshots kept per table (0 keeps all) and their maximum age in days (0 for no limit)
+    RAW_RETENTION_COUNT = int(os.getenv('CODA_RAW_RETENTION_COUNT', '0'))
+    RAW_RETENTION_DAYS = int(os.getenv('CODA_RAW_RETENTION_DAYS', '0'))
+    # Hours after its last page that an incomplete raw snapshot is considered abandoned
+    RAW_INCOMPLETE_MAX_HOURS = float(os.getenv('CODA_RAW_INCOMPLETE_MAX_HOURS', '24'))
+    
+    # Rows processed at a time when replaying a raw snapshot, and snapshots replayed
+    # in parallel (0 uses one process per CPU)
+    REPLAY_CHUNK_SIZE = int(os.getenv('CODA_REPLAY_CHUNK_SIZE', '5000'))
+    REPLAY_WORKERS = int(os.getenv('CODA_REPLAY_WORKERS', '0'))
+    
+    # SQLite database that extractions upsert processed rows into
+    ROW_STORE_PATH = os.getenv('CODA_ROW_STORE_PATH', os.path.join(DATA_DIR, 'timesheet.sqlite'))
+    
+    @classmethod
+    def load_schema_overrides(cls, table_id=None):
+        """Column name to type overrides for a table, or {} if no overrides file exists"""
+        if not os.path.exists(cls.SCHEMA_OVERRIDES_FILE):
+            return {}
+        
+        with open(cls.SCHEMA_OVERRIDES_FILE, 'r') as f:
+            overrides = json.load(f)
+        
+        table_overrides = overrides.get(table_id, {}) if table_id else {}
+        global_overrides = {k: v for k, v in overrides.items() if not isinstance(v, dict)}
+        return {**global_overrides, **table_overrides}
+    
     @classmethod
     def validate_config(cls):
         missing = []
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark the columnar row decoder in TimesheetProcessor.process_raw_data
+against the original per-cell loop on synthetic Coda rows
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import pandas as pd
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.data_processor import TimesheetProcessor
+
+COLUMN_MAPPING = {
+    'c-date': 'Date',
+    'c-hours': 'Hours',
+    'c-project': 'Project',
+    'c-person': 'Person',
+    'c-task': 'Task',
+    'c-notes': 'Notes',
+    'c-billable': 'Billable',
+    'c-rate': 'Rate'
+}
+
+def make_rows(count, seed=42):
+    """Build synthetic rows shaped like the Coda rows API response"""
+    rnd = random.Random(seed)
+    projects = [f"Project {i}" for i in range(25)]
+    people = [f"Person {i}" for i in range(40)]
+    rows = []
+    for i in range(count):
+        rows.append({
+            'id': f"i-{i}",
+            'values': {
+                'c-date': f"2024-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+                'c-hours': f"{rnd.randint(0, 9)}:{rnd.choice(['00', '15', '30', '45'])}",
+                'c-project': {'@type': 'StructuredValue', 'name': rnd.choice(projects), 'rowId': 'i-x'},
+                'c-person': {'@type': 'Person', 'name': rnd.choice(people), 'email': 'someone@example.com'},
+                'c-task': f"Task {rnd.randint(1, 500)}",
+                'c-notes': '' if rnd.random() < 0.5 else f"Note {i}",
+                'c-billable': rnd.random() < 0.7,
+                'c-rate': {'@type': 'MonetaryAmount', 'currency': 'USD', 'value': rnd.randint(50, 150)}
+            }
+        })
+    return rows
+
+def legacy_process_raw_data(raw_data):
+    """The original row-by-row, cell-by-cell decoder, kept as the baseline"""
+    rows = []
+    column_mapping = raw_data.get('column_mapping', {})
+    for item in raw_data.get('items', []):
+        row_data = {}
+        for column_id, value in item.get('values', {}).items():
+            column_name = column_mapping.get(column_id, column_id)
+            if isinstance(value, dict):
+                if 'name' in value:
+                    row_data[column_name] = value['name']
+                elif 'text' in value:
+                    row_data[column_name] = value['text']
+                elif 'displayValue' in value:
+                    row_data[column_name] = value['displayValue']
+                elif 'value' in value:
+                    row_data[column_name] = value['value']
+                else:
+                    row_data[column_name] = str(value)
+            else:
+                row_data[column_name] = value
+        rows.append(row_data)
+    return pd.DataFrame(rows)
+
+def best_time(func, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the columnar Coda row decoder')
+    parser.add_argument('--rows', type=int, default=200000, help='Number of synthetic rows')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per decoder (best time is reported)')
+    args = parser.parse_args()
+    
+    raw_data = {'items': make_rows(args.rows), 'column_mapping': COLUMN_MAPPING}
+    processor = TimesheetProcessor()
+    
+    legacy_time, legacy_df = best_time(lambda: legacy_process_raw_data(raw_data), args.repeat)
+    columnar_time, columnar_df = best_time(lambda: processor.process_raw_data(raw_data), args.repeat)
+    
+    pd.testing.assert_frame_equal(legacy_df, columnar_df)
+    
+    print(f"Rows: {args.rows:,} ({len(COLUMN_MAPPING)} columns), best of {args.repeat}")
+    print(f"  Per-cell loop:    {legacy_time:.3f}s  {args.rows / legacy_time:>12,.0f} rows/s")
+    print(f"  Columnar decoder: {columnar_time:.3f}s  {args.rows / columnar_time:>12,.0f} rows/s")
+    print(f"  Speedup: {legacy_time / columnar_time:.1f}x (outputs identical)")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -11,16 +11,58 @@ from datetime import datetime
 # Add src to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
+from config.config import Config
+from src.aggregates import AggregateStore
 from src.coda_extractor import CodaTimesheetExtractor
 from src.data_processor import TimesheetProcessor
+from src.pipeline import PipelinedExtraction
+from src.replay import SnapshotReplay
+from src.sync_state import SyncStateStore
 
 def main():
     parser = argparse.ArgumentParser(description='Extract timesheet data from Coda')
     parser.add_argument('--output', '-o', help='Output filename (optional)')
+    parser.add_argument('--format', choices=['csv', 'xlsx', 'parquet', 'arrow'], default='csv',
+                        help='Output format; parquet and arrow keep column types (need pyarrow)')
+    parser.add_argument('--partition-by', help='With parquet/arrow, partition the output by month and/or project, e.g. month,project')
     parser.add_argument('--list-docs', action='store_true', help='List available documents')
     parser.add_argument('--list-tables', help='List tables in specified document ID')
+    parser.add_argument('--refresh-metadata', action='store_true',
+                        help='Ignore cached document/table/column metadata and fetch it again')
+    parser.add_argument('--skip-unchanged', action='store_true',
+                        help='Reuse the previous output when the table has not changed since the last run')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only fetch rows changed since the last run and merge them into the stored dataset')
+    parser.add_argument('--full-sync', action='store_true',
+                        help='With --incremental, rebuild the stored dataset from scratch')
+    parser.add_argument('--verify-aggregates', action='store_true',
+                        help='With --incremental, check the maintained aggregates against a full recompute')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue an interrupted extraction from its last checkpointed page')
+    parser.add_argument('--reinfer-schema', action='store_true',
+                        help='Infer column types again instead of using the stored schema')
+    parser.add_argument('--pipelined', action='store_true',
+                        help='Process each page while the next one is being fetched')
+    parser.add_argument('--stream', action='store_true',
+                        help='Write the processed CSV page by page as rows arrive, using constant memory')
+    parser.add_argument('--queue-size', type=int, help='Pages buffered between fetching and processing (with --pipelined)')
+    parser.add_argument('--replay', nargs='*', metavar='SNAPSHOT',
+                        help='Rebuild processed CSVs from stored raw snapshots instead of calling the API; '
+                             'names the snapshots, or replays the newest one (or those within --since/--until)')
+    parser.add_argument('--since', help='With --replay, first snapshot day to replay (YYYY-MM-DD)')
+    parser.add_argument('--until', help='With --replay, last snapshot day to replay (YYYY-MM-DD)')
+    parser.add_argument('--workers', type=int, help='With --replay, snapshots replayed in parallel (default one per CPU)')
     
     args = parser.parse_args()
+    partition_by = args.partition_by.split(',') if args.partition_by else None
+    if partition_by and args.format not in ('parquet', 'arrow'):
+        parser.error('--partition-by needs --format parquet or arrow')
+    if args.stream and (args.incremental or args.format != 'csv'):
+        parser.error('--stream writes CSV from a full extraction; it cannot be combined with --incremental or --format')
+    if args.replay is None and (args.since or args.until or args.workers):
+        parser.error('--since, --until and --workers need --replay')
+    if args.replay is not None and (args.incremental or args.format != 'csv'):
+        parser.error('--replay writes CSV from stored snapshots; it cannot be combined with --incremental or --format')
     
     # Create necessary directories
     os.makedirs('logs', exist_ok=True)
@@ -28,9 +70,16 @@ def main():
     os.makedirs('data/processed', exist_ok=True)
     
     try:
+        # Replaying stored snapshots needs no API access
+        if args.replay is not None:
+            return replay_snapshots(TimesheetProcessor(), args)
+        
         extractor = CodaTimesheetExtractor()
         processor = TimesheetProcessor()
         
+        if args.refresh_metadata:
+            extractor.invalidate_metadata()
+        
         # Handle list operations
         if args.list_docs:
             docs = extractor.get_documents()
@@ -46,13 +95,49 @@ def main():
                 print(f"  {table['id']}: {table['name']}")
             return
         
+        # Short-circuit when the table hasn't changed since the last successful run
+        # that produced the same kind of output
+        output_options = {'format': args.format, 'output': args.output, 'partition_by': partition_by}
+        freshness = None
+        if args.skip_unchanged:
+            freshness = extractor.check_freshness(options=output_options)
+            if freshness['unchanged']:
+                previous = freshness['previous']
+                print(f"✅ No changes since last run at {previous['completed_at']}, skipping extraction.")
+                print(f"📁 Reusing processed data: {previous['output_file']}")
+                return 0
+        
+        # Stream straight to CSV without building the whole table in memory
+        if args.stream:
+            print("🔄 Streaming timesheet data from Coda to CSV...")
+            pipeline = PipelinedExtraction(extractor, processor, queue_size=args.queue_size)
+            output_file, row_count = pipeline.stream_to_csv(args.output, resume=args.resume,
+                                                            reinfer_schema=args.reinfer_schema)
+            if freshness is not None:
+                extractor.record_successful_run(freshness['table_info'], output_file, output_options)
+            
+            print(f"\n✅ Extraction complete! {row_count} rows written")
+            print(f"📁 Processed data saved to: {output_file}")
+            return 0
+        
         # Extract and process data
-        print("🔄 Extracting timesheet data from Coda...")
-        raw_data = extractor.get_timesheet_data()
+        if args.pipelined and not args.incremental:
+            print("🔄 Extracting and processing timesheet data from Coda...")
+            pipeline = PipelinedExtraction(extractor, processor, queue_size=args.queue_size)
+            df_cleaned, raw_data = pipeline.run(resume=args.resume, reinfer_schema=args.reinfer_schema)
+        elif args.incremental:
+            df_cleaned, changes = sync_rows(extractor, processor, args)
+            update_aggregates(processor, df_cleaned, changes, args.verify_aggregates)
+        else:
+            print("🔄 Extracting timesheet data from Coda...")
+            raw_data = extractor.get_timesheet_data(resume=args.resume)
+            
+            print("🔄 Processing data...")
+            df_cleaned = clean_rows(processor, raw_data, args)
+            extractor.store_rows(df_cleaned, raw_data)
         
-        print("🔄 Processing data...")
-        df = processor.process_raw_data(raw_data)
-        df_cleaned = processor.clean_timesheet_data(df)
+        # Keep the cleaned data in compact dtypes
+        df_cleaned, memory_report = processor.optimize_memory(df_cleaned)
         
         # Generate summary
         summary = processor.generate_summary(df_cleaned)
@@ -63,9 +148,21 @@ def main():
             print(f"  Date range: {summary['date_range']}")
         if summary['total_hours']:
             print(f"  Total hours: {summary['total_hours']}")
+        print(f"  Memory: {memory_report['bytes_after'] / 1e6:.1f} MB "
+              f"(saved {memory_report['bytes_saved'] / 1e6:.1f} MB)")
+        rate_stats = extractor.rate_controller.stats()
+        print(f"  API requests: {rate_stats['requests']} "
+              f"(throttled {rate_stats['throttle_events']}x, rate now {rate_stats['current_rate']}/s)")
         
         # Export data
-        output_file = processor.export_to_csv(df_cleaned, args.output)
+        if args.format == 'csv':
+            output_file = processor.export_to_csv(df_cleaned, args.output)
+        elif args.format == 'xlsx':
+            output_file = processor.export_to_excel(df_cleaned, args.output)
+        else:
+            output_file = processor.export_to_columnar(df_cleaned, args.output, args.format, partition_by)
+        if freshness is not None:
+            extractor.record_successful_run(freshness['table_info'], output_file, output_options)
         
         print(f"\n✅ Extraction complete!")
         print(f"📁 Processed data saved to: {output_file}")
@@ -76,5 +173,95 @@ def main():
     
     return 0
 
+def replay_snapshots(processor, args):
+    """Reprocess the raw snapshots chosen by --replay/--since/--until into processed CSVs"""
+    replay = SnapshotReplay(processor, workers=args.workers)
+    raw_store = replay.raw_store
+    if args.replay:
+        snapshots = [raw_store.get(name) for name in args.replay]
+    else:
+        snapshots = raw_store.select(Config.DOC_ID, Config.TABLE_ID, args.since, args.until)
+        if not (args.since or args.until):
+            snapshots = snapshots[-1:]
+    if not snapshots:
+        print("❌ No stored raw snapshots to replay")
+        return 1
+    
+    print(f"🔄 Replaying {len(snapshots)} raw snapshot{'s' if len(snapshots) > 1 else ''}...")
+    if len(snapshots) == 1:
+        output_file, row_count = processor.replay_snapshot(snapshots[0], args.output,
+                                                          reinfer_schema=args.reinfer_schema)
+        results = [(snapshots[0].path, output_file, row_count)]
+    else:
+        results = replay.run(snapshots, reinfer_schema=args.reinfer_schema)
+    
+    for snapshot_path, output_file, row_count in results:
+        print(f"  {os.path.basename(snapshot_path)}: {row_count} rows -> {output_file}")
+    print(f"\n✅ Replay complete! {sum(rows for _, _, rows in results)} rows processed")
+    return 0
+
+def clean_rows(processor, raw_data, args):
+    """Decode and clean extracted rows with the table's schema"""
+    df = processor.process_raw_data(raw_data, index_by_row_id='changes' in raw_data)
+    schema = processor.resolve_schema(df, column_formats=raw_data.get('column_formats'),
+                                      reinfer=args.reinfer_schema)
+    return processor.clean_timesheet_data(df, schema)
+
+def sync_rows(extractor, processor, args):
+    """
+    Sync changed rows from Coda into the row store and read back the whole dataset
+    
+    Only the new and changed rows are decoded and cleaned; the rest are already
+    in the row store. When the row store is out of step with the synced rows
+    (e.g. it was deleted), every row is cleaned and stored again.
+    
+    Returns:
+        (cleaned dataset indexed by row ID, changes from sync_timesheet_data)
+    """
+    print("🔄 Syncing changed timesheet rows from Coda...")
+    raw_data = extractor.sync_timesheet_data(full=args.full_sync)
+    changes = raw_data['changes']
+    print(f"  {len(changes['upserted'])} rows new or changed, {len(changes['deleted'])} deleted")
+    
+    print("🔄 Processing changed rows...")
+    upserted = set(changes['upserted'])
+    changed_data = dict(raw_data, items=[item for item in raw_data['items'] if item['id'] in upserted])
+    if changed_data['items']:
+        df_changed = clean_rows(processor, changed_data, args)
+    else:
+        # Nothing to clean, and an empty frame must not replace the stored schema
+        df_changed = processor.process_raw_data(changed_data, index_by_row_id=True)
+    extractor.store_rows(df_changed, changed_data)
+    
+    stored = extractor.row_store.table()
+    if len(raw_data['items']) != (stored.count() if stored is not None else 0):
+        print("🔄 Row store is out of step with the synced rows, storing every row...")
+        df_cleaned = clean_rows(processor, raw_data, args)
+        extractor.store_rows(df_cleaned, dict(raw_data, changes={'upserted': list(df_cleaned.index),
+                                                                  'deleted': [], 'full_sync': True}))
+        stored = extractor.row_store.table()
+    
+    if stored is None:
+        return processor.process_raw_data(raw_data, index_by_row_id=True), changes
+    # Rows read back from the store keep the aggregates consistent with later runs
+    return stored.load(), changes
+
+def update_aggregates(processor, df_cleaned, changes, verify):
+    """Apply the synced changes to the stored aggregates and report their totals"""
+    aggregates = AggregateStore(SyncStateStore().aggregates_path(Config.DOC_ID, Config.TABLE_ID))
+    differences = processor.update_aggregates(aggregates, df_cleaned, changes, verify=verify)
+    
+    if differences:
+        print(f"⚠️  Aggregates differed from a full recompute in {len(differences)} places; rebuilding them")
+        aggregates.rebuild(df_cleaned, aggregates.columns)
+    elif verify:
+        print("✅ Aggregates match a full recompute")
+    aggregates.save()
+    aggregates.close()
+    
+    metrics = aggregates.metrics()
+    if 'total_hours' in metrics:
+        print(f"  Maintained total hours: {metrics['total_hours']:.2f} (overtime days: {metrics['overtime_days']})")
+
 if __name__ == "__main__":
     exit(main())
\ No newline at end of file
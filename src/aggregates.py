@@ -0,0 +1,210 @@
+"""
+Hour aggregates maintained from row deltas
+
+Each row's contribution (hours, ISO week, project) is remembered by Coda row
+ID, so an edit or delete subtracts the old contribution and adds the new one.
+Refreshing the metrics after a sync costs as much as the change, not the
+whole history. Contributions live in a SQLite table, so a sync reads and
+writes only the rows it changed.
+"""
+
+import json
+import math
+import os
+import sqlite3
+import numpy as np
+import pandas as pd
+from src.metrics import OVERTIME_THRESHOLD
+from src.rollup import iso_week_labels
+
+# Row IDs per SELECT ... IN (...) when reading stored contributions
+LOOKUP_BATCH_SIZE = 500
+
+class AggregateStore:
+    def __init__(self, path=None, columns=None):
+        """
+        Args:
+            path: SQLite file holding the contributions and totals; in memory when omitted
+            columns: [hour column, date column, project column] the aggregates are built
+                     from, when the file does not record them yet
+        """
+        self.path = path
+        if path is not None:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.connection = sqlite3.connect(path or ':memory:')
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS contributions ("
+            "row_id TEXT PRIMARY KEY, hours REAL, week TEXT, project TEXT)"
+        )
+        self.connection.execute("CREATE TABLE IF NOT EXISTS summary (id INTEGER PRIMARY KEY, state TEXT NOT NULL)")
+        
+        row = self.connection.execute("SELECT state FROM summary WHERE id = 1").fetchone()
+        state = json.loads(row[0]) if row else {}
+        self.columns = list(state.get('columns') or columns or [None, None, None])
+        self.totals = state.get('totals', {'sum': 0.0, 'count': 0, 'overtime': 0})
+        self.weekly = state.get('weekly', {})
+        self.projects = state.get('projects', {})
+    
+    def save(self):
+        """Commit the changed contributions together with the totals they add up to"""
+        state = {
+            'columns': self.columns,
+            'totals': self.totals,
+            'weekly': self.weekly,
+            'projects': self.projects
+        }
+        self.connection.execute("INSERT OR REPLACE INTO summary (id, state) VALUES (1, ?)", (json.dumps(state),))
+        self.connection.commit()
+    
+    def close(self):
+        """Close the database, discarding changes not saved with save()"""
+        self.connection.close()
+    
+    def stored(self, row_ids):
+        """Stored [hours, week, project] contribution of each of row_ids that has one"""
+        row_ids = [str(row_id) for row_id in row_ids]
+        stored = {}
+        for start in range(0, len(row_ids), LOOKUP_BATCH_SIZE):
+            batch = row_ids[start:start + LOOKUP_BATCH_SIZE]
+            placeholders = ', '.join('?' * len(batch))
+            for row_id, hours, week, project in self.connection.execute(
+                f"SELECT row_id, hours, week, project FROM contributions WHERE row_id IN ({placeholders})", batch
+            ):
+                stored[row_id] = [hours, week, project]
+        return stored
+    
+    def contributions(self, df):
+        """
+        Map each row ID in df's index to its [hours, week, project] contribution
+        
+        Missing values are stored as None; rows without an hour column only count
+        towards their buckets.
+        """
+        hour_column, date_column, project_column = self.columns
+        n = len(df)
+        hours = df[hour_column].to_numpy(dtype=float, na_value=np.nan) if hour_column is not None else np.full(n, np.nan)
+        weeks = iso_week_labels(df[date_column]) if date_column is not None else pd.Series([None] * n)
+        projects = df[project_column] if project_column is not None else pd.Series([None] * n)
+        
+        contributions = {}
+        for row_id, value, week, project in zip(df.index, hours, weeks, projects):
+            contributions[str(row_id)] = [
+                None if math.isnan(value) else float(value),
+                None if pd.isna(week) else week,
+                None if pd.isna(project) else str(project)
+            ]
+        return contributions
+    
+    def rebuild(self, df, columns):
+        """Recompute every aggregate from df, which is indexed by row ID"""
+        self.columns = list(columns)
+        self.totals = {'sum': 0.0, 'count': 0, 'overtime': 0}
+        self.weekly = {}
+        self.projects = {}
+        self.connection.execute("DELETE FROM contributions")
+        
+        contributions = self.contributions(df)
+        self._store(contributions)
+        for contribution in contributions.values():
+            self._update(contribution, 1)
+    
+    def apply(self, df_changed, deleted_ids):
+        """
+        Apply row deltas
+        
+        Only the stored contributions of the changed and deleted rows are read
+        and rewritten.
+        
+        Args:
+            df_changed: Cleaned rows that were inserted or updated, indexed by row ID
+            deleted_ids: IDs of rows removed from the table
+        """
+        deleted_ids = [str(row_id) for row_id in deleted_ids]
+        contributions = self.contributions(df_changed)
+        
+        for contribution in self.stored(deleted_ids + list(contributions)).values():
+            self._update(contribution, -1)
+        self.connection.executemany("DELETE FROM contributions WHERE row_id = ?",
+                                    [(row_id,) for row_id in deleted_ids])
+        self._store(contributions)
+        for contribution in contributions.values():
+            self._update(contribution, 1)
+    
+    def _store(self, contributions):
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO contributions (row_id, hours, week, project) VALUES (?, ?, ?, ?)",
+            [(row_id, *contribution) for row_id, contribution in contributions.items()]
+        )
+    
+    def _update(self, contribution, sign):
+        hours, week, project = contribution
+        if hours is not None:
+            self.totals['sum'] += sign * hours
+            self.totals['count'] += sign
+            if hours > OVERTIME_THRESHOLD:
+                self.totals['overtime'] += sign
+        
+        # Buckets hold [hour sum, hour count, row count] so that weeks and projects
+        # whose hours are all missing still report 0.0, like a groupby sum would
+        for buckets, key in ((self.weekly, week), (self.projects, project)):
+            if key is None:
+                continue
+            bucket = buckets.setdefault(key, [0.0, 0, 0])
+            if hours is not None:
+                bucket[0] += sign * hours
+                bucket[1] += sign
+            bucket[2] += sign
+            if bucket[2] == 0:
+                del buckets[key]
+    
+    def metrics(self):
+        """
+        Return the maintained metrics using calculate_timesheet_metrics' keys
+        
+        Minimum and maximum daily hours are not additive, so they are left out.
+        """
+        hour_column, date_column, project_column = self.columns
+        if hour_column is None:
+            return {}
+        
+        count = self.totals['count']
+        metrics = {
+            'total_hours': self.totals['sum'],
+            'average_daily_hours': self.totals['sum'] / count if count else float('nan'),
+            'overtime_days': self.totals['overtime']
+        }
+        if date_column is not None:
+            weekly = {week: self.weekly[week][0] for week in sorted(self.weekly)}
+            metrics['weekly_totals'] = weekly
+            metrics['average_weekly_hours'] = sum(weekly.values()) / len(weekly) if weekly else float('nan')
+        if project_column is not None:
+            metrics['project_breakdown'] = {project: self.projects[project][0] for project in sorted(self.projects)}
+        return metrics
+    
+    def compare(self, expected):
+        """
+        Compare the maintained metrics with metrics computed from scratch
+        
+        Args:
+            expected: Result of calculate_timesheet_metrics on the full dataset
+        
+        Returns a list of differences; empty when the two agree.
+        """
+        differences = []
+        for key, value in self.metrics().items():
+            if key not in expected:
+                differences.append(f"{key}: missing from full recompute")
+            elif isinstance(value, dict):
+                full = {str(k): v for k, v in expected[key].items()}
+                for bucket in sorted(set(value) | set(full)):
+                    if bucket not in value or bucket not in full or not _close(value[bucket], full[bucket]):
+                        differences.append(f"{key}[{bucket}]: {value.get(bucket)} != {full.get(bucket)}")
+            elif not _close(value, expected[key]):
+                differences.append(f"{key}: {value} != {expected[key]}")
+        return differences
+
+def _close(a, b):
+    """Compare floats allowing for the rounding that repeated deltas accumulate"""
+    if pd.isna(a) and pd.isna(b):
+        return True
+    return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-6)
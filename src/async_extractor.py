@@ -0,0 +1,166 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from config.config import Config
+from src.coda_extractor import CodaTimesheetExtractor
+
+# Marks the end of one target's page stream in stream_many
+_END_OF_TARGET = object()
+
+class AsyncCodaExtractor:
+    """
+    asyncio extractor for pulling many (doc, table) targets concurrently
+    
+    Mirrors the CodaTimesheetExtractor API as coroutines. Each HTTP request runs
+    on a worker thread over the wrapped extractor's pooled session, and a single
+    semaphore caps the number of requests in flight across every target.
+    """
+    
+    def __init__(self, max_concurrency=None, extractor=None):
+        self.max_concurrency = max_concurrency or Config.ASYNC_MAX_CONCURRENCY
+        # Size the connection pool so every concurrent request can keep its connection alive
+        self.extractor = extractor or CodaTimesheetExtractor(pool_size=max(Config.HTTP_POOL_SIZE, self.max_concurrency))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="coda-async")
+        self._semaphore = None
+        self._semaphore_loop = None
+        self.logger = logging.getLogger(__name__)
+    
+    async def __aenter__(self):
+        self._concurrency_limit()
+        return self
+    
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def close(self):
+        """Shut down worker threads and release pooled connections"""
+        self._executor.shutdown(wait=True)
+        self.extractor.close()
+    
+    def _concurrency_limit(self):
+        """Semaphore capping requests in flight, created inside the running event loop on first use"""
+        loop = asyncio.get_running_loop()
+        if self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+    
+    async def _call(self, func, *args):
+        """Run one blocking request on a worker thread under the global concurrency cap"""
+        async with self._concurrency_limit():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+    
+    async def get_documents(self):
+        """Get all documents you have access to"""
+        return await self._call(self.extractor.get_documents)
+    
+    async def get_tables(self, doc_id):
+        """Get all tables in a document"""
+        return await self._call(self.extractor.get_tables, doc_id)
+    
+    async def get_table_columns(self, doc_id, table_id):
+        """Get column information for a table to map IDs to names"""
+        return await self._call(self.extractor.get_table_columns, doc_id, table_id)
+    
+    async def get_columns(self, doc_id, table_id):
+        """Get the column mapping and the column formats from a single column listing"""
+        return await self._call(self.extractor.get_columns, doc_id, table_id)
+    
+    async def iter_row_pages(self, doc_id, table_id, max_rows=None, selected_columns=None, column_mapping=None,
+                             column_formats=None):
+        """Async generator yielding pages of raw row items; see CodaTimesheetExtractor.iter_row_pages"""
+        if column_mapping is None:
+            column_mapping = await self.get_table_columns(doc_id, table_id)
+        
+        pages = self.extractor.iter_row_pages(doc_id, table_id, max_rows, selected_columns, column_mapping,
+                                              column_formats=column_formats)
+        try:
+            while True:
+                # Each step of the page generator issues exactly one request
+                page = await self._call(next, pages, None)
+                if page is None:
+                    break
+                yield page
+        finally:
+            try:
+                pages.close()
+            except ValueError:
+                # Cancelled while a worker thread is still inside the generator; it is dropped with it
+                pass
+    
+    async def get_timesheet_data(self, doc_id, table_id, max_rows=None, selected_columns=None):
+        """
+        Extract one table, returning the same shape as CodaTimesheetExtractor.get_timesheet_data
+        
+        Raw data is not saved here; concurrent targets would race for the same
+        timestamped raw filename.
+        """
+        column_mapping, column_formats = await self.get_columns(doc_id, table_id)
+        
+        all_rows = []
+        async for page in self.iter_row_pages(doc_id, table_id, max_rows, selected_columns, column_mapping,
+                                              column_formats):
+            all_rows.extend(page)
+        
+        self.logger.info(f"Extracted {len(all_rows)} rows from {doc_id}/{table_id}")
+        return {
+            'items': all_rows,
+            'column_mapping': column_mapping,
+            'column_formats': column_formats
+        }
+    
+    async def extract_many(self, targets, max_rows=None, selected_columns=None):
+        """
+        Extract many (doc_id, table_id) targets concurrently
+        
+        Returns:
+            Dict mapping each (doc_id, table_id) to its combined data, or to the
+            exception that target raised so one failure doesn't sink the rest.
+        """
+        targets = [tuple(target) for target in targets]
+        results = await asyncio.gather(
+            *(self.get_timesheet_data(doc_id, table_id, max_rows, selected_columns) for doc_id, table_id in targets),
+            return_exceptions=True
+        )
+        
+        for target, result in zip(targets, results):
+            if isinstance(result, Exception):
+                self.logger.error(f"Error extracting {target[0]}/{target[1]}: {result}")
+        return dict(zip(targets, results))
+    
+    async def stream_many(self, targets, max_rows=None, selected_columns=None, queue_size=None):
+        """
+        Async generator yielding (target, column_mapping, page) as pages arrive from any target
+        
+        Pages from different targets interleave in arrival order. A failing
+        target is yielded once as (target, None, exception) and then dropped.
+        """
+        targets = [tuple(target) for target in targets]
+        pages = asyncio.Queue(maxsize=queue_size or Config.PIPELINE_QUEUE_SIZE * len(targets) or 1)
+        
+        async def pump(target):
+            doc_id, table_id = target
+            try:
+                column_mapping = await self.get_table_columns(doc_id, table_id)
+                async for page in self.iter_row_pages(doc_id, table_id, max_rows, selected_columns, column_mapping):
+                    await pages.put((target, column_mapping, page))
+            except Exception as e:
+                self.logger.error(f"Error extracting {doc_id}/{table_id}: {e}")
+                await pages.put((target, None, e))
+            finally:
+                await pages.put((target, None, _END_OF_TARGET))
+        
+        tasks = [asyncio.create_task(pump(target)) for target in targets]
+        remaining = len(tasks)
+        try:
+            while remaining:
+                target, column_mapping, page = await pages.get()
+                if page is _END_OF_TARGET:
+                    remaining -= 1
+                    continue
+                yield target, column_mapping, page
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
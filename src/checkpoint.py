@@ -0,0 +1,71 @@
+import json
+import os
+import shutil
+from config.config import Config
+
+class ExtractionCheckpoint:
+    """
+    On-disk checkpoint of a paginated extraction for one (doc, table)
+    
+    The fetched pages themselves are kept by the extraction's raw snapshot;
+    meta.json only records that snapshot, how many of its rows are covered and
+    the pageToken for the next page, so a failed pull can continue where it stopped.
+    """
+    
+    def __init__(self, doc_id, table_id, state_dir=None):
+        self.directory = os.path.join(state_dir or Config.STATE_DIR, f"checkpoint_{doc_id}_{table_id}")
+        self.meta_path = os.path.join(self.directory, 'meta.json')
+        self._meta = None
+    
+    def _write_meta(self):
+        tmp_path = f"{self.meta_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self._meta, f)
+        os.replace(tmp_path, self.meta_path)
+    
+    def load(self, params):
+        """
+        Load checkpoint state if one exists for the same extraction parameters
+        
+        Returns a dict with 'snapshot' (name of the raw snapshot holding the
+        checkpointed rows), 'page_token', 'total_fetched' and 'pages', or None
+        when there is nothing to resume.
+        """
+        if not os.path.exists(self.meta_path):
+            return None
+        
+        with open(self.meta_path, 'r') as f:
+            meta = json.load(f)
+        if meta.get('params') != params or not meta.get('page_token') or not meta.get('snapshot'):
+            return None
+        
+        self._meta = meta
+        return meta
+    
+    def start(self, params, snapshot_name, page_token=None, total_fetched=0, pages=0):
+        """Begin a checkpoint for rows stored in the named raw snapshot, discarding any previous one"""
+        self.clear()
+        os.makedirs(self.directory, exist_ok=True)
+        self._meta = {
+            'params': params,
+            'snapshot': snapshot_name,
+            'page_token': page_token,
+            'total_fetched': total_fetched,
+            'pages': pages
+        }
+        self._write_meta()
+    
+    def save_page(self, row_count, next_page_token):
+        """Advance the resume point past a page the snapshot has stored"""
+        self._meta.update({
+            'page_token': next_page_token,
+            'total_fetched': self._meta['total_fetched'] + row_count,
+            'pages': self._meta['pages'] + 1
+        })
+        self._write_meta()
+    
+    def clear(self):
+        """Delete the checkpoint"""
+        if os.path.exists(self.directory):
+            shutil.rmtree(self.directory)
+        self._meta = None
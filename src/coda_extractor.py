@@ -1,12 +1,40 @@
 import requests
-import json
 import logging
 import os
-from datetime import datetime
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from itertools import chain
+from requests.adapters import HTTPAdapter
 from config.config import Config
+from src.checkpoint import ExtractionCheckpoint
+from src.metadata_cache import MetadataCache
+from src.rate_limiter import RateController
+from src.raw_store import RawSnapshotStore
+from src.row_store import RowStore
+from src.sync_state import SyncStateStore
+
+# Responses worth retrying: throttling and transient server-side failures
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Responses to a checkpointed pageToken that mean it has expired
+EXPIRED_TOKEN_STATUS_CODES = {400, 404, 410}
 
 class CodaTimesheetExtractor:
-    def __init__(self):
+    def __init__(self, pool_size=None, timeout=None, max_retries=None, rate_controller=None, metadata_cache=None,
+                 raw_store=None, row_store=None):
+        """
+        Args:
+            pool_size: Number of keep-alive connections to hold open (default from Config)
+            timeout: (connect, read) timeout in seconds, or a single number for both
+            max_retries: Retries per request on 429/5xx and connection errors
+            rate_controller: RateController pacing requests (default: shared per API token)
+            metadata_cache: MetadataCache for docs/tables/columns (default: on-disk cache
+                unless CODA_METADATA_CACHE_TTL is 0)
+            raw_store: RawSnapshotStore receiving each extracted page (default under Config.RAW_DATA_DIR)
+            row_store: RowStore that store_rows upserts processed rows into (default Config.ROW_STORE_PATH)
+        """
         Config.validate_config()
         self.api_token = Config.CODA_API_TOKEN
         self.base_url = "https://coda.io/apis/v1"
@@ -15,6 +43,20 @@ class CodaTimesheetExtractor:
             "Content-Type": "application/json"
         }
         
+        # Pooled connection layer shared by every request this extractor makes
+        self.pool_size = pool_size or Config.HTTP_POOL_SIZE
+        self.timeout = timeout or (Config.HTTP_CONNECT_TIMEOUT, Config.HTTP_READ_TIMEOUT)
+        self.max_retries = Config.HTTP_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = Config.HTTP_BACKOFF_BASE
+        self.backoff_max = Config.HTTP_BACKOFF_MAX
+        self.session = self._create_session()
+        self._rate_controller = rate_controller
+        if metadata_cache is None and Config.METADATA_CACHE_TTL > 0:
+            metadata_cache = MetadataCache()
+        self.metadata_cache = metadata_cache
+        self.raw_store = raw_store or RawSnapshotStore()
+        self.row_store = row_store or RowStore()
+        
         # Set up logging
         logging.basicConfig(
             filename=f'{Config.LOGS_DIR}/extraction_{datetime.now().strftime("%Y%m%d")}.log',
@@ -23,52 +65,381 @@ class CodaTimesheetExtractor:
         )
         self.logger = logging.getLogger(__name__)
     
-    def get_documents(self):
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    @property
+    def rate_controller(self):
+        """Controller pacing this extractor's requests, shared by all extractors using the same token"""
+        return self._rate_controller or RateController.shared(self.api_token)
+    
+    def close(self):
+        """Release pooled connections"""
+        self.session.close()
+    
+    def _create_session(self):
+        """Create a keep-alive session with a connection pool sized for this extractor"""
+        session = requests.Session()
+        # Retries are handled in _api_get so Retry-After and jitter apply uniformly
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=0)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+    
+    def _api_get(self, path, params=None):
+        """
+        GET an API path through the pooled session and return the decoded JSON
+        
+        Retries 429/5xx responses and connection errors with jittered exponential
+        backoff, waiting at least as long as the server's Retry-After header asks.
+        """
+        url = f"{self.base_url}{path}"
+        rate_controller = self.rate_controller
+        attempt = 0
+        
+        while True:
+            rate_controller.acquire()
+            try:
+                response = self.session.get(url, headers=self.headers, params=params, timeout=self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff_delay(attempt)
+                self.logger.warning(f"Request to {path} failed ({e}), retrying in {delay:.1f}s")
+            else:
+                retry_after = self._parse_retry_after(response)
+                if response.status_code == 429:
+                    rate_controller.on_throttle(retry_after)
+                elif response.ok:
+                    rate_controller.on_success()
+                
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                    response.raise_for_status()
+                    return response.json()
+                
+                delay = self._backoff_delay(attempt)
+                if retry_after is not None:
+                    delay = max(delay, retry_after)
+                self.logger.warning(
+                    f"Request to {path} returned {response.status_code}, "
+                    f"retrying in {delay:.1f}s (attempt {attempt + 1}/{self.max_retries})"
+                )
+            
+            time.sleep(delay)
+            attempt += 1
+    
+    def _backoff_delay(self, attempt):
+        """Full-jitter exponential backoff for the given retry attempt"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+    
+    @staticmethod
+    def _parse_retry_after(response):
+        """Return the Retry-After header in seconds, or None if absent or malformed"""
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    
+    def _cached(self, key, fetch, refresh=False):
+        """Return a cached metadata value, calling fetch() and caching the result on a miss"""
+        if self.metadata_cache is None:
+            return fetch()
+        
+        if not refresh:
+            value = self.metadata_cache.get(key)
+            if value is not None:
+                self.logger.info(f"Using cached metadata for {key}")
+                return value
+        
+        value = fetch()
+        self.metadata_cache.set(key, value)
+        return value
+    
+    def invalidate_metadata(self, doc_id=None, table_id=None):
+        """Drop cached metadata for one table, one doc, or everything when no IDs are given"""
+        if self.metadata_cache is None:
+            return
+        if doc_id and table_id:
+            self.metadata_cache.invalidate(f"column_items:{doc_id}:{table_id}")
+        elif doc_id:
+            self.metadata_cache.invalidate(f"tables:{doc_id}")
+            self.metadata_cache.invalidate(f"column_items:{doc_id}:")
+        else:
+            self.metadata_cache.invalidate()
+    
+    def get_documents(self, refresh=False):
         """Get all documents you have access to"""
         try:
-            response = requests.get(f"{self.base_url}/docs", headers=self.headers)
-            response.raise_for_status()
+            documents = self._cached("docs", lambda: self._api_get("/docs"), refresh)
             self.logger.info("Successfully retrieved documents list")
-            return response.json()
+            return documents
         except requests.exceptions.RequestException as e:
             self.logger.error(f"Error retrieving documents: {e}")
             raise
     
-    def get_tables(self, doc_id):
+    def get_tables(self, doc_id, refresh=False):
         """Get all tables in a document"""
         try:
-            response = requests.get(f"{self.base_url}/docs/{doc_id}/tables", headers=self.headers)
-            response.raise_for_status()
+            tables = self._cached(f"tables:{doc_id}", lambda: self._api_get(f"/docs/{doc_id}/tables"), refresh)
             self.logger.info(f"Successfully retrieved tables for doc {doc_id}")
-            return response.json()
+            return tables
         except requests.exceptions.RequestException as e:
             self.logger.error(f"Error retrieving tables: {e}")
             raise
     
-    def get_table_columns(self, doc_id, table_id):
-        """Get column information for a table to map IDs to names"""
+    def get_table_info(self, doc_id, table_id):
+        """Get table metadata such as rowCount and updatedAt"""
         try:
-            response = requests.get(
-                f"{self.base_url}/docs/{doc_id}/tables/{table_id}/columns",
-                headers=self.headers
+            table_info = self._api_get(f"/docs/{doc_id}/tables/{table_id}")
+            self.logger.info(f"Retrieved metadata for table {table_id}")
+            return table_info
+        except requests.exceptions.RequestException as e:
+            self.logger.error(f"Error retrieving table metadata: {e}")
+            raise
+    
+    def get_column_metadata(self, doc_id, table_id, refresh=False):
+        """Get the column items (id, name, format, ...) of a table"""
+        try:
+            columns = self._cached(
+                f"column_items:{doc_id}:{table_id}",
+                lambda: self._api_get(f"/docs/{doc_id}/tables/{table_id}/columns").get('items', []),
+                refresh
             )
-            response.raise_for_status()
+            return columns
+        except requests.exceptions.RequestException as e:
+            self.logger.error(f"Error retrieving columns: {e}")
+            raise
+    
+    def get_table_columns(self, doc_id, table_id, refresh=False):
+        """Get column information for a table to map IDs to names"""
+        return self.get_columns(doc_id, table_id, refresh)[0]
+    
+    def get_column_formats(self, doc_id, table_id):
+        """Get each column's Coda format type (e.g. 'date', 'duration', 'person') by display name"""
+        return self.get_columns(doc_id, table_id)[1]
+    
+    def get_columns(self, doc_id, table_id, refresh=False):
+        """
+        Get the column mapping and the column formats from a single column listing
+        
+        Returns:
+            (column ID to display name mapping, Coda format type by display name)
+        """
+        columns = self.get_column_metadata(doc_id, table_id, refresh)
+        
+        # Create mapping from column ID to display name
+        column_mapping = {}
+        for col in columns:
+            column_mapping[col['id']] = col['name']
+        column_formats = {col['name']: col.get('format', {}).get('type') for col in columns}
+        
+        self.logger.info(f"Retrieved {len(column_mapping)} column mappings")
+        return column_mapping, column_formats
+    
+    def iter_row_pages(self, doc_id=None, table_id=None, max_rows=None, selected_columns=None, column_mapping=None,
+                       sort_by=None, column_formats=None):
+        """
+        Yield raw row items one page at a time, as soon as each page is decoded
+        
+        Only the current page is held in memory, so arbitrarily large tables can
+        be consumed in bounded memory.
+        
+        Args:
+            doc_id: Document ID
+            table_id: Table ID
+            max_rows: Maximum number of rows to retrieve (None for all)
+            selected_columns: List of column names to extract (None for all)
+            column_mapping: Pre-fetched column ID to name mapping (fetched if None)
+            sort_by: Row order passed to the API ('natural', 'createdAt' or 'updatedAt')
+            column_formats: Pre-fetched column formats, refreshed in place with the mapping
+        """
+        doc_id = doc_id or Config.DOC_ID
+        table_id = table_id or Config.TABLE_ID
+        
+        if column_mapping is None:
+            self.logger.info("Getting column mappings...")
+            column_mapping = self.get_table_columns(doc_id, table_id)
+        
+        for current_rows, _ in self._iter_pages(doc_id, table_id, max_rows, selected_columns, column_mapping, sort_by,
+                                                column_formats=column_formats):
+            yield current_rows
+    
+    def _iter_pages(self, doc_id, table_id, max_rows, selected_columns, column_mapping, sort_by=None,
+                    page_token=None, total_fetched=0, column_formats=None):
+        """
+        Yield (rows, next_page_token) pairs, starting from page_token if given
+        
+        next_page_token is None on the last page. total_fetched is the number of
+        rows already consumed before page_token, so max_rows still applies on resume.
+        If rows reference a column missing from column_mapping, the mapping and
+        column_formats (when given) are refreshed in place from one column listing.
+        """
+        # Convert selected column names to IDs once for every page
+        column_ids = []
+        if selected_columns:
+            reverse_mapping = {v: k for k, v in column_mapping.items()}
+            column_ids = [reverse_mapping[col_name] for col_name in selected_columns if col_name in reverse_mapping]
+        
+        page_size = 500  # Coda's maximum page size
+        mapping_refreshed = False
+        
+        while True:
+            # Build request parameters
+            params = {
+                'limit': min(page_size, max_rows - total_fetched if max_rows else page_size)
+            }
             
-            columns_data = response.json()
+            if page_token:
+                params['pageToken'] = page_token
             
-            # Create mapping from column ID to display name
-            column_mapping = {}
-            for col in columns_data.get('items', []):
-                column_mapping[col['id']] = col['name']
+            if column_ids:
+                params['columns'] = ','.join(column_ids)
             
-            self.logger.info(f"Retrieved {len(column_mapping)} column mappings")
-            return column_mapping
+            if sort_by:
+                params['sortBy'] = sort_by
             
-        except requests.exceptions.RequestException as e:
-            self.logger.error(f"Error retrieving columns: {e}")
-            raise
+            self.logger.info(f"Fetching page with {params['limit']} rows (total so far: {total_fetched})")
+            
+            data = self._api_get(f"/docs/{doc_id}/tables/{table_id}/rows", params=params)
+            current_rows = data.get('items', [])
+            
+            if not current_rows:
+                break
+            
+            # A column ID missing from the mapping means the cached columns are stale;
+            # refresh once and update the caller's mapping and formats in place
+            if not mapping_refreshed and self._has_unknown_columns(current_rows, column_mapping):
+                self.logger.info("Rows reference unknown columns, refreshing column mappings")
+                fresh_mapping, fresh_formats = self.get_columns(doc_id, table_id, refresh=True)
+                column_mapping.update(fresh_mapping)
+                if column_formats is not None:
+                    column_formats.update(fresh_formats)
+                mapping_refreshed = True
+            
+            total_fetched += len(current_rows)
+            
+            # Check if we've reached the maximum or if there are no more pages
+            page_token = data.get('nextPageToken')
+            if max_rows and total_fetched >= max_rows:
+                page_token = None
+            
+            yield current_rows, page_token
+            
+            if not page_token:
+                break
+        
+        self.logger.info(f"Finished streaming {total_fetched} rows")
     
-    def get_timesheet_data(self, doc_id=None, table_id=None, max_rows=None, selected_columns=None):
+    def iter_resumable_row_pages(self, doc_id=None, table_id=None, max_rows=None, selected_columns=None,
+                                 column_mapping=None, resume=False, checkpoint=None, column_formats=None,
+                                 snapshot=None):
+        """
+        Like iter_row_pages, but store every page in a raw snapshot and checkpoint
+        the position so an interrupted pull can resume
+        
+        Each page is appended to snapshot before it is yielded, and the checkpoint
+        records the snapshot, its row count and the next pageToken, not the rows.
+        With resume=True, the rows a matching checkpoint covers are read back from
+        the interrupted run's snapshot into this one and yielded, paging continues
+        from the saved token, and the interrupted snapshot is removed. If the API
+        rejects that token as expired, or the interrupted snapshot is gone,
+        extraction restarts from page one. The checkpoint is cleared once the last
+        page has been yielded. Without a snapshot nothing is stored or checkpointed.
+        """
+        doc_id = doc_id or Config.DOC_ID
+        table_id = table_id or Config.TABLE_ID
+        checkpoint = checkpoint or ExtractionCheckpoint(doc_id, table_id)
+        checkpoint_params = {'max_rows': max_rows, 'selected_columns': selected_columns}
+        
+        if column_mapping is None:
+            self.logger.info("Getting column mappings...")
+            column_mapping = self.get_table_columns(doc_id, table_id)
+        
+        if snapshot is None:
+            yield from self.iter_row_pages(doc_id, table_id, max_rows, selected_columns, column_mapping,
+                                           column_formats=column_formats)
+            return
+        
+        state = checkpoint.load(checkpoint_params) if resume else None
+        interrupted = self._interrupted_snapshot(state) if state is not None else None
+        pages = None
+        first = None
+        if interrupted is not None:
+            self.logger.info(f"Resuming after {state['pages']} checkpointed pages ({state['total_fetched']} rows)")
+            pages = self._iter_pages(doc_id, table_id, max_rows, selected_columns, column_mapping,
+                                     page_token=state['page_token'], total_fetched=state['total_fetched'],
+                                     column_formats=column_formats)
+            # Validate the saved token before replaying anything, so a restart never duplicates rows
+            try:
+                first = next(pages, None)
+            except requests.exceptions.HTTPError as e:
+                if e.response is None or e.response.status_code not in EXPIRED_TOKEN_STATUS_CODES:
+                    raise
+                self.logger.warning(f"Checkpointed page token was rejected ({e}), restarting from the first page")
+                interrupted = None
+        
+        if interrupted is None:
+            checkpoint.start(checkpoint_params, os.path.basename(snapshot.path))
+            pages = self._iter_pages(doc_id, table_id, max_rows, selected_columns, column_mapping,
+                                     column_formats=column_formats)
+        else:
+            for rows in interrupted.iter_row_chunks(max_rows=state['total_fetched']):
+                snapshot.append_page(rows)
+                yield rows
+            # Point the checkpoint at this run's snapshot before dropping the interrupted one
+            checkpoint.start(checkpoint_params, os.path.basename(snapshot.path), state['page_token'],
+                             state['total_fetched'], state['pages'])
+            self.raw_store.remove(interrupted)
+            if first is not None:
+                pages = chain([first], pages)
+        
+        for rows, page_token in pages:
+            snapshot.append_page(rows)
+            checkpoint.save_page(len(rows), page_token)
+            yield rows
+        
+        checkpoint.clear()
+    
+    def _interrupted_snapshot(self, state):
+        """The raw snapshot holding a checkpoint's rows, or None if it no longer has them all"""
+        try:
+            snapshot = self.raw_store.get(state['snapshot'])
+        except ValueError:
+            snapshot = None
+        if snapshot is None or snapshot.manifest['rows'] < state['total_fetched']:
+            self.logger.warning(f"Checkpointed raw snapshot {state['snapshot']} is missing rows, "
+                                f"restarting from the first page")
+            return None
+        return snapshot
+    
+    @staticmethod
+    def _has_unknown_columns(rows, column_mapping):
+        known = column_mapping.keys()
+        return any(item.get('values', {}).keys() - known for item in rows)
+    
+    def iter_rows(self, doc_id=None, table_id=None, max_rows=None, selected_columns=None, column_mapping=None,
+                  sort_by=None, column_formats=None):
+        """Yield raw row items one at a time; see iter_row_pages for arguments"""
+        for page in self.iter_row_pages(doc_id, table_id, max_rows, selected_columns, column_mapping, sort_by,
+                                        column_formats):
+            yield from page
+    
+    def get_timesheet_data(self, doc_id=None, table_id=None, max_rows=None, selected_columns=None, resume=False):
         """
         Extract timesheet data from specified table with pagination
         
@@ -77,85 +448,248 @@ class CodaTimesheetExtractor:
             table_id: Table ID  
             max_rows: Maximum number of rows to retrieve (None for all)
             selected_columns: List of column names to extract (None for all)
+            resume: Continue from the checkpoint left by an interrupted extraction
         """
         doc_id = doc_id or Config.DOC_ID
         table_id = table_id or Config.TABLE_ID
         
         try:
-            # First, get column mappings
+            # First, get column mappings (and the formats from the same listing)
             self.logger.info("Getting column mappings...")
-            column_mapping = self.get_table_columns(doc_id, table_id)
+            column_mapping, column_formats = self.get_columns(doc_id, table_id)
             
-            # Prepare pagination parameters
+            # Raw rows are saved page by page as they arrive
+            snapshot = self.raw_store.create(doc_id, table_id, column_mapping)
             all_rows = []
-            page_token = None
-            total_fetched = 0
-            page_size = 500  # Coda's maximum page size
-            
-            while True:
-                # Build request parameters
-                params = {
-                    'limit': min(page_size, max_rows - total_fetched if max_rows else page_size)
-                }
-                
-                if page_token:
-                    params['pageToken'] = page_token
-                
-                # Add column filtering if specified
-                if selected_columns:
-                    # Convert column names to IDs
-                    reverse_mapping = {v: k for k, v in column_mapping.items()}
-                    column_ids = [reverse_mapping.get(col_name) for col_name in selected_columns if col_name in reverse_mapping]
-                    if column_ids:
-                        params['columns'] = ','.join(column_ids)
-                
-                self.logger.info(f"Fetching page with {params['limit']} rows (total so far: {total_fetched})")
-                
-                response = requests.get(
-                    f"{self.base_url}/docs/{doc_id}/tables/{table_id}/rows",
-                    headers=self.headers,
-                    params=params
-                )
-                response.raise_for_status()
-                
-                data = response.json()
-                current_rows = data.get('items', [])
-                
-                if not current_rows:
-                    break
-                
-                all_rows.extend(current_rows)
-                total_fetched += len(current_rows)
-                
-                # Check if we've reached the maximum or if there are no more pages
-                page_token = data.get('nextPageToken')
-                if not page_token or (max_rows and total_fetched >= max_rows):
-                    break
+            for page in self.iter_resumable_row_pages(doc_id, table_id, max_rows, selected_columns, column_mapping,
+                                                      resume=resume, column_formats=column_formats,
+                                                      snapshot=snapshot):
+                all_rows.extend(page)
             
             # Combine all data
             combined_data = {
                 'items': all_rows,
-                'column_mapping': column_mapping
+                'column_mapping': column_mapping,
+                'column_formats': column_formats
             }
             
             self.logger.info(f"Successfully extracted {len(all_rows)} total rows")
-            
-            # Save raw data
-            self._save_raw_data(combined_data)
+            self.complete_raw_snapshot(snapshot, column_mapping, combined_data['column_formats'])
             return combined_data
             
         except requests.exceptions.RequestException as e:
             self.logger.error(f"Error extracting timesheet data: {e}")
             raise
     
-    def _save_raw_data(self, data):
-        """Save raw API response as JSON"""
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"{Config.RAW_DATA_DIR}/timesheet_raw_{timestamp}.json"
+    def check_freshness(self, doc_id=None, table_id=None, state_store=None, options=None):
+        """
+        Check whether a table changed since the last successful run, at the cost of one request
+        
+        Args:
+            options: Output settings of this run (format, output, partitioning); the
+                     previous output is only reusable when it was written with the same
+        
+        Returns:
+            Dict with 'unchanged' (True only when updatedAt and rowCount both match
+            the last run, that run used the same options and its output still
+            exists), 'table_info' (pass it to record_successful_run) and
+            'previous' (the last run record or None).
+        """
+        doc_id = doc_id or Config.DOC_ID
+        table_id = table_id or Config.TABLE_ID
+        state_store = state_store or SyncStateStore()
         
-        os.makedirs(Config.RAW_DATA_DIR, exist_ok=True)
+        table_info = self.get_table_info(doc_id, table_id)
+        previous = state_store.load_run_record(doc_id, table_id)
+        
+        unchanged = (
+            previous is not None
+            and previous.get('updated_at') == table_info.get('updatedAt')
+            and previous.get('row_count') == table_info.get('rowCount')
+            and previous.get('options') == options
+            and bool(previous.get('output_file'))
+            and os.path.exists(previous['output_file'])
+        )
+        if unchanged:
+            self.logger.info(f"Table {table_id} unchanged since {previous.get('completed_at')}")
+        elif previous is not None and previous.get('updated_at') != table_info.get('updatedAt'):
+            # The table changed, so its cached columns may have been renamed or retyped
+            self.invalidate_metadata(doc_id, table_id)
         
-        with open(filename, 'w') as f:
-            json.dump(data, f, indent=2)
+        return {
+            'unchanged': unchanged,
+            'table_info': table_info,
+            'previous': previous
+        }
+    
+    def record_successful_run(self, table_info, output_file, options=None, doc_id=None, table_id=None,
+                              state_store=None):
+        """Remember the table state and output options a successful run saw, for later freshness checks"""
+        doc_id = doc_id or Config.DOC_ID
+        table_id = table_id or Config.TABLE_ID
+        state_store = state_store or SyncStateStore()
         
-        self.logger.info(f"Raw data saved to {filename}")
\ No newline at end of file
+        state_store.save_run_record(doc_id, table_id, {
+            'updated_at': table_info.get('updatedAt'),
+            'row_count': table_info.get('rowCount'),
+            'output_file': output_file,
+            'options': options,
+            'completed_at': datetime.now(timezone.utc).isoformat()
+        })
+    
+    def sync_timesheet_data(self, doc_id=None, table_id=None, state_store=None, full=False):
+        """
+        Incrementally sync a table into the local dataset kept by SyncStateStore
+        
+        The first run (or full=True) downloads every row. Later runs page through
+        rows sorted by updatedAt and keep only rows newer than the stored version;
+        Coda returns that order most recently updated first, so paging stops at the
+        watermark. Deletions are detected by comparing the table's rowCount with the
+        merged dataset, sweeping row IDs only when the two disagree.
+        
+        Returns:
+            Same shape as get_timesheet_data, plus 'changes' with the upserted
+            and deleted row IDs and 'full_sync' telling which path was taken.
+        """
+        doc_id = doc_id or Config.DOC_ID
+        table_id = table_id or Config.TABLE_ID
+        state_store = state_store or SyncStateStore()
+        
+        try:
+            self.logger.info("Getting column mappings...")
+            column_mapping, column_formats = self.get_columns(doc_id, table_id)
+            
+            state = None if full else state_store.load_state(doc_id, table_id)
+            if state is None:
+                rows, changes = self._full_sync(doc_id, table_id, column_mapping, column_formats)
+            else:
+                rows = state_store.load_rows(doc_id, table_id)
+                changes = self._delta_sync(doc_id, table_id, column_mapping, column_formats, state, rows)
+                if changes is None:
+                    self.logger.warning("Stored dataset is out of step with the table, falling back to a full sync")
+                    rows, changes = self._full_sync(doc_id, table_id, column_mapping, column_formats)
+            
+            row_versions = {row_id: item.get('updatedAt') for row_id, item in rows.items()}
+            timestamps = [ts for ts in row_versions.values() if ts]
+            state_store.save_rows(doc_id, table_id, rows)
+            state_store.save_state(doc_id, table_id, {
+                'watermark': max(timestamps, key=_parse_timestamp) if timestamps else None,
+                'row_versions': row_versions,
+                'row_count': len(rows),
+                'synced_at': datetime.now(timezone.utc).isoformat()
+            })
+            
+            self.logger.info(
+                f"Synced {len(rows)} rows ({len(changes['upserted'])} upserted, "
+                f"{len(changes['deleted'])} deleted)"
+            )
+            return {
+                'items': list(rows.values()),
+                'column_mapping': column_mapping,
+                'column_formats': column_formats,
+                'changes': changes
+            }
+            
+        except requests.exceptions.RequestException as e:
+            self.logger.error(f"Error syncing timesheet data: {e}")
+            raise
+    
+    def _full_sync(self, doc_id, table_id, column_mapping, column_formats):
+        """Download every row and report all of them as upserted"""
+        rows = {}
+        for item in self.iter_rows(doc_id, table_id, column_mapping=column_mapping, column_formats=column_formats):
+            rows[item['id']] = item
+        return rows, {'upserted': list(rows), 'deleted': [], 'full_sync': True}
+    
+    def _delta_sync(self, doc_id, table_id, column_mapping, column_formats, state, rows):
+        """
+        Merge rows changed since the last sync into rows (in place)
+        
+        Returns the changes, or None when the stored dataset cannot be
+        reconciled with the table and a full sync is needed.
+        """
+        row_versions = state.get('row_versions', {})
+        watermark = _parse_timestamp(state.get('watermark'))
+        
+        # Rows are requested sorted by updatedAt, which Coda returns most recently
+        # updated first: everything after the first row older than the watermark is
+        # unchanged. The order is checked against the first two distinct timestamps,
+        # and should it ever come back ascending the whole table is scanned instead.
+        upserted = []
+        previous = None
+        descending = None
+        for item in self.iter_rows(doc_id, table_id, column_mapping=column_mapping, sort_by='updatedAt',
+                                   column_formats=column_formats):
+            updated_at = _parse_timestamp(item.get('updatedAt'))
+            
+            if descending is None and previous is not None and updated_at is not None and updated_at != previous:
+                descending = updated_at < previous
+                if not descending:
+                    self.logger.warning("Rows sorted by updatedAt arrived oldest first, scanning every row")
+            previous = updated_at if updated_at is not None else previous
+            
+            if descending and watermark is not None and updated_at is not None and updated_at < watermark:
+                break
+            
+            if row_versions.get(item['id']) != item.get('updatedAt'):
+                rows[item['id']] = item
+                upserted.append(item['id'])
+        
+        # Any shortfall against the live row count means rows were deleted
+        deleted = []
+        row_count = self.get_table_info(doc_id, table_id).get('rowCount')
+        if row_count is not None and row_count != len(rows):
+            if row_count > len(rows):
+                return None
+            
+            self.logger.info(f"Table has {row_count} rows but {len(rows)} are stored, sweeping row IDs")
+            # Only the IDs matter, so request a single column's values
+            id_columns = list(column_mapping.values())[:1]
+            live_ids = {item['id'] for item in self.iter_rows(doc_id, table_id, selected_columns=id_columns,
+                                                              column_mapping=column_mapping)}
+            deleted = [row_id for row_id in rows if row_id not in live_ids]
+            for row_id in deleted:
+                del rows[row_id]
+        
+        return {'upserted': upserted, 'deleted': deleted, 'full_sync': False}
+    
+    def complete_raw_snapshot(self, snapshot, column_mapping, column_formats):
+        """Mark a raw snapshot complete and prune old snapshots of its table"""
+        snapshot.complete(column_mapping, column_formats)
+        self.logger.info(f"Raw data saved to {snapshot.path} ({snapshot.manifest['rows']} rows, "
+                         f"{snapshot.manifest['bytes']} bytes compressed)")
+        self.raw_store.apply_retention(snapshot.manifest['doc_id'], snapshot.manifest['table_id'])
+    
+    def store_rows(self, df_cleaned, raw_data, doc_id=None, table_id=None, complete=True):
+        """
+        Upsert an extraction's cleaned rows into the row store
+        
+        Args:
+            df_cleaned: Cleaned DataFrame; one row per item of raw_data in order, or
+                        indexed by row ID for a sync_timesheet_data result
+            raw_data: Result of get_timesheet_data or sync_timesheet_data
+            complete: raw_data holds every row of the table, so stored rows missing
+                      from it were deleted in Coda (False when max_rows cut it short)
+        """
+        doc_id = doc_id or Config.DOC_ID
+        table_id = table_id or Config.TABLE_ID
+        
+        changes = raw_data.get('changes')
+        if changes is None:
+            row_ids = [item.get('id') for item in raw_data.get('items', [])]
+            self.row_store.upsert(doc_id, table_id, df_cleaned, row_ids)
+            if complete:
+                self.row_store.retain(doc_id, table_id, row_ids)
+            return
+        
+        self.row_store.upsert(doc_id, table_id, df_cleaned[df_cleaned.index.isin(changes['upserted'])])
+        if changes.get('full_sync'):
+            self.row_store.retain(doc_id, table_id, changes['upserted'])
+        else:
+            self.row_store.delete(doc_id, table_id, changes['deleted'])
+
+def _parse_timestamp(value):
+    """Parse a Coda ISO timestamp (e.g. '2024-01-05T10:00:00.123Z') for ordering"""
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
\ No newline at end of file
@@ -0,0 +1,158 @@
+"""
+Columnar (Parquet / Arrow IPC) export of processed timesheet data
+
+Unlike CSV, the files keep the cleaned dtypes (datetimes, numbers,
+categoricals, nullable columns) and can be read back column by column.
+Exports can be partitioned by month and project into hive-style directories
+(month=2024-03/Project=Client A/...) so readers only open the slices they need.
+"""
+
+import json
+import os
+import shutil
+from src.metrics import find_columns
+from src.rollup import time_grain_labels
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+FORMATS = {'parquet': 'parquet', 'arrow': 'ipc'}
+FILE_EXTENSIONS = {'parquet': '.parquet', 'arrow': '.arrow'}
+PARTITION_KEYS = ('month', 'project')
+
+# Written in place of a missing partition value (a row without a date or project):
+# hive paths cannot hold a null, and partition dictionaries with nulls cannot be read back
+MISSING_PARTITION = '__missing__'
+
+def _require_pyarrow():
+    if not HAS_PYARROW:
+        raise ImportError("Parquet/Arrow export needs pyarrow: pip install pyarrow")
+
+def partition_columns(df, partition_by):
+    """
+    Resolve partition keys to column names, adding a 'month' column when needed
+    
+    Args:
+        df: DataFrame being exported
+        partition_by: Keys from PARTITION_KEYS ('month' of the date column, 'project' column)
+    
+    Returns:
+        (DataFrame to write, list of partition column names)
+    """
+    hour_column, date_column, project_column, person_column = find_columns(df)
+    columns = []
+    for key in partition_by:
+        if key == 'month':
+            if 'month' not in df.columns:
+                if date_column is None:
+                    raise ValueError("Cannot partition by month: no date column")
+                df = df.assign(month=time_grain_labels(df[date_column], 'month'))
+            columns.append('month')
+        elif key == 'project':
+            if project_column is None:
+                raise ValueError("Cannot partition by project: no project column")
+            columns.append(project_column)
+        else:
+            raise ValueError(f"Unknown partition key '{key}', expected one of {PARTITION_KEYS}")
+    return _fill_missing_partitions(df, columns), columns
+
+def _fill_missing_partitions(df, columns):
+    """Replace missing values of the partition columns with MISSING_PARTITION"""
+    filled = {}
+    for col in columns:
+        series = df[col]
+        if not series.isna().any():
+            continue
+        if series.dtype == 'category':
+            filled[col] = series.cat.add_categories([MISSING_PARTITION]).fillna(MISSING_PARTITION)
+        else:
+            filled[col] = series.astype(object).where(series.notna(), MISSING_PARTITION)
+    return df.assign(**filled) if filled else df
+
+def write_columnar(df, path, file_format='parquet', partition_by=None):
+    """
+    Write df to a Parquet or Arrow IPC file, or a partitioned directory
+    
+    The output is written next to path first and moved into place, so readers
+    never see a half-written export.
+    """
+    _require_pyarrow()
+    if file_format not in FORMATS:
+        raise ValueError(f"Unknown columnar format '{file_format}', expected one of {tuple(FORMATS)}")
+    
+    tmp_path = f"{path}.tmp"
+    if partition_by:
+        df, columns = partition_columns(df, partition_by)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        ds.write_dataset(table, tmp_path, format=FORMATS[file_format],
+                         partitioning=columns, partitioning_flavor='hive')
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if file_format == 'parquet':
+            pq.write_table(table, tmp_path)
+        else:
+            with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    os.replace(tmp_path, path)
+    return path
+
+def read_columnar(path, columns=None, filters=None, file_format=None):
+    """
+    Read a columnar export back into a DataFrame
+    
+    Args:
+        path: File or partitioned directory written by write_columnar
+        columns: Columns to load (all when omitted)
+        filters: {column: value or list of values}; on partition columns whole
+                 directories are skipped
+        file_format: 'parquet' or 'arrow'; detected from the files when omitted
+    """
+    _require_pyarrow()
+    file_format = file_format or _detect_format(path)
+    # Partition values come back as dictionaries, i.e. categoricals like the exported columns
+    partitioning = ds.HivePartitioning.discover(infer_dictionary=True)
+    dataset = ds.dataset(path, format=FORMATS[file_format], partitioning=partitioning)
+    
+    expression = None
+    for column, values in (filters or {}).items():
+        values = values if isinstance(values, (list, tuple, set)) else [values]
+        condition = ds.field(column).isin(list(values))
+        expression = condition if expression is None else expression & condition
+    
+    df = dataset.to_table(columns=columns, filter=expression).to_pandas()
+    
+    partition_names = dataset.partitioning.schema.names if dataset.partitioning else []
+    for col in partition_names:
+        if col in df.columns and df[col].dtype == 'category' and MISSING_PARTITION in df[col].cat.categories:
+            df[col] = df[col].cat.remove_categories([MISSING_PARTITION])
+    
+    # Partition columns come back last; restore the exported column order
+    if columns is None and partition_names:
+        order = [col for col in _exported_columns(dataset.schema) if col in df.columns]
+        df = df[order + [col for col in df.columns if col not in order]]
+    return df
+
+def _exported_columns(schema):
+    """Column order recorded by pandas when the export was written"""
+    metadata = (schema.metadata or {}).get(b'pandas')
+    if metadata is None:
+        return []
+    return [column['name'] for column in json.loads(metadata)['columns'] if column['name'] is not None]
+
+def _detect_format(path):
+    if os.path.isdir(path):
+        for _, _, files in os.walk(path):
+            for name in files:
+                if name.endswith('.arrow') or name.endswith('.feather'):
+                    return 'arrow'
+                if name.endswith('.parquet'):
+                    return 'parquet'
+        return 'parquet'
+    return 'arrow' if path.endswith(('.arrow', '.feather')) else 'parquet'
@@ -0,0 +1,131 @@
+"""
+Vectorized type-conversion kernels used by TimesheetProcessor.clean_timesheet_data
+
+Each kernel converts a whole column at once instead of cell by cell with
+Series.apply. Timesheet columns repeat a small set of values (durations,
+dates, project names), so kernels factorize the column, convert only the
+distinct values - materializing their string form once - and broadcast the
+results back with a single take.
+"""
+
+import warnings
+import numpy as np
+import pandas as pd
+
+NUMBER = r'\d+(?:\.\d+)?|\.\d+'
+
+# Clock durations: "2:30", "1:05:00", "-0:45"
+CLOCK_PATTERN = rf'^(?P<sign>[-+]?)(?P<hours>{NUMBER}):(?P<minutes>{NUMBER})(?::(?P<seconds>{NUMBER}))?$'
+
+# Unit durations: "3.5h", "45 min", "1 hr 30 mins", "2 days 3 hrs"
+UNIT_PATTERN = (
+    rf'^(?:(?P<days>{NUMBER})\s*d(?:ays?)?\s*)?'
+    rf'(?:(?P<hours>{NUMBER})\s*h(?:rs?|ours?)?\s*)?'
+    rf'(?:(?P<minutes>{NUMBER})\s*m(?:ins?|inutes?)?\s*)?'
+    rf'(?:(?P<seconds>{NUMBER})\s*s(?:ecs?|econds?)?)?$'
+)
+
+# Amounts: "$1,200.50", "-€15", "1,234,567 £". Commas are only read as thousands
+# separators where they group digits in threes, so "1,5" or "2 3" stay unparsed
+AMOUNT_PATTERN = (
+    r'^(?P<sign>[-+]?)(?:[$€£¥]\s*)?'
+    r'(?P<number>\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?|\.\d+)'
+    r'(?:\s*[$€£¥])?$'
+)
+
+def _convert_distinct(series, convert, include_missing=False):
+    """
+    Apply a vectorized conversion to the distinct values of a column and
+    broadcast the results back to every row
+    
+    Missing values are left missing unless include_missing is set, in which
+    case they are converted like any other value. Columns holding unhashable
+    cells, such as the lists Coda returns for multi-select and lookup columns,
+    can't be factorized and are converted row by row instead.
+    """
+    try:
+        codes, uniques = pd.factorize(series, use_na_sentinel=not include_missing)
+    except TypeError:
+        converted = convert(pd.Series(np.asarray(series, dtype=object), index=series.index))
+        if not include_missing:
+            converted = converted.where(series.notna())
+        return pd.Series(converted.array, index=series.index, name=series.name)
+    converted = convert(pd.Series(np.asarray(uniques, dtype=object)))
+    values = converted.array.take(codes, allow_fill=True)
+    return pd.Series(values, index=series.index, name=series.name)
+
+def parse_numeric(series):
+    """
+    Convert a column to numbers, reading durations as decimal hours
+    
+    Plain numbers are parsed first; whatever is left is tried as a clock
+    duration ("2:30" -> 2.5), then a unit duration ("3.5h", "1 hr 30 mins"),
+    then an amount with a currency symbol or well-formed thousands
+    separators ("$1,200"). Anything else becomes NaN. Numeric columns are returned unchanged.
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        return series
+    return _convert_distinct(series, _parse_numeric_values).astype(float)
+
+def _parse_numeric_values(series):
+    # The one string materialization of these values
+    text = series.astype(str).str.strip()
+    values = pd.to_numeric(text, errors='coerce')
+    
+    remaining = values.isna() & series.notna()
+    if remaining.any():
+        clock = text[remaining].str.extract(CLOCK_PATTERN)
+        hours = (
+            clock['hours'].astype(float)
+            + clock['minutes'].astype(float) / 60
+            + clock['seconds'].astype(float).fillna(0) / 3600
+        )
+        values = values.fillna(hours.where(clock['sign'] != '-', -hours))
+        remaining = values.isna() & series.notna()
+    
+    if remaining.any():
+        units = text[remaining].str.lower().str.extract(UNIT_PATTERN).astype(float)
+        matched = units.notna().any(axis=1)
+        hours = (
+            units['days'].fillna(0) * 24
+            + units['hours'].fillna(0)
+            + units['minutes'].fillna(0) / 60
+            + units['seconds'].fillna(0) / 3600
+        )
+        values = values.fillna(hours[matched])
+        remaining = values.isna() & series.notna()
+    
+    if remaining.any():
+        amount = text[remaining].str.extract(AMOUNT_PATTERN)
+        number = amount['number'].str.replace(',', '', regex=False).astype(float)
+        values = values.fillna(number.where(amount['sign'] != '-', -number))
+    
+    return values
+
+def parse_datetimes(series):
+    """
+    Convert a column to datetimes, trying the fast ISO 8601 parser first
+    
+    Falls back to pandas' general parser only when some value isn't ISO 8601.
+    Unparseable values become NaT.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    return _convert_distinct(series, _parse_datetime_values)
+
+def _parse_datetime_values(series):
+    try:
+        converted = pd.to_datetime(series, errors='coerce', format='ISO8601')
+        if converted.isna().sum() == series.isna().sum():
+            return converted
+    except (ValueError, TypeError):
+        pass
+    
+    with warnings.catch_warnings():
+        # Mixed formats are expected here; pandas warns that it parses them one by one
+        warnings.filterwarnings('ignore', message='Could not infer format')
+        return pd.to_datetime(series, errors='coerce')
+
+def strip_text(series):
+    """Render a column as stripped text, converting each distinct value once; missing values stay missing"""
+    return _convert_distinct(series, lambda values: values.astype(str).str.strip())
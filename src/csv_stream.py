@@ -0,0 +1,58 @@
+import logging
+import os
+import pandas as pd
+
+class StreamingCsvWriter:
+    """
+    Write a CSV export chunk by chunk to a temporary file and move it into
+    place only once every chunk has been written
+    
+    Usage:
+        with StreamingCsvWriter(path, columns) as writer:
+            for df_page in pages:
+                writer.write(df_page)
+    
+    If the block raises, the temporary file is removed and any existing file
+    at path is left untouched.
+    """
+    
+    def __init__(self, path, columns):
+        """
+        Args:
+            path: Final CSV path
+            columns: Header, in output order; chunks are aligned to it
+        """
+        self.path = path
+        self.columns = list(columns)
+        self.tmp_path = f"{path}.tmp"
+        self.rows_written = 0
+        self._file = None
+        self._dropped = set()
+        self.logger = logging.getLogger(__name__)
+    
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._file = open(self.tmp_path, 'w', newline='', encoding='utf-8')
+        pd.DataFrame(columns=self.columns).to_csv(self._file, index=False)
+        self._file.flush()
+        return self
+    
+    def write(self, df):
+        """Append a chunk, adding empty cells for header columns it lacks"""
+        extra = set(df.columns) - set(self.columns) - self._dropped
+        if extra:
+            self.logger.warning(f"Columns not in the CSV header are dropped: {sorted(extra)}")
+            self._dropped |= extra
+        
+        df.reindex(columns=self.columns).to_csv(self._file, header=False, index=False)
+        self._file.flush()
+        self.rows_written += len(df)
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._file.close()
+        if exc_type is not None:
+            os.remove(self.tmp_path)
+            return False
+        os.replace(self.tmp_path, self.path)
+        self.logger.info(f"Streamed {self.rows_written} rows to {self.path}")
+        return False
@@ -2,211 +2,525 @@ import pandas as pd
 import os
 import numpy as np
 from datetime import datetime
+from itertools import chain
+from operator import itemgetter
 from config.config import Config
+from src.conversions import parse_datetimes, parse_numeric, strip_text
+from src.csv_stream import StreamingCsvWriter
+from src.columnar import FILE_EXTENSIONS, read_columnar, write_columnar
+from src.excel_export import write_excel
+from src.filters import FilterIndex, compile_filters
+from src.frame_index import FrameIndex
+from src.memory import CATEGORICAL_MAX_RATIO, optimize_dtypes
+from src.row_store import StoredTable
+from src.metrics import build_rollup, compute_metrics, find_columns
+from src.rollup import AGGREGATIONS, TIME_GRAINS, time_grain_labels
+from src.schema import DATE_KEYWORDS, NUMERIC_KEYWORDS, SchemaStore
 import logging
 
+# Keys probed, in order, to unwrap Coda's object values (references, rich text, currency, ...)
+VALUE_KEYS = ('name', 'text', 'displayValue', 'value')
+
+# Array dtypes for decoded columns whose cells all share one Python type
+COLUMN_DTYPES = {str: object, bool: bool, int: np.int64, float: np.float64}
+
 class TimesheetProcessor:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
     
-    def process_raw_data(self, raw_data):
-        """Process raw API data into a clean DataFrame with proper column names"""
-        rows = []
-        column_mapping = raw_data.get('column_mapping', {})
+    def process_raw_data(self, raw_data, index_by_row_id=False):
+        """
+        Process raw API data into a clean DataFrame with proper column names
         
-        for item in raw_data.get('items', []):
-            row_data = {}
-            for column_id, value in item.get('values', {}).items():
-                # Use the display name if available, otherwise use the ID
-                column_name = column_mapping.get(column_id, column_id)
-                
-                # Extract the actual value from Coda's response format
-                if isinstance(value, dict):
-                    # Handle different value types
-                    if 'name' in value:
-                        row_data[column_name] = value['name']
-                    elif 'text' in value:
-                        row_data[column_name] = value['text']
-                    elif 'displayValue' in value:
-                        row_data[column_name] = value['displayValue']
-                    elif 'value' in value:
-                        row_data[column_name] = value['value']
-                    else:
-                        row_data[column_name] = str(value)
-                else:
-                    row_data[column_name] = value
-                    
-            rows.append(row_data)
+        Args:
+            raw_data: Extraction result with 'items' and 'column_mapping'
+            index_by_row_id: Index the DataFrame by Coda row ID, as update_aggregates expects
+        """
+        column_mapping = raw_data.get('column_mapping', {})
+        items = raw_data.get('items', [])
+        columns = self._decode_columns(items, column_mapping)
         
-        df = pd.DataFrame(rows)
+        # An explicit index keeps one row per item even when no item has any values
+        df = pd.DataFrame(columns, index=range(len(items)), copy=False)
+        if index_by_row_id:
+            df.index = pd.Index([item.get('id') for item in items], name='row_id')
         self.logger.info(f"Processed {len(df)} rows with columns: {list(df.columns)}")
         return df
     
-    def clean_timesheet_data(self, df):
-        """Apply specific cleaning rules for timesheet data"""
+    def _decode_columns(self, items, column_mapping):
+        """
+        Decode Coda rows column by column instead of cell by cell
+        
+        Column IDs are resolved to names once, values are gathered straight into
+        one list per column, and the rule for unwrapping Coda's value objects is
+        picked once per column from its first object value.
+        """
+        row_values = [item.get('values', {}) for item in items]
+        
+        # Resolve column IDs once. When every row has the first row's column count,
+        # and each of those columns is found in every row, the first row's IDs are
+        # the complete set; otherwise collect every ID in order of first appearance.
+        column_ids = list(row_values[0]) if row_values else []
+        uniform = set(map(len, row_values)) <= {len(column_ids)}
+        
+        raw_columns = {}
+        if uniform:
+            try:
+                for column_id in column_ids:
+                    raw_columns[column_id] = list(map(itemgetter(column_id), row_values))
+            except KeyError:
+                uniform = False
+        if not uniform:
+            raw_columns = {
+                column_id: [values.get(column_id, np.nan) for values in row_values]
+                for column_id in dict.fromkeys(chain.from_iterable(row_values))
+            }
+        
+        columns = {}
+        for column_id, raw_values in raw_columns.items():
+            # Use the display name if available, otherwise use the ID
+            column_name = column_mapping.get(column_id, column_id)
+            values = self._decode_column(raw_values)
+            
+            if column_name in columns:
+                # Two IDs share a display name: the later ID wins wherever it has a value
+                values = [old if new is np.nan else new for old, new in zip(columns[column_name], values)]
+            columns[column_name] = values
+        
+        return {column_name: self._column_array(values) for column_name, values in columns.items()}
+    
+    def _decode_column(self, values):
+        """Extract the actual values from one column of Coda's response format"""
+        value_types = set(map(type, values))
+        if dict not in value_types:
+            return values
+        
+        # Pick the key from the first object; it applies column-wide when every cell
+        # is an object carrying it and no object has a key that outranks it
+        sample = next(value for value in values if type(value) is dict)
+        key = next((key for key in VALUE_KEYS if key in sample), None)
+        if key is not None and value_types == {dict}:
+            higher_keys = set(VALUE_KEYS[:VALUE_KEYS.index(key)])
+            if not higher_keys or higher_keys.isdisjoint(chain.from_iterable(values)):
+                try:
+                    return list(map(itemgetter(key), values))
+                except KeyError:
+                    pass
+        
+        # Mixed column (e.g. empty strings among references): unwrap cell by cell
+        extract = self._extract_value
+        return [extract(value) for value in values]
+    
+    @staticmethod
+    def _column_array(values):
+        """
+        Build the array for a decoded column directly when it holds a single
+        Python type, sparing pandas a per-cell type inference pass
+        """
+        value_types = set(map(type, values))
+        if len(value_types) == 1:
+            dtype = COLUMN_DTYPES.get(value_types.pop())
+            if dtype is not None:
+                try:
+                    return np.array(values, dtype=dtype)
+                except OverflowError:
+                    pass
+        return values
+    
+    @staticmethod
+    def _extract_value(value):
+        """Unwrap a single Coda cell value"""
+        if isinstance(value, dict):
+            # Handle different value types
+            for key in VALUE_KEYS:
+                if key in value:
+                    return value[key]
+            return str(value)
+        return value
+    
+    def resolve_schema(self, df, doc_id=None, table_id=None, column_formats=None, reinfer=False, save=True):
+        """
+        Get the persisted column types for a table, inferring them on first use
+        
+        Pass the result to clean_timesheet_data to skip keyword-based guessing.
+        With save=False newly inferred types are returned but not stored.
+        """
+        doc_id = doc_id or Config.DOC_ID
+        table_id = table_id or Config.TABLE_ID
+        return SchemaStore().resolve(df, doc_id, table_id, column_formats, reinfer, save)
+    
+    def clean_timesheet_data(self, df, schema=None):
+        """
+        Apply specific cleaning rules for timesheet data
+        
+        Args:
+            df: DataFrame from process_raw_data
+            schema: Column types from resolve_schema; when given they are applied
+                    directly instead of being guessed from column names
+        """
+        if schema is not None:
+            return self._apply_schema(df, schema)
+        
         cleaned_df = df.copy()
         
         # Auto-detect and convert date columns
-        date_keywords = ['date', 'day', 'when', 'created', 'modified', 'time']
         for col in cleaned_df.columns:
-            if any(keyword in col.lower() for keyword in date_keywords):
+            if any(keyword in col.lower() for keyword in DATE_KEYWORDS):
                 try:
-                    cleaned_df[col] = pd.to_datetime(cleaned_df[col], errors='coerce')
+                    cleaned_df[col] = parse_datetimes(cleaned_df[col])
                     self.logger.info(f"Converted {col} to datetime")
                 except:
                     pass
         
         # Auto-detect and convert numeric columns (hours, duration, amounts)
-        numeric_keywords = ['hour', 'time', 'duration', 'amount', 'cost', 'rate', 'total']
         for col in cleaned_df.columns:
-            if any(keyword in col.lower() for keyword in numeric_keywords):
+            if any(keyword in col.lower() for keyword in NUMERIC_KEYWORDS):
                 try:
-                    # Handle time formats like "2:30" (hours:minutes)
-                    if cleaned_df[col].astype(str).str.contains(':').any():
-                        cleaned_df[col] = cleaned_df[col].apply(self._convert_time_to_decimal)
-                    else:
-                        cleaned_df[col] = pd.to_numeric(cleaned_df[col], errors='coerce')
+                    # Handles plain numbers and durations like "2:30", "1:05:00" or "3.5h"
+                    cleaned_df[col] = parse_numeric(cleaned_df[col])
                     self.logger.info(f"Converted {col} to numeric")
                 except:
                     pass
         
-        # Clean text columns
+        # Clean text columns; list cells (multi-select, lookups) are rendered as text
+        # like everything else, exactly as _apply_schema does
         for col in cleaned_df.columns:
             if cleaned_df[col].dtype == 'object':
-                try:
-                    cleaned_df[col] = cleaned_df[col].astype(str).str.strip()
-                except:
-                    pass
+                cleaned_df[col] = strip_text(cleaned_df[col])
         
         self.logger.info("Applied data cleaning rules")
         return cleaned_df
     
-    def _convert_time_to_decimal(self, time_str):
-        """Convert time format (e.g., '2:30') to decimal hours (e.g., 2.5)"""
-        if pd.isna(time_str) or time_str == '':
-            return np.nan
-        
-        try:
-            time_str = str(time_str).strip()
-            if ':' in time_str:
-                parts = time_str.split(':')
-                hours = float(parts[0])
-                minutes = float(parts[1]) if len(parts) > 1 else 0
-                return hours + (minutes / 60)
-            else:
-                return float(time_str)
-        except:
-            return np.nan
+    def _apply_schema(self, df, schema):
+        """Convert each column straight to its schema type, with no trial conversions"""
+        cleaned_df = df.copy()
+        
+        for col in cleaned_df.columns:
+            column_type = schema.get(col, 'text')
+            if column_type == 'datetime':
+                cleaned_df[col] = parse_datetimes(cleaned_df[col])
+            elif column_type == 'numeric':
+                cleaned_df[col] = parse_numeric(cleaned_df[col])
+            elif column_type == 'text' and cleaned_df[col].dtype == 'object':
+                cleaned_df[col] = strip_text(cleaned_df[col])
+        
+        self.logger.info("Applied schema cleaning rules")
+        return cleaned_df
+    
+    def optimize_memory(self, df, downcast_floats=False):
+        """
+        Store a cleaned DataFrame in compact dtypes
+        
+        Repetitive text becomes categorical, flags become nullable booleans and
+        integers are downcast; see src/memory.py.
+        
+        Returns:
+            (optimized DataFrame, report with 'bytes_before', 'bytes_after',
+            'bytes_saved' and the changed 'columns')
+        """
+        optimized_df, report = optimize_dtypes(df, downcast_floats=downcast_floats)
+        self.logger.info(
+            f"Optimized memory from {report['bytes_before'] / 1e6:.1f} MB to "
+            f"{report['bytes_after'] / 1e6:.1f} MB ({len(report['columns'])} columns changed)"
+        )
+        return optimized_df, report
+    
+    def index(self, df):
+        """
+        Return a FrameIndex for df, so metrics, rollup, filter_data and
+        aggregate_data calls given the index reuse what earlier calls built
+        
+        The index does not notice in-place changes to df; call its
+        invalidate() or build a new one after modifying the frame.
+        """
+        return FrameIndex(df)
+    
+    @staticmethod
+    def _frame(df):
+        """FrameIndex for a DataFrame or FrameIndex argument; a DataFrame gets a fresh, single-use one"""
+        return df if isinstance(df, FrameIndex) else FrameIndex(df)
+    
+    def compute_metrics(self, df):
+        """
+        Compute the shared statistics behind calculate_timesheet_metrics and
+        generate_summary in one pass
+        
+        Pass a FrameIndex from index() to compute them once for both views.
+        """
+        frame = self._frame(df)
+        return frame.get('metrics', lambda data: compute_metrics(data, self.rollup(frame)))
+    
+    def rollup(self, df):
+        """
+        Return the day × project × person rollup cube of df's hour column
+        
+        Given a FrameIndex, the cube is built once and shared by the metrics
+        and aggregate_data; None when df has no hour column.
+        """
+        return self._frame(df).get('rollup', build_rollup)
     
     def calculate_timesheet_metrics(self, df):
-        """Calculate common timesheet metrics"""
+        """Calculate common timesheet metrics from a DataFrame or FrameIndex"""
+        stats = self.compute_metrics(df)
         metrics = {}
         
-        # Find hour columns
-        hour_columns = []
-        for col in df.columns:
-            if any(keyword in col.lower() for keyword in ['hour', 'time', 'duration']) and pd.api.types.is_numeric_dtype(df[col]):
-                hour_columns.append(col)
-        
-        # Find date columns
-        date_columns = []
-        for col in df.columns:
-            if df[col].dtype == 'datetime64[ns]':
-                date_columns.append(col)
-        
-        if hour_columns:
-            primary_hour_col = hour_columns[0]
-            metrics['total_hours'] = df[primary_hour_col].sum()
-            metrics['average_daily_hours'] = df[primary_hour_col].mean()
-            metrics['max_daily_hours'] = df[primary_hour_col].max()
-            metrics['min_daily_hours'] = df[primary_hour_col].min()
-            metrics['overtime_days'] = len(df[df[primary_hour_col] > 8])
+        hours = stats['hours']
+        if hours is not None:
+            metrics['total_hours'] = hours['sum']
+            metrics['average_daily_hours'] = hours['mean']
+            metrics['max_daily_hours'] = hours['max']
+            metrics['min_daily_hours'] = hours['min']
+            metrics['overtime_days'] = hours['overtime']
             
             # Weekly totals if we can identify weeks
-            if date_columns:
-                primary_date_col = date_columns[0]
-                df_with_week = df.copy()
-                df_with_week['week'] = df_with_week[primary_date_col].dt.isocalendar().week
-                weekly_hours = df_with_week.groupby('week')[primary_hour_col].sum()
-                metrics['weekly_totals'] = weekly_hours.to_dict()
-                metrics['average_weekly_hours'] = weekly_hours.mean()
+            if stats['weekly'] is not None:
+                metrics['weekly_totals'] = stats['weekly'].to_dict()
+                metrics['average_weekly_hours'] = stats['weekly'].mean()
         
         # Project breakdown if there's a project column
-        project_columns = []
-        for col in df.columns:
-            if any(keyword in col.lower() for keyword in ['project', 'client', 'task', 'category']):
-                project_columns.append(col)
-        
-        if project_columns and hour_columns:
-            primary_project_col = project_columns[0]
-            primary_hour_col = hour_columns[0]
-            project_hours = df.groupby(primary_project_col)[primary_hour_col].sum()
-            metrics['project_breakdown'] = project_hours.to_dict()
+        if stats['projects'] is not None:
+            metrics['project_breakdown'] = stats['projects'].to_dict()
         
         return metrics
     
+    def update_aggregates(self, aggregates, df, changes=None, verify=False):
+        """
+        Bring an AggregateStore up to date with a synced dataset
+        
+        Args:
+            aggregates: AggregateStore to update in place
+            df: Cleaned DataFrame of the whole dataset, indexed by row ID
+            changes: 'changes' from sync_timesheet_data; only those rows are applied.
+                     When omitted, after a full sync, or when the hour/date/project
+                     columns changed, the aggregates are rebuilt from df
+            verify: Also recompute the metrics from scratch and compare
+        
+        Returns the list of differences found by verification (always empty without verify).
+        """
+        columns = list(find_columns(df)[:3])
+        if changes is None or changes.get('full_sync') or aggregates.columns != columns:
+            aggregates.rebuild(df, columns)
+            self.logger.info(f"Rebuilt aggregates from {len(df)} rows")
+        else:
+            changed = df.loc[df.index.intersection(changes['upserted'])]
+            aggregates.apply(changed, changes['deleted'])
+            self.logger.info(f"Applied {len(changed)} changed and {len(changes['deleted'])} deleted rows to aggregates")
+        
+        if not verify:
+            return []
+        differences = aggregates.compare(self.calculate_timesheet_metrics(df))
+        for difference in differences:
+            self.logger.error(f"Aggregate mismatch: {difference}")
+        if not differences:
+            self.logger.info("Aggregates match a full recompute")
+        return differences
+    
     def filter_data(self, df, filters):
         """
         Apply filters to the dataframe
         
         Args:
-            df: DataFrame to filter
-            filters: Dict with filter criteria
+            df: DataFrame or FrameIndex to filter, or a StoredTable from
+                RowStore.table() to filter in SQL and load only the matching rows
+            filters: List of filter criteria (combined with AND) or an expression
                     {'column': 'Hours', 'operator': '>', 'value': 8}
                     {'column': 'Project', 'operator': 'contains', 'value': 'Client A'}
+                    {'column': 'Date', 'operator': 'between', 'value': ['2024-01-01', '2024-03-31']}
+                    {'column': 'Project', 'operator': 'in', 'value': ['Client A', 'Client B']}
+                    {'or': [...]}, {'and': [...]}, {'not': {...}}
+                    Operators: >, <, >=, <=, ==, !=, in, contains, between, date_range
+        
+        The filters are evaluated into one mask. Given a FrameIndex from
+        index(), the column conversions and sorted date index are kept for
+        later calls with the same index.
         """
-        filtered_df = df.copy()
+        if isinstance(df, StoredTable):
+            return df.where(filters).load()
         
-        for filter_config in filters:
-            column = filter_config.get('column')
-            operator = filter_config.get('operator')
-            value = filter_config.get('value')
-            
-            if column not in filtered_df.columns:
-                continue
-            
-            if operator == '>':
-                filtered_df = filtered_df[pd.to_numeric(filtered_df[column], errors='coerce') > float(value)]
-            elif operator == '<':
-                filtered_df = filtered_df[pd.to_numeric(filtered_df[column], errors='coerce') < float(value)]
-            elif operator == '==':
-                filtered_df = filtered_df[filtered_df[column].astype(str) == str(value)]
-            elif operator == 'contains':
-                filtered_df = filtered_df[filtered_df[column].astype(str).str.contains(str(value), case=False, na=False)]
-            elif operator == 'date_range':
-                if len(value) == 2:  # [start_date, end_date]
-                    start_date, end_date = value
-                    filtered_df = filtered_df[(filtered_df[column] >= start_date) & (filtered_df[column] <= end_date)]
-        
-        return filtered_df
+        predicate = compile_filters(filters)
+        frame = self._frame(df)
+        df = frame.df
+        mask = predicate(df, frame.get('filter_index', lambda data: FilterIndex()))
+        if mask is None:
+            return df.copy()
+        return df[mask]
     
-    def aggregate_data(self, df, group_by_column, value_column, aggregation='sum'):
+    def aggregate_data(self, df, group_by_column, value_column=None, aggregation='sum'):
         """
-        Aggregate data by a specific column
+        Aggregate data by one or more columns in a single groupby
         
         Args:
-            df: DataFrame to aggregate
-            group_by_column: Column to group by
+            df: DataFrame or FrameIndex to aggregate, or a StoredTable
+                (optionally narrowed with where()) to group in SQL
+            group_by_column: Column or list of columns to group by; time grains
+                             ('day', 'week', 'month') of the date column can be used as keys
             value_column: Column to aggregate
-            aggregation: Type of aggregation ('sum', 'mean', 'count', 'max', 'min')
+            aggregation: Type of aggregation ('sum', 'mean', 'count', 'max', 'min'),
+                         a list of them (one output column each, named after the
+                         aggregation), or named aggregations like
+                         {'total': ('Hours', 'sum'), 'entries': ('Hours', 'count')}
+        
+        Given a FrameIndex, hour statistics by project, person or time grain
+        are answered from its rollup cube, and low-cardinality text keys are
+        converted to categoricals once for the index. A DataFrame is grouped
+        directly. A StoredTable is grouped in SQL when it can be, and
+        otherwise loaded first.
         """
-        if group_by_column not in df.columns or value_column not in df.columns:
+        keys = [group_by_column] if isinstance(group_by_column, str) else list(group_by_column)
+        named = self._named_aggregations(value_column, aggregation)
+        
+        if isinstance(df, StoredTable):
+            result = df.aggregate(keys, named)
+            if result is not None:
+                return result
+            date_columns = [col for col, kind in df.column_kinds.items() if kind == 'datetime'][:1]
+            needed = [key for key in keys if key in df.column_kinds] + [col for col, _ in named.values()]
+            df = df.load(list(dict.fromkeys(needed + date_columns))).reset_index(drop=True)
+        
+        # The cube and categorical keys only pay off when an index keeps them for later calls
+        indexed = isinstance(df, FrameIndex)
+        frame = self._frame(df)
+        df = frame.df
+        if indexed:
+            cube_result = self._aggregate_from_rollup(frame, keys, named)
+            if cube_result is not None:
+                return cube_result
+        
+        group_keys = [self._group_key(frame, key, categorize=indexed) for key in keys]
+        if any(key is None for key in group_keys) or any(column not in df.columns for column, _ in named.values()):
             return pd.DataFrame()
         
-        if aggregation == 'sum':
-            result = df.groupby(group_by_column)[value_column].sum()
-        elif aggregation == 'mean':
-            result = df.groupby(group_by_column)[value_column].mean()
-        elif aggregation == 'count':
-            result = df.groupby(group_by_column)[value_column].count()
-        elif aggregation == 'max':
-            result = df.groupby(group_by_column)[value_column].max()
-        elif aggregation == 'min':
-            result = df.groupby(group_by_column)[value_column].min()
+        result = df.groupby(group_keys, observed=True).agg(**named).reset_index()
+        
+        # Categoricals only speed up grouping; hand keys back in their original dtype
+        for key in keys:
+            if result[key].dtype == 'category' and (key not in df.columns or df[key].dtype != 'category'):
+                result[key] = np.asarray(result[key])
+        return result
+    
+    def _named_aggregations(self, value_column, aggregation):
+        """Normalize the aggregation argument to {output column: (column, function)}"""
+        if isinstance(aggregation, dict):
+            return dict(aggregation)
+        if isinstance(aggregation, str):
+            if aggregation not in AGGREGATIONS:
+                aggregation = 'sum'
+            return {value_column: (value_column, aggregation)}
+        return {name: (value_column, name) for name in aggregation}
+    
+    def _group_key(self, frame, key, categorize=False):
+        """
+        Return the Series to group by for a key, or None if the frame has no such column or time grain
+        
+        With categorize, low-cardinality text keys become categoricals, kept on the FrameIndex.
+        """
+        group_keys = frame.get('group_keys', lambda data: {})
+        if key in group_keys:
+            return group_keys[key]
+        
+        df = frame.df
+        if key in df.columns:
+            series = df[key]
+        elif key in TIME_GRAINS and find_columns(df)[1] is not None:
+            series = time_grain_labels(df[find_columns(df)[1]], key)
         else:
-            result = df.groupby(group_by_column)[value_column].sum()
+            return None
+        
+        if categorize and series.dtype == object:
+            categorical = series.astype('category')
+            if len(categorical.cat.categories) <= CATEGORICAL_MAX_RATIO * len(series):
+                series = categorical
+        group_keys[key] = series.rename(key)
+        return group_keys[key]
+    
+    def _aggregate_from_rollup(self, frame, keys, named):
+        """Answer aggregate_data from the index's rollup cube, or return None if it cannot"""
+        if any(key in frame.df.columns and key in TIME_GRAINS for key in keys):
+            return None
+        cube = self.rollup(frame)
+        if cube is None:
+            return None
+        dimensions = [cube.dimension_for(key) for key in keys]
+        if None in dimensions or len(set(dimensions)) < len(dimensions):
+            return None
+        if any(column != cube.value_column or function not in AGGREGATIONS for column, function in named.values()):
+            return None
         
-        return result.reset_index()
+        results = {name: cube.query(dimensions, function) for name, (column, function) in named.items()}
+        return pd.DataFrame(results).rename_axis(keys).reset_index()
+    
+    def iter_snapshot_frames(self, snapshot, chunk_size=None, reinfer_schema=False, schema=None):
+        """
+        Process a stored raw snapshot chunk by chunk, as an extraction would
+        
+        Rows are read lazily from the snapshot, so memory use is bounded by
+        chunk_size rather than the snapshot's size. The stored schema is read
+        but never written: types inferred for a replay are kept in memory, so
+        old snapshots cannot change how live extractions are cleaned.
+        
+        Args:
+            snapshot: RawSnapshot from RawSnapshotStore
+            chunk_size: Rows decoded and cleaned at a time (default Config.REPLAY_CHUNK_SIZE)
+            reinfer_schema: Infer column types again instead of using the stored schema
+            schema: Column types to clean with, skipping schema resolution
+        
+        Yields:
+            Cleaned DataFrame per chunk
+        """
+        manifest = snapshot.manifest
+        chunks = snapshot.iter_row_chunks(chunk_size or Config.REPLAY_CHUNK_SIZE)
+        for _, df in self.iter_cleaned_pages(chunks, manifest.get('column_mapping', {}), manifest['doc_id'],
+                                             manifest['table_id'], manifest.get('column_formats'), reinfer_schema,
+                                             schema=schema, save_schema=False):
+            yield df
+    
+    def iter_cleaned_pages(self, pages, column_mapping, doc_id=None, table_id=None, column_formats=None,
+                           reinfer_schema=False, schema=None, save_schema=True):
+        """
+        Decode and clean pages of raw rows as they arrive
+        
+        The schema is resolved from the first page and applied to every page,
+        so the pages of one table are all cleaned the same way.
+        
+        Args:
+            pages: Iterable of lists of raw row items
+            column_mapping: Column ID to name mapping; read again for every page
+            reinfer_schema: Infer column types again instead of using the stored schema
+            schema: Column types to clean with instead of resolving them from the first page
+            save_schema: Store newly inferred column types
+        
+        Yields:
+            (raw rows, cleaned DataFrame) per page
+        """
+        for page in pages:
+            df = self.process_raw_data({'items': page, 'column_mapping': column_mapping})
+            if schema is None:
+                schema = self.resolve_schema(df, doc_id, table_id, column_formats, reinfer_schema, save_schema)
+            yield page, self.clean_timesheet_data(df, schema)
+    
+    def replay_snapshot(self, snapshot, filename=None, chunk_size=None, reinfer_schema=False, schema=None):
+        """
+        Rebuild the processed CSV for a stored raw snapshot without calling the API
+        
+        The CSV is streamed chunk by chunk and named after the snapshot unless
+        filename is given, so replaying a snapshot again replaces its output.
+        Like iter_snapshot_frames it never changes the stored schema.
+        
+        Returns:
+            Tuple of (CSV path, number of rows written)
+        """
+        if filename is None:
+            name = os.path.basename(os.path.normpath(snapshot.path))
+            filename = f"{name.replace('timesheet_raw_', 'timesheet_processed_', 1)}.csv"
+        filepath = os.path.join(Config.PROCESSED_DATA_DIR, filename)
+        
+        columns = list(dict.fromkeys(snapshot.manifest.get('column_mapping', {}).values()))
+        with StreamingCsvWriter(filepath, columns) as writer:
+            for df in self.iter_snapshot_frames(snapshot, chunk_size, reinfer_schema, schema):
+                writer.write(df)
+        
+        self.logger.info(f"Replayed {snapshot.path} into {filepath}")
+        return filepath, writer.rows_written
     
     def export_to_csv(self, df, filename=None):
         """Export DataFrame to CSV"""
@@ -222,6 +536,67 @@ class TimesheetProcessor:
         self.logger.info(f"Data exported to {filepath}")
         return filepath
     
+    def export_to_excel(self, df, filename=None, progress_callback=None):
+        """
+        Export DataFrame to Excel through a write-only workbook
+        
+        Rows are streamed in chunks and continue on a new sheet past Excel's
+        row limit.
+        
+        Args:
+            df: DataFrame to export
+            filename: Output filename (optional)
+            progress_callback: Called with (rows written, total rows) after each chunk
+        """
+        os.makedirs(Config.PROCESSED_DATA_DIR, exist_ok=True)
+        
+        if filename is None:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            filename = f"timesheet_processed_{timestamp}.xlsx"
+        
+        filepath = os.path.join(Config.PROCESSED_DATA_DIR, filename)
+        sheets = write_excel(df, filepath, progress_callback=progress_callback)
+        
+        self.logger.info(f"Data exported to {filepath} ({sheets} sheet{'s' if sheets > 1 else ''})")
+        return filepath
+    
+    def export_to_columnar(self, df, filename=None, file_format='parquet', partition_by=None):
+        """
+        Export DataFrame to Parquet or Arrow IPC, keeping its dtypes
+        
+        Args:
+            df: DataFrame to export
+            filename: Output file (or directory when partitioned) name
+            file_format: 'parquet' or 'arrow'
+            partition_by: Optional list of 'month' and/or 'project'; writes a
+                          hive-partitioned directory instead of a single file
+        """
+        os.makedirs(Config.PROCESSED_DATA_DIR, exist_ok=True)
+        
+        if filename is None:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            extension = '' if partition_by else FILE_EXTENSIONS.get(file_format, '')
+            filename = f"timesheet_processed_{timestamp}{extension}"
+        
+        filepath = os.path.join(Config.PROCESSED_DATA_DIR, filename)
+        write_columnar(df, filepath, file_format, partition_by)
+        
+        self.logger.info(f"Data exported to {filepath}")
+        return filepath
+    
+    def load_columnar(self, path, columns=None, filters=None):
+        """
+        Load a Parquet/Arrow export, reading only the requested columns
+        
+        Args:
+            path: File or partitioned directory from export_to_columnar
+            columns: Columns to load (all when omitted)
+            filters: {column: value or list of values}, e.g. {'month': ['2024-01', '2024-02']}
+        """
+        df = read_columnar(path, columns, filters)
+        self.logger.info(f"Loaded {len(df)} rows from {path}")
+        return df
+    
     def export_with_metrics(self, df, metrics, filename=None):
         """Export data with metrics summary"""
         os.makedirs(Config.PROCESSED_DATA_DIR, exist_ok=True)
@@ -257,7 +632,9 @@ class TimesheetProcessor:
         return main_filepath, metrics_filepath
     
     def generate_summary(self, df):
-        """Generate enhanced summary statistics"""
+        """Generate enhanced summary statistics from a DataFrame or FrameIndex"""
+        stats = self.compute_metrics(df)
+        df = self._frame(df).df
         summary = {
             'total_rows': len(df),
             'total_columns': len(df.columns),
@@ -268,27 +645,20 @@ class TimesheetProcessor:
         }
         
         # Calculate null percentages for each column
-        for col in df.columns:
-            null_count = df[col].isnull().sum()
+        for col, null_count in stats['null_counts'].items():
             summary['null_percentages'][col] = (null_count / len(df) * 100) if len(df) > 0 else 0
         
-        # Find date columns and get date range
-        for col in df.columns:
-            if df[col].dtype == 'datetime64[ns]':
-                dates = df[col].dropna()
-                if len(dates) > 0:
-                    summary['date_range'] = f"{dates.min().date()} to {dates.max().date()}"
-                    summary['date_span_days'] = (dates.max() - dates.min()).days
-                break
-        
-        # Find hour columns and calculate totals
-        for col in df.columns:
-            if any(keyword in col.lower() for keyword in ['hour', 'time', 'duration']) and pd.api.types.is_numeric_dtype(df[col]):
-                hours = df[col].dropna()
-                if len(hours) > 0:
-                    summary['total_hours'] = hours.sum()
-                    summary['average_hours'] = hours.mean()
-                    summary['max_hours'] = hours.max()
-                break
+        # Date range of the first date column
+        dates = stats['dates']
+        if dates is not None and dates['count'] > 0:
+            summary['date_range'] = f"{dates['min'].date()} to {dates['max'].date()}"
+            summary['date_span_days'] = (dates['max'] - dates['min']).days
+        
+        # Totals of the first hour column
+        hours = stats['hours']
+        if hours is not None and hours['count'] > 0:
+            summary['total_hours'] = hours['sum']
+            summary['average_hours'] = hours['mean']
+            summary['max_hours'] = hours['max']
         
         return summary
\ No newline at end of file
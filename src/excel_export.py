@@ -0,0 +1,66 @@
+"""
+Streaming Excel export
+
+Rows are appended to an openpyxl write-only workbook a chunk at a time, so
+the workbook never holds a cell-object tree for the whole frame. Frames
+longer than Excel's sheet limit continue on additional sheets.
+"""
+
+import os
+import pandas as pd
+from openpyxl import Workbook
+
+# Excel's per-sheet row limit, header row included
+EXCEL_MAX_ROWS = 1048576
+
+EXCEL_CHUNK_SIZE = 10000
+
+def write_excel(df, path, sheet_name='Timesheet', chunk_size=EXCEL_CHUNK_SIZE, max_sheet_rows=EXCEL_MAX_ROWS,
+                progress_callback=None):
+    """
+    Write df to an .xlsx file in chunks
+    
+    Args:
+        df: DataFrame to export
+        path: Output .xlsx path; written to a temporary file and renamed when done
+        sheet_name: Name of the first sheet; overflow sheets are numbered ("Timesheet 2", ...)
+        chunk_size: Rows converted and appended per step
+        max_sheet_rows: Rows per sheet including the header
+        progress_callback: Called with (rows written, total rows) after each chunk
+    
+    Returns the number of sheets written.
+    """
+    workbook = Workbook(write_only=True)
+    header = [str(col) for col in df.columns]
+    rows_per_sheet = max_sheet_rows - 1
+    total = len(df)
+    sheets = 0
+    
+    for sheet_start in range(0, max(total, 1), rows_per_sheet):
+        sheets += 1
+        worksheet = workbook.create_sheet(sheet_name if sheets == 1 else f"{sheet_name} {sheets}")
+        worksheet.append(header)
+        
+        sheet_end = min(sheet_start + rows_per_sheet, total)
+        for start in range(sheet_start, sheet_end, chunk_size):
+            chunk = _excel_values(df.iloc[start:min(start + chunk_size, sheet_end)])
+            for row in chunk.itertuples(index=False, name=None):
+                worksheet.append(row)
+            if progress_callback:
+                progress_callback(min(start + chunk_size, sheet_end), total)
+    
+    tmp_path = f"{path}.tmp"
+    workbook.save(tmp_path)
+    os.replace(tmp_path, path)
+    return sheets
+
+def _excel_values(chunk):
+    """Convert a chunk to plain cell values: missing as None, timezones dropped"""
+    columns = {}
+    for col in chunk.columns:
+        series = chunk[col]
+        if getattr(series.dtype, 'tz', None) is not None:
+            series = series.dt.tz_localize(None)
+        series = series.astype(object)
+        columns[col] = series.where(series.notna(), None)
+    return pd.DataFrame(columns, index=chunk.index)
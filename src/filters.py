@@ -0,0 +1,272 @@
+"""
+Compiled filters for TimesheetProcessor.filter_data
+
+A filter list is compiled once into a tree of predicates and evaluated into a
+single boolean mask. Column conversions (numeric, text, sorted dates) are
+computed on first use and kept in a FilterIndex, so repeated filtering of the
+same DataFrame only pays for the comparisons.
+
+Filter syntax:
+    {'column': 'Hours', 'operator': '>', 'value': 8}
+    {'and': [...]}, {'or': [...]}, {'not': {...}}
+A plain list of filters is combined with AND. Filters on columns the
+DataFrame lacks are ignored.
+
+filters_to_sql translates the same syntax into a WHERE clause so RowStore
+can select rows in SQLite before they reach pandas.
+"""
+
+import numpy as np
+import pandas as pd
+
+COMPARISONS = {
+    '>': np.greater,
+    '<': np.less,
+    '>=': np.greater_equal,
+    '<=': np.less_equal
+}
+OPERATORS = tuple(COMPARISONS) + ('==', '!=', 'in', 'contains', 'between', 'date_range')
+
+# How RowStore stores datetimes; fixed width, so text order is time order
+SQL_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+# Text forms of missing values, which equality filters match like any other string
+MISSING_SPELLINGS = ('None', 'nan', 'NaT', '<NA>')
+
+# Marks a filter on a column the table lacks, which applies no condition
+_IGNORED = object()
+
+class FilterIndex:
+    """Per-DataFrame cache of the column forms filters compare against"""
+    
+    def __init__(self):
+        self._numeric = {}
+        self._text = {}
+        self._dates = {}
+    
+    def numeric(self, df, column):
+        """Column coerced to float, invalid values as NaN"""
+        if column not in self._numeric:
+            self._numeric[column] = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+        return self._numeric[column]
+    
+    def text(self, df, column):
+        """
+        Column as (codes, distinct values as strings)
+        
+        String predicates are evaluated on the distinct values only and then
+        broadcast back through the codes.
+        """
+        if column not in self._text:
+            series = df[column]
+            codes, uniques = pd.factorize(series)
+            text = pd.Series(uniques).astype(str)
+            
+            # Missing values keep their own spelling ('None', 'nan', 'NaT') as astype(str) would
+            missing = np.flatnonzero(codes == -1)
+            if len(missing):
+                missing_codes, missing_text = pd.factorize(series.iloc[missing].astype(str))
+                codes[missing] = len(text) + missing_codes
+                text = pd.concat([text, pd.Series(missing_text)], ignore_index=True)
+            self._text[column] = (codes, text)
+        return self._text[column]
+    
+    def sorted_dates(self, df, column):
+        """Row positions of the non-missing dates in date order, and the sorted dates (UTC if tz-aware)"""
+        if column not in self._dates:
+            values = df[column].to_numpy(dtype='datetime64[ns]')
+            positions = np.flatnonzero(~np.isnat(values))
+            order = positions[np.argsort(values[positions], kind='stable')]
+            self._dates[column] = (order, values[order])
+        return self._dates[column]
+
+def compile_filters(filters):
+    """
+    Compile a filter list or expression into a predicate
+    
+    Returns a function of (df, index) giving a boolean numpy mask, or None when
+    no filter applies to df.
+    """
+    if isinstance(filters, (list, tuple)):
+        return _combine([compile_filters(f) for f in filters], np.logical_and)
+    if 'and' in filters:
+        return _combine([compile_filters(f) for f in filters['and']], np.logical_and)
+    if 'or' in filters:
+        return _combine([compile_filters(f) for f in filters['or']], np.logical_or)
+    if 'not' in filters:
+        inner = compile_filters(filters['not'])
+        
+        def negate(df, index):
+            mask = inner(df, index)
+            return None if mask is None else ~mask
+        return negate
+    return _compile_condition(filters)
+
+def _combine(predicates, combine):
+    def evaluate(df, index):
+        result = None
+        for predicate in predicates:
+            mask = predicate(df, index)
+            if mask is not None:
+                result = mask if result is None else combine(result, mask)
+        return result
+    return evaluate
+
+def _compile_condition(condition):
+    column = condition.get('column')
+    operator = condition.get('operator')
+    value = condition.get('value')
+    if operator not in OPERATORS:
+        raise ValueError(f"Unknown filter operator '{operator}', expected one of {OPERATORS}")
+    
+    def evaluate(df, index):
+        if column not in df.columns:
+            return None
+        return _evaluate(df, index, column, operator, value)
+    return evaluate
+
+def _evaluate(df, index, column, operator, value):
+    if operator in COMPARISONS:
+        return COMPARISONS[operator](index.numeric(df, column), float(value))
+    if operator in ('==', '!='):
+        mask = _text_mask(df, index, column, lambda text: text == str(value))
+        return mask if operator == '==' else ~mask
+    if operator == 'in':
+        wanted = [str(v) for v in value]
+        return _text_mask(df, index, column, lambda text: text.isin(wanted))
+    if operator == 'contains':
+        return _text_mask(df, index, column, lambda text: text.str.contains(str(value), case=False, na=False))
+    
+    # 'between' and 'date_range' take an inclusive [low, high] pair
+    low, high = value
+    if pd.api.types.is_datetime64_any_dtype(df[column]):
+        return _date_range_mask(df, index, column, low, high)
+    if operator == 'date_range':
+        series = df[column]
+        return ((series >= low) & (series <= high)).to_numpy()
+    numbers = index.numeric(df, column)
+    return (numbers >= float(low)) & (numbers <= float(high))
+
+def _text_mask(df, index, column, predicate):
+    codes, text = index.text(df, column)
+    return predicate(text).to_numpy(dtype=bool)[codes]
+
+def _date_range_mask(df, index, column, start, end):
+    """Select an inclusive date range by binary search over the sorted dates"""
+    order, dates = index.sorted_dates(df, column)
+    tz = getattr(df[column].dtype, 'tz', None)
+    first = np.searchsorted(dates, _as_datetime64(start, tz), side='left')
+    last = np.searchsorted(dates, _as_datetime64(end, tz), side='right')
+    mask = np.zeros(len(df), dtype=bool)
+    mask[order[first:last]] = True
+    return mask
+
+def _as_datetime64(value, tz):
+    """Convert a range bound to naive datetime64, in UTC when the column is tz-aware"""
+    timestamp = pd.Timestamp(value)
+    if tz is not None and timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize(tz)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert('UTC').tz_localize(None)
+    return timestamp.to_datetime64()
+
+def filters_to_sql(filters, column_kinds):
+    """
+    Translate filters into an SQL WHERE clause over RowStore columns
+    
+    Args:
+        filters: Filter list or expression, as for compile_filters
+        column_kinds: {column: 'datetime', 'numeric', 'boolean' or 'text'}
+    
+    Returns:
+        (clause, params, exact); clause is None when no condition applies.
+        The clause never drops a row the filters would keep. Conditions SQL
+        cannot express the same way are left out or widened, and exact is
+        then False, so the filters must still be applied to the rows read.
+    """
+    translated = _to_sql(filters, column_kinds)
+    if translated is _IGNORED:
+        return None, [], True
+    if translated is None:
+        return None, [], False
+    return translated
+
+def _to_sql(filters, kinds):
+    """(clause, params, exact) for a filter, _IGNORED, or None when it cannot be translated"""
+    if isinstance(filters, (list, tuple)):
+        return _join_sql([_to_sql(f, kinds) for f in filters], 'AND')
+    if 'and' in filters:
+        return _join_sql([_to_sql(f, kinds) for f in filters['and']], 'AND')
+    if 'or' in filters:
+        return _join_sql([_to_sql(f, kinds) for f in filters['or']], 'OR')
+    if 'not' in filters:
+        inner = _to_sql(filters['not'], kinds)
+        if inner is _IGNORED:
+            return _IGNORED
+        if inner is None or not inner[2]:
+            return None
+        # NULL comparisons are false in pandas, so they must become true once negated
+        return f"NOT COALESCE({inner[0]}, 0)", inner[1], True
+    
+    column = filters.get('column')
+    if filters.get('operator') not in OPERATORS:
+        raise ValueError(f"Unknown filter operator '{filters.get('operator')}', expected one of {OPERATORS}")
+    if column not in kinds:
+        return _IGNORED
+    return _condition_sql(_quote(column), kinds[column], filters['operator'], filters.get('value'))
+
+def _join_sql(parts, joiner):
+    """
+    Combine translated parts; AND can leave out parts it cannot translate
+    (keeping more rows), OR cannot
+    """
+    applied = [part for part in parts if part is not _IGNORED]
+    if not applied:
+        return _IGNORED
+    translated = [part for part in applied if part is not None]
+    if not translated or (joiner == 'OR' and len(translated) < len(applied)):
+        return None
+    
+    clause = f" {joiner} ".join(f"({sql})" for sql, _, _ in translated)
+    params = [param for _, part_params, _ in translated for param in part_params]
+    exact = len(translated) == len(applied) and all(part_exact for _, _, part_exact in translated)
+    return clause, params, exact
+
+def _condition_sql(column, kind, operator, value):
+    if operator in COMPARISONS:
+        if kind != 'numeric':
+            return None
+        return f"{column} {operator} ?", [float(value)], True
+    
+    if operator in ('==', '!=', 'in'):
+        if kind != 'text':
+            return None
+        wanted = [str(v) for v in value] if operator == 'in' else [str(value)]
+        # Missing values compare as their spelling, which a NULL in SQL cannot; keep them all
+        keeps_missing = operator == '!=' or any(v in MISSING_SPELLINGS for v in wanted)
+        exact = not any(v in MISSING_SPELLINGS for v in wanted)
+        if operator == 'in':
+            clause = f"{column} IN ({','.join('?' * len(wanted))})" if wanted else "0"
+        else:
+            clause = f"{column} {'=' if operator == '==' else '!='} ?"
+        if keeps_missing:
+            clause = f"{clause} OR {column} IS NULL"
+        return clause, wanted, exact
+    
+    if operator == 'contains':
+        # LIKE only folds ASCII case; missing values match by their spelling
+        if kind != 'text' or not str(value).isascii():
+            return None
+        pattern = str(value).replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        return f"{column} LIKE ? ESCAPE '\\' OR {column} IS NULL", [f"%{pattern}%"], False
+    
+    low, high = value
+    if kind == 'datetime':
+        bounds = [pd.Timestamp(_as_datetime64(bound, None)).strftime(SQL_DATETIME_FORMAT) for bound in (low, high)]
+        return f"{column} BETWEEN ? AND ?", bounds, True
+    if kind == 'numeric' and operator == 'between':
+        return f"{column} BETWEEN ? AND ?", [float(low), float(high)], True
+    return None
+
+def _quote(column):
+    return '"' + str(column).replace('"', '""') + '"'
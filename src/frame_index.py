@@ -0,0 +1,31 @@
+"""
+Caller-held cache of the structures TimesheetProcessor derives from a DataFrame
+
+Building the rollup cube, the metrics or the filter conversions costs a scan
+of the frame. A FrameIndex keeps them for one DataFrame so repeated queries
+only pay for that scan once:
+
+    index = processor.index(df)
+    processor.calculate_timesheet_metrics(index)
+    processor.filter_data(index, filters)
+    processor.aggregate_data(index, 'Project', 'Hours')
+
+The index does not notice changes to its DataFrame. After modifying the frame
+in place, call invalidate() or build a new index; plain DataFrames passed to
+the processor are never cached.
+"""
+
+class FrameIndex:
+    def __init__(self, df):
+        self.df = df
+        self._values = {}
+    
+    def get(self, name, build):
+        """Return build(df), building it on first use"""
+        if name not in self._values:
+            self._values[name] = build(self.df)
+        return self._values[name]
+    
+    def invalidate(self):
+        """Drop everything built so far, after the DataFrame was modified in place"""
+        self._values = {}
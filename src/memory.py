@@ -0,0 +1,87 @@
+"""
+Compact dtypes for processed timesheet frames
+
+Timesheet text repeats a few values (projects, clients, people, tasks), so
+those columns are stored as categoricals. Flags use the nullable boolean
+dtype and integers are downcast. Missing text stays missing rather than
+becoming the string "nan".
+"""
+
+import numpy as np
+import pandas as pd
+
+# Text columns with at most this share of distinct values become categoricals
+CATEGORICAL_MAX_RATIO = 0.5
+
+def optimize_dtypes(df, categorical_max_ratio=CATEGORICAL_MAX_RATIO, downcast_floats=False):
+    """
+    Return a copy of df with compact dtypes and a report of the change
+    
+    Args:
+        df: Cleaned timesheet DataFrame
+        categorical_max_ratio: Distinct-value share below which text becomes categorical
+        downcast_floats: Also store floats as float32 when that loses no precision.
+                         Off by default since long float32 sums drift
+    
+    Returns:
+        (optimized DataFrame, report) where the report has 'bytes_before',
+        'bytes_after', 'bytes_saved' (column data, excluding the index) and the
+        'columns' whose dtype changed as {column: (old dtype, new dtype)}
+    """
+    optimized = {}
+    changed = {}
+    bytes_before = bytes_after = 0
+    
+    for col in df.columns:
+        series = df[col]
+        converted = _compact_column(series, categorical_max_ratio, downcast_floats)
+        size = int(series.memory_usage(deep=True, index=False))
+        bytes_before += size
+        if converted.dtype == series.dtype:
+            converted = series
+            bytes_after += size
+        else:
+            bytes_after += int(converted.memory_usage(deep=True, index=False))
+            changed[col] = (str(series.dtype), str(converted.dtype))
+        optimized[col] = converted
+    
+    report = {
+        'bytes_before': bytes_before,
+        'bytes_after': bytes_after,
+        'bytes_saved': bytes_before - bytes_after,
+        'columns': changed
+    }
+    return pd.DataFrame(optimized, index=df.index), report
+
+def _compact_column(series, categorical_max_ratio, downcast_floats):
+    dtype = series.dtype
+    if pd.api.types.is_integer_dtype(dtype) and not pd.api.types.is_extension_array_dtype(dtype):
+        return pd.to_numeric(series, downcast='integer')
+    if downcast_floats and dtype == np.float64:
+        narrow = series.astype(np.float32)
+        if np.array_equal(narrow.to_numpy(dtype=np.float64), series.to_numpy(), equal_nan=True):
+            return narrow
+        return series
+    if dtype != object:
+        return series
+    
+    # Distinct values decide the dtype, so each is inspected once. Columns with
+    # unhashable cells (lists from multi-select or lookup columns) are left as they are
+    try:
+        codes, uniques = pd.factorize(series)
+    except TypeError:
+        return series
+    types = set(map(type, uniques))
+    if not types:
+        return series
+    if types <= {bool, np.bool_}:
+        return series.astype('boolean')
+    if types == {str} and len(uniques) <= categorical_max_ratio * len(series):
+        # Sorted categories keep groupby output in the same order as for plain text
+        order = np.argsort(uniques)
+        rank = np.empty(len(order), dtype=codes.dtype)
+        rank[order] = np.arange(len(order))
+        codes = np.where(codes >= 0, rank[codes], -1)
+        categorical = pd.Categorical.from_codes(codes, categories=uniques[order])
+        return pd.Series(categorical, index=series.index, name=series.name)
+    return series
@@ -0,0 +1,59 @@
+import copy
+import json
+import logging
+import os
+import threading
+import time
+from config.config import Config
+
+class MetadataCache:
+    """On-disk cache for API metadata (docs, tables, column mappings) with per-entry TTL"""
+    
+    def __init__(self, path=None, default_ttl=None):
+        self.path = path or os.path.join(Config.CACHE_DIR, 'metadata.json')
+        self.default_ttl = Config.METADATA_CACHE_TTL if default_ttl is None else default_ttl
+        self._entries = None
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+    
+    def _load(self):
+        if self._entries is None:
+            self._entries = {}
+            if os.path.exists(self.path):
+                try:
+                    with open(self.path, 'r') as f:
+                        self._entries = json.load(f)
+                except (OSError, ValueError) as e:
+                    self.logger.warning(f"Ignoring unreadable metadata cache {self.path}: {e}")
+        return self._entries
+    
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self._entries, f)
+        os.replace(tmp_path, self.path)
+    
+    def get(self, key):
+        """Return the cached value for key, or None if missing or expired"""
+        with self._lock:
+            entry = self._load().get(key)
+            if entry is None or entry['expires_at'] < time.time():
+                return None
+            # Hand out a copy so callers can't mutate the cached entry
+            return copy.deepcopy(entry['value'])
+    
+    def set(self, key, value, ttl=None):
+        """Cache a value for ttl seconds (default_ttl if None)"""
+        ttl = self.default_ttl if ttl is None else ttl
+        with self._lock:
+            self._load()[key] = {'value': value, 'expires_at': time.time() + ttl}
+            self._save()
+    
+    def invalidate(self, prefix=None):
+        """Drop entries whose key starts with prefix, or every entry if prefix is None"""
+        with self._lock:
+            entries = self._load()
+            for key in [key for key in entries if prefix is None or key.startswith(prefix)]:
+                del entries[key]
+            self._save()
@@ -0,0 +1,102 @@
+"""
+Single-pass metrics engine behind TimesheetProcessor.calculate_timesheet_metrics
+and TimesheetProcessor.generate_summary
+"""
+
+import pandas as pd
+from src.rollup import RollupCube
+
+HOUR_KEYWORDS = ['hour', 'time', 'duration']
+PROJECT_KEYWORDS = ['project', 'client', 'task', 'category']
+PERSON_KEYWORDS = ['person', 'employee', 'user', 'member', 'assignee', 'owner', 'staff', 'name']
+
+# Daily hours above this count as overtime
+OVERTIME_THRESHOLD = 8
+
+def find_columns(df):
+    """
+    Classify columns in one scan
+    
+    Returns the first hour column (numeric, named like hours/time/duration),
+    the first datetime column, the first project-like column and the first
+    person-like column that is not the project column, each or None.
+    """
+    hour_column = date_column = project_column = None
+    person_columns = []
+    for col in df.columns:
+        name = str(col).lower()
+        dtype = df[col].dtype
+        if hour_column is None and pd.api.types.is_numeric_dtype(dtype) and any(k in name for k in HOUR_KEYWORDS):
+            hour_column = col
+        if date_column is None and dtype == 'datetime64[ns]':
+            date_column = col
+        if project_column is None and any(k in name for k in PROJECT_KEYWORDS):
+            project_column = col
+        if any(k in name for k in PERSON_KEYWORDS):
+            person_columns.append(col)
+    person_column = next((col for col in person_columns if col != project_column), None)
+    return hour_column, date_column, project_column, person_column
+
+def build_rollup(df, columns=None):
+    """Build the rollup cube for df's hour column, or return None if it has no hour column"""
+    hour_column, date_column, project_column, person_column = columns or find_columns(df)
+    if hour_column is None:
+        return None
+    return RollupCube.build(df, hour_column, date_column, project_column, person_column)
+
+def compute_metrics(df, rollup=None):
+    """
+    Compute every statistic the metrics and summary views need, without copying df
+    
+    Args:
+        df: Cleaned timesheet DataFrame
+        rollup: Prebuilt RollupCube for df, built here when omitted
+    
+    Returns a dict with the classified columns, 'null_counts' for every column,
+    'hours' (sum/mean/max/min/count/overtime of the hour column), 'dates'
+    (min/max/count of the date column), 'weekly' (hours per ISO year-week),
+    'projects' (hours per project) and the 'rollup' cube; statistics are None
+    when their columns are missing.
+    """
+    columns = find_columns(df)
+    hour_column, date_column, project_column, person_column = columns
+    stats = {
+        'row_count': len(df),
+        'columns': list(df.columns),
+        'hour_column': hour_column,
+        'date_column': date_column,
+        'project_column': project_column,
+        'person_column': person_column,
+        'null_counts': df.isna().sum(),
+        'hours': None,
+        'dates': None,
+        'weekly': None,
+        'projects': None,
+        'rollup': None
+    }
+    
+    if date_column is not None:
+        dates = df[date_column]
+        stats['dates'] = {'min': dates.min(), 'max': dates.max(), 'count': int(dates.count())}
+    
+    if hour_column is not None:
+        hours = df[hour_column]
+        stats['hours'] = {
+            'sum': hours.sum(),
+            'mean': hours.mean(),
+            'max': hours.max(),
+            'min': hours.min(),
+            'count': int(hours.count()),
+            'overtime': int((hours > OVERTIME_THRESHOLD).sum())
+        }
+        
+        # Breakdowns are answered from the rollup cube rather than the raw rows
+        if rollup is None:
+            rollup = build_rollup(df, columns)
+        stats['rollup'] = rollup
+        if date_column is not None:
+            stats['weekly'] = rollup.query('week')
+        if project_column is not None:
+            stats['projects'] = rollup.query('project')
+    
+    return stats
@@ -0,0 +1,182 @@
+import logging
+import os
+import queue
+import threading
+from datetime import datetime
+from itertools import chain
+import pandas as pd
+from config.config import Config
+from src.csv_stream import StreamingCsvWriter
+
+# Marks the end of the page stream on the queue
+_END_OF_PAGES = object()
+
+class PipelinedExtraction:
+    """
+    Overlap network I/O with processing: pages are fetched on a background
+    thread and handed through a bounded queue to the calling thread, which
+    decodes and cleans each page while the next one is in flight.
+    """
+    
+    def __init__(self, extractor, processor, queue_size=None):
+        self.extractor = extractor
+        self.processor = processor
+        self.queue_size = queue_size or Config.PIPELINE_QUEUE_SIZE
+        self.logger = logging.getLogger(__name__)
+    
+    def run(self, doc_id=None, table_id=None, max_rows=None, selected_columns=None, progress_callback=None,
+            resume=False, reinfer_schema=False):
+        """
+        Extract, decode and clean a table page by page
+        
+        The cleaned rows are also upserted into the extractor's row store.
+        
+        Args:
+            doc_id: Document ID
+            table_id: Table ID
+            max_rows: Maximum number of rows to retrieve (None for all)
+            selected_columns: List of column names to extract (None for all)
+            progress_callback: Called with the running row count after each page
+            resume: Continue from the checkpoint left by an interrupted extraction
+            reinfer_schema: Infer column types again instead of using the stored schema
+        
+        Returns:
+            Tuple of (cleaned DataFrame, raw data dict as from get_timesheet_data)
+        """
+        doc_id = doc_id or Config.DOC_ID
+        table_id = table_id or Config.TABLE_ID
+        column_mapping, column_formats = self.extractor.get_columns(doc_id, table_id)
+        
+        snapshot = self.extractor.raw_store.create(doc_id, table_id, column_mapping, column_formats)
+        all_rows = []
+        cleaned_pages = []
+        for page, df_page in self._iter_cleaned_pages(doc_id, table_id, max_rows, selected_columns, column_mapping,
+                                                      column_formats, resume, reinfer_schema, snapshot):
+            all_rows.extend(page)
+            cleaned_pages.append(df_page)
+            if progress_callback:
+                progress_callback(len(all_rows))
+        
+        raw_data = {
+            'items': all_rows,
+            'column_mapping': column_mapping,
+            'column_formats': column_formats
+        }
+        self.extractor.complete_raw_snapshot(snapshot, column_mapping, column_formats)
+        
+        df_cleaned = pd.concat(cleaned_pages, ignore_index=True) if cleaned_pages else pd.DataFrame()
+        self.extractor.store_rows(df_cleaned, raw_data, doc_id, table_id, complete=max_rows is None)
+        self.logger.info(f"Pipelined extraction processed {len(df_cleaned)} rows in {len(cleaned_pages)} pages")
+        return df_cleaned, raw_data
+    
+    def stream_to_csv(self, filename=None, doc_id=None, table_id=None, max_rows=None, selected_columns=None,
+                      progress_callback=None, resume=False, reinfer_schema=False):
+        """
+        Export a table to processed CSV page by page, without holding the table in memory
+        
+        Each page is cleaned and appended as soon as it arrives, its raw
+        rows go to a raw snapshot and its cleaned rows are upserted into the
+        row store; the file is written under a temporary name and renamed
+        once complete. The header is taken from the column mapping.
+        Arguments are as for run().
+        
+        Returns:
+            Tuple of (CSV path, number of rows written)
+        """
+        doc_id = doc_id or Config.DOC_ID
+        table_id = table_id or Config.TABLE_ID
+        column_mapping, column_formats = self.extractor.get_columns(doc_id, table_id)
+        
+        if filename is None:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            filename = f"timesheet_processed_{timestamp}.csv"
+        filepath = os.path.join(Config.PROCESSED_DATA_DIR, filename)
+        
+        snapshot = self.extractor.raw_store.create(doc_id, table_id, column_mapping, column_formats)
+        row_store = self.extractor.row_store
+        row_ids = []
+        pages = self._iter_cleaned_pages(doc_id, table_id, max_rows, selected_columns, column_mapping,
+                                         column_formats, resume, reinfer_schema, snapshot)
+        try:
+            # The first page may refresh a stale column mapping, so the header waits for it
+            first_page = next(pages, None)
+            with StreamingCsvWriter(filepath, self._csv_header(column_mapping, selected_columns)) as writer:
+                for page, df_page in chain([first_page] if first_page is not None else [], pages):
+                    writer.write(df_page)
+                    page_ids = [row.get('id') for row in page]
+                    row_store.upsert(doc_id, table_id, df_page, page_ids)
+                    row_ids.extend(page_ids)
+                    if progress_callback:
+                        progress_callback(writer.rows_written)
+        finally:
+            pages.close()
+        
+        self.extractor.complete_raw_snapshot(snapshot, column_mapping, column_formats)
+        if max_rows is None:
+            row_store.retain(doc_id, table_id, row_ids)
+        return filepath, writer.rows_written
+    
+    @staticmethod
+    def _csv_header(column_mapping, selected_columns=None):
+        """Column names in table order, limited to the selected columns if any"""
+        columns = list(dict.fromkeys(column_mapping.values()))
+        if selected_columns:
+            columns = [col for col in columns if col in selected_columns]
+        return columns
+    
+    def _iter_cleaned_pages(self, doc_id, table_id, max_rows, selected_columns, column_mapping, column_formats,
+                            resume, reinfer_schema, snapshot=None):
+        """
+        Yield (raw rows, cleaned DataFrame) per page
+        
+        Pages are fetched on a background thread, which also appends them to
+        the raw snapshot, into a bounded queue while the previous page is
+        decoded and cleaned here. Closing the generator stops the fetcher.
+        """
+        pages = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        errors = []
+        
+        def fetch_pages():
+            try:
+                for page in self.extractor.iter_resumable_row_pages(doc_id, table_id, max_rows, selected_columns,
+                                                                    column_mapping, resume=resume,
+                                                                    column_formats=column_formats,
+                                                                    snapshot=snapshot):
+                    if not self._put(pages, page, stop):
+                        return
+            except Exception as e:
+                errors.append(e)
+            finally:
+                self._put(pages, _END_OF_PAGES, stop)
+        
+        fetcher = threading.Thread(target=fetch_pages, name="coda-page-fetcher", daemon=True)
+        fetcher.start()
+        
+        def queued_pages():
+            while True:
+                page = pages.get()
+                if page is _END_OF_PAGES:
+                    return
+                yield page
+        
+        try:
+            yield from self.processor.iter_cleaned_pages(queued_pages(), column_mapping, doc_id, table_id,
+                                                         column_formats, reinfer_schema)
+        finally:
+            stop.set()
+            fetcher.join()
+        
+        if errors:
+            raise errors[0]
+    
+    @staticmethod
+    def _put(pages, item, stop):
+        """Block until the item is queued, giving up once the consumer has stopped"""
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
@@ -0,0 +1,101 @@
+import logging
+import threading
+import time
+from config.config import Config
+
+class RateController:
+    """
+    Thread-safe token bucket whose refill rate adapts with AIMD
+    
+    Every healthy response raises the rate additively (by roughly `increase`
+    requests/second for each second of healthy traffic); every throttle event
+    cuts it multiplicatively by `decrease`. A Retry-After from the server pauses
+    the whole bucket, so all threads sharing it back off together.
+    """
+    
+    _shared = {}
+    _shared_lock = threading.Lock()
+    
+    def __init__(self, initial_rate=None, min_rate=None, max_rate=None, increase=None, decrease=None):
+        self.min_rate = min_rate or Config.RATE_LIMIT_MIN
+        self.max_rate = max_rate or Config.RATE_LIMIT_MAX
+        self.increase = increase or Config.RATE_LIMIT_INCREASE
+        self.decrease = decrease or Config.RATE_LIMIT_DECREASE
+        self.rate = min(self.max_rate, max(self.min_rate, initial_rate or Config.RATE_LIMIT_INITIAL))
+        
+        self._lock = threading.Lock()
+        self._tokens = 1.0
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        
+        self.requests = 0
+        self.throttle_events = 0
+        self.total_wait = 0.0
+        self.logger = logging.getLogger(__name__)
+    
+    @classmethod
+    def shared(cls, key):
+        """Return the process-wide controller for a key (the API token, since Coda throttles per token)"""
+        with cls._shared_lock:
+            if key not in cls._shared:
+                cls._shared[key] = cls()
+            return cls._shared[key]
+    
+    def _refill(self, now):
+        # Allow a burst of up to one second's worth of requests
+        capacity = max(1.0, self.rate)
+        self._tokens = min(capacity, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+    
+    def acquire(self):
+        """Block until a request may be sent; returns the seconds spent waiting"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    delay = self._paused_until - now
+                else:
+                    self._refill(now)
+                    if self._tokens >= 1.0:
+                        self._tokens -= 1.0
+                        self.requests += 1
+                        self.total_wait += waited
+                        return waited
+                    delay = (1.0 - self._tokens) / self.rate
+            
+            time.sleep(delay)
+            waited += delay
+    
+    def on_success(self):
+        """Additive increase after a healthy response"""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+    
+    def on_throttle(self, retry_after=None):
+        """Multiplicative decrease after a 429, pausing everyone for Retry-After if given"""
+        with self._lock:
+            now = time.monotonic()
+            self.throttle_events += 1
+            
+            # A burst of concurrent 429s is one congestion signal, not many
+            if now - self._last_decrease >= 1.0 / self.rate:
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                self._last_decrease = now
+            
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+            self._tokens = 0.0
+            
+            self.logger.warning(f"Throttled by API, request rate lowered to {self.rate:.2f}/s")
+    
+    def stats(self):
+        """Current rate and counters for reporting"""
+        with self._lock:
+            return {
+                'current_rate': round(self.rate, 2),
+                'requests': self.requests,
+                'throttle_events': self.throttle_events,
+                'total_wait_seconds': round(self.total_wait, 2)
+            }
@@ -0,0 +1,382 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from config.config import Config
+
+# SQLite caps the number of bound parameters per statement
+SQL_BATCH_SIZE = 500
+
+# Unreferenced row versions younger than this are kept by garbage collection, since
+# a concurrent extraction may have stored them but not yet written its references
+GC_GRACE_SECONDS = 3600
+
+# Fields of a row item that make up a row version. The rest (href, name, ...) follows from
+# them, except 'index', the row's position, which shifts for every later row when a row
+# is inserted or deleted; it is kept in the snapshot's references instead
+CONTENT_KEYS = ('id', 'values', 'updatedAt')
+POSITION_KEY = 'index'
+
+def row_hash(row):
+    """Content hash of a row item's ID, values and update time"""
+    content = {key: row.get(key) for key in CONTENT_KEYS}
+    canonical = json.dumps(content, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+class RowObjectStore:
+    """
+    Content-addressed store of row versions shared by every snapshot
+    
+    Each distinct row version is kept once, zlib-compressed, in a SQLite
+    database. Versions are found by content hash and referenced by a small
+    integer ID, which keeps snapshot reference lists compact.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self._connection = None
+        self._lock = threading.Lock()
+    
+    @property
+    def connection(self):
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS objects ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, hash TEXT NOT NULL UNIQUE, row_id TEXT, "
+                "data BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+        return self._connection
+    
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+    
+    def put_many(self, rows):
+        """
+        Store the row versions that are not stored yet, without their position
+        
+        Returns:
+            (list of object IDs in row order, number of newly stored versions)
+        """
+        hashes = [row_hash(row) for row in rows]
+        with self._lock:
+            ids = self._lookup(hashes)
+            new_objects = {}
+            for row, digest in zip(rows, hashes):
+                if digest not in ids and digest not in new_objects:
+                    stored = {key: value for key, value in row.items() if key != POSITION_KEY}
+                    data = zlib.compress(json.dumps(stored, separators=(',', ':')).encode('utf-8'))
+                    new_objects[digest] = (digest, row.get('id'), data, time.time())
+            
+            if new_objects:
+                with self.connection:
+                    self.connection.executemany(
+                        "INSERT OR IGNORE INTO objects (hash, row_id, data, created_at) VALUES (?, ?, ?, ?)",
+                        new_objects.values()
+                    )
+                ids.update(self._lookup(list(new_objects)))
+        return [ids[digest] for digest in hashes], len(new_objects)
+    
+    def get_many(self, object_ids):
+        """Return {object ID: row} for the given IDs"""
+        rows = {}
+        with self._lock:
+            for batch in _batches(list(set(object_ids))):
+                placeholders = ','.join('?' * len(batch))
+                for object_id, data in self.connection.execute(
+                        f"SELECT id, data FROM objects WHERE id IN ({placeholders})", batch):
+                    rows[object_id] = json.loads(zlib.decompress(data))
+        return rows
+    
+    def _lookup(self, hashes):
+        """Map the stored hashes among hashes to their object IDs"""
+        ids = {}
+        for batch in _batches(list(set(hashes))):
+            placeholders = ','.join('?' * len(batch))
+            ids.update(self.connection.execute(
+                f"SELECT hash, id FROM objects WHERE hash IN ({placeholders})", batch))
+        return ids
+    
+    def garbage_collect(self, referenced):
+        """Delete row versions whose IDs are not referenced; returns how many were removed"""
+        cutoff = time.time() - GC_GRACE_SECONDS
+        with self._lock:
+            stale = [object_id for object_id, in self.connection.execute(
+                "SELECT id FROM objects WHERE created_at < ?", (cutoff,)) if object_id not in referenced]
+            with self.connection:
+                for batch in _batches(stale):
+                    placeholders = ','.join('?' * len(batch))
+                    self.connection.execute(f"DELETE FROM objects WHERE id IN ({placeholders})", batch)
+        return len(stale)
+
+def _batches(values):
+    for start in range(0, len(values), SQL_BATCH_SIZE):
+        yield values[start:start + SQL_BATCH_SIZE]
+
+class RawSnapshot:
+    """
+    One extraction's raw rows, recorded page by page as references into a
+    RowObjectStore
+    
+    Layout of a snapshot directory:
+        manifest.json   doc/table, column mapping and formats, page and row
+                        counts, status ('in_progress' until complete)
+        refs.ndjson.gz  one [row ID, object ID, row index] per line, in row order;
+                        each page is its own gzip member, so every page written
+                        before a crash is readable
+    Unchanged rows are shared with earlier snapshots, so a snapshot costs its
+    references plus the row versions that are new.
+    """
+    
+    REFS_FILE = 'refs.ndjson.gz'
+    MANIFEST_FILE = 'manifest.json'
+    
+    def __init__(self, path, objects):
+        self.path = path
+        self.objects = objects
+        self.refs_path = os.path.join(path, self.REFS_FILE)
+        self.manifest_path = os.path.join(path, self.MANIFEST_FILE)
+        self.manifest = self._read_manifest()
+    
+    def _read_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return None
+        with open(self.manifest_path, 'r') as f:
+            return json.load(f)
+    
+    def _write_manifest(self):
+        """Write the manifest atomically so it always describes complete pages"""
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+    
+    def start(self, doc_id, table_id, column_mapping=None, column_formats=None):
+        os.makedirs(self.path, exist_ok=True)
+        self.manifest = {
+            'doc_id': doc_id,
+            'table_id': table_id,
+            'status': 'in_progress',
+            'started_at': datetime.now().isoformat(),
+            'completed_at': None,
+            'pages': 0,
+            'rows': 0,
+            'new_row_versions': 0,
+            'bytes': 0,
+            'column_mapping': column_mapping or {},
+            'column_formats': column_formats or {}
+        }
+        self._write_manifest()
+        return self
+    
+    def append_page(self, rows):
+        """Store the page's new row versions, append its references, then record it in the manifest"""
+        object_ids, new_versions = self.objects.put_many(rows)
+        data = ''.join(json.dumps([row.get('id'), object_id, row.get(POSITION_KEY)]) + '\n'
+                       for row, object_id in zip(rows, object_ids))
+        with gzip.open(self.refs_path, 'at', encoding='utf-8') as f:
+            f.write(data)
+        
+        self.manifest['pages'] += 1
+        self.manifest['rows'] += len(rows)
+        self.manifest['new_row_versions'] += new_versions
+        self.manifest['bytes'] = os.path.getsize(self.refs_path)
+        self._write_manifest()
+    
+    def complete(self, column_mapping=None, column_formats=None):
+        """Mark the snapshot complete, recording the final column mapping and formats if given"""
+        if column_mapping is not None:
+            self.manifest['column_mapping'] = column_mapping
+        if column_formats is not None:
+            self.manifest['column_formats'] = column_formats
+        self.manifest['status'] = 'complete'
+        self.manifest['completed_at'] = datetime.now().isoformat()
+        self._write_manifest()
+    
+    def iter_refs(self):
+        """Yield (row ID, object ID, row index) in row order"""
+        if not os.path.exists(self.refs_path):
+            return
+        with gzip.open(self.refs_path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                ref = json.loads(line)
+                yield ref[0], ref[1], ref[2] if len(ref) > 2 else None
+    
+    def iter_row_chunks(self, chunk_size=500, max_rows=None):
+        """Yield the snapshot's rows, or its first max_rows, in lists of up to chunk_size, reading lazily"""
+        refs = []
+        for position, ref in enumerate(self.iter_refs()):
+            if max_rows is not None and position >= max_rows:
+                break
+            refs.append(ref)
+            if len(refs) >= chunk_size:
+                yield self._resolve(refs)
+                refs = []
+        if refs:
+            yield self._resolve(refs)
+    
+    def _resolve(self, refs):
+        """Rows for (row ID, object ID, row index) references, with their index put back"""
+        rows = self.objects.get_many([object_id for _, object_id, _ in refs])
+        missing = [object_id for _, object_id, _ in refs if object_id not in rows]
+        if missing:
+            raise ValueError(f"Snapshot {self.path} references {len(missing)} missing row versions")
+        return [rows[object_id] if index is None else {**rows[object_id], POSITION_KEY: index}
+                for _, object_id, index in refs]
+    
+    def load(self):
+        """Load the snapshot in get_timesheet_data's shape"""
+        items = [row for chunk in self.iter_row_chunks() for row in chunk]
+        return {
+            'items': items,
+            'column_mapping': self.manifest.get('column_mapping', {}),
+            'column_formats': self.manifest.get('column_formats', {})
+        }
+
+class RawSnapshotStore:
+    """
+    Raw extraction snapshots under Config.RAW_DATA_DIR, with count/age retention per table
+    
+    Row versions live once in objects.sqlite; snapshots only reference them.
+    """
+    
+    OBJECTS_FILE = 'objects.sqlite'
+    
+    def __init__(self, raw_dir=None, keep_count=None, keep_days=None, incomplete_max_hours=None):
+        """
+        Args:
+            raw_dir: Directory holding snapshot directories (default Config.RAW_DATA_DIR)
+            keep_count: Complete snapshots kept per table, 0 for no limit
+            keep_days: Complete snapshots older than this many days are removed, 0 for no limit
+            incomplete_max_hours: Incomplete snapshots not written to for this many hours are
+                                  treated as abandoned (default Config.RAW_INCOMPLETE_MAX_HOURS)
+        """
+        self.raw_dir = raw_dir or Config.RAW_DATA_DIR
+        self.keep_count = Config.RAW_RETENTION_COUNT if keep_count is None else keep_count
+        self.keep_days = Config.RAW_RETENTION_DAYS if keep_days is None else keep_days
+        self.incomplete_max_hours = (Config.RAW_INCOMPLETE_MAX_HOURS if incomplete_max_hours is None
+                                     else incomplete_max_hours)
+        self.objects = RowObjectStore(os.path.join(self.raw_dir, self.OBJECTS_FILE))
+        self.logger = logging.getLogger(__name__)
+    
+    def create(self, doc_id, table_id, column_mapping=None, column_formats=None):
+        """Start a new snapshot for a table"""
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        base_path = os.path.join(self.raw_dir, f"timesheet_raw_{doc_id}_{table_id}_{timestamp}")
+        path = base_path
+        suffix = 1
+        while os.path.exists(path):
+            suffix += 1
+            path = f"{base_path}_{suffix}"
+        
+        self.logger.info(f"Saving raw data to {path}")
+        return RawSnapshot(path, self.objects).start(doc_id, table_id, column_mapping, column_formats)
+    
+    def list_snapshots(self, doc_id=None, table_id=None, complete_only=True):
+        """Snapshots oldest first, optionally limited to one table and to complete ones"""
+        if not os.path.isdir(self.raw_dir):
+            return []
+        
+        snapshots = []
+        for name in os.listdir(self.raw_dir):
+            snapshot = RawSnapshot(os.path.join(self.raw_dir, name), self.objects)
+            manifest = snapshot.manifest
+            if manifest is None:
+                continue
+            if doc_id and manifest['doc_id'] != doc_id or table_id and manifest['table_id'] != table_id:
+                continue
+            if complete_only and manifest['status'] != 'complete':
+                continue
+            snapshots.append(snapshot)
+        return sorted(snapshots, key=lambda snapshot: snapshot.manifest['started_at'])
+    
+    def get(self, name):
+        """Snapshot by directory name or path; raises ValueError if it has no manifest"""
+        path = name if os.path.isdir(name) else os.path.join(self.raw_dir, name)
+        snapshot = RawSnapshot(path, self.objects)
+        if snapshot.manifest is None:
+            raise ValueError(f"No raw snapshot at {path}")
+        return snapshot
+    
+    def select(self, doc_id=None, table_id=None, since=None, until=None):
+        """
+        Complete snapshots started within a date range, oldest first
+        
+        Args:
+            since: First day included, 'YYYY-MM-DD' (no lower bound when omitted)
+            until: Last day included, 'YYYY-MM-DD' (no upper bound when omitted)
+        """
+        snapshots = self.list_snapshots(doc_id, table_id)
+        if since:
+            snapshots = [s for s in snapshots if s.manifest['started_at'][:10] >= since]
+        if until:
+            snapshots = [s for s in snapshots if s.manifest['started_at'][:10] <= until]
+        return snapshots
+    
+    def abandoned_snapshots(self, doc_id=None, table_id=None):
+        """
+        Incomplete snapshots that will never be completed
+        
+        A snapshot is judged only by when it was last written to: one left in
+        progress with no new page for incomplete_max_hours is abandoned, however
+        many later extractions of its table have started or completed meanwhile,
+        since a slow or concurrent run may still be writing it. Resuming an
+        interrupted extraction moves its rows into a new snapshot and removes the
+        old one, so a stale snapshot is never picked up again.
+        """
+        cutoff = time.time() - self.incomplete_max_hours * 3600
+        return [snapshot for snapshot in self.list_snapshots(doc_id, table_id, complete_only=False)
+                if snapshot.manifest['status'] != 'complete' and os.path.getmtime(snapshot.manifest_path) < cutoff]
+    
+    def apply_retention(self, doc_id, table_id):
+        """
+        Remove complete snapshots of a table beyond the count and age limits
+        and its abandoned incomplete ones, then drop row versions no remaining
+        snapshot references
+        """
+        snapshots = self.list_snapshots(doc_id, table_id)
+        expired = []
+        if self.keep_count and len(snapshots) > self.keep_count:
+            expired = snapshots[:len(snapshots) - self.keep_count]
+        if self.keep_days:
+            cutoff = (datetime.now() - timedelta(days=self.keep_days)).isoformat()
+            expired += [s for s in snapshots if s.manifest['started_at'] < cutoff and s not in expired]
+        expired += self.abandoned_snapshots(doc_id, table_id)
+        
+        for snapshot in expired:
+            self.remove(snapshot)
+        if expired:
+            self.garbage_collect()
+        return [snapshot.path for snapshot in expired]
+    
+    def remove(self, snapshot):
+        """Delete a snapshot; row versions only it referenced are left to garbage_collect"""
+        shutil.rmtree(snapshot.path, ignore_errors=True)
+        self.logger.info(f"Removed raw snapshot {snapshot.path}")
+    
+    def garbage_collect(self):
+        """
+        Delete row versions referenced by no live snapshot
+        
+        Complete snapshots and those still being written are live; abandoned
+        ones are not.
+        """
+        abandoned = {snapshot.path for snapshot in self.abandoned_snapshots()}
+        referenced = set()
+        for snapshot in self.list_snapshots(complete_only=False):
+            if snapshot.path in abandoned:
+                continue
+            referenced.update(object_id for _, object_id, _ in snapshot.iter_refs())
+        removed = self.objects.garbage_collect(referenced)
+        self.logger.info(f"Removed {removed} unreferenced row versions")
+        return removed
@@ -0,0 +1,106 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from config.config import Config
+from src.raw_store import RawSnapshotStore
+
+def _replay_in_worker(raw_dir, snapshot_path, chunk_size, schema):
+    """Replay one snapshot in a worker process with its own store and processor"""
+    from src.data_processor import TimesheetProcessor
+    
+    raw_store = RawSnapshotStore(raw_dir)
+    try:
+        return TimesheetProcessor().replay_snapshot(raw_store.get(snapshot_path), chunk_size=chunk_size,
+                                                    schema=schema)
+    finally:
+        raw_store.objects.close()
+
+def _table(snapshot):
+    return snapshot.manifest['doc_id'], snapshot.manifest['table_id']
+
+class SnapshotReplay:
+    """
+    Rebuild processed outputs from stored raw snapshots instead of the Coda API
+    
+    Each snapshot is streamed through the processor's normal decode and clean
+    steps into its own CSV. Several snapshots are replayed in parallel worker
+    processes, since decoding and cleaning are CPU-bound.
+    """
+    
+    def __init__(self, processor, raw_store=None, workers=None):
+        """
+        Args:
+            processor: TimesheetProcessor
+            raw_store: RawSnapshotStore to read from (default under Config.RAW_DATA_DIR)
+            workers: Worker processes (default Config.REPLAY_WORKERS, 0 for one per CPU)
+        """
+        self.processor = processor
+        self.raw_store = raw_store or RawSnapshotStore()
+        workers = Config.REPLAY_WORKERS if workers is None else workers
+        self.workers = workers or os.cpu_count() or 1
+        self.logger = logging.getLogger(__name__)
+    
+    def run(self, snapshots, chunk_size=None, reinfer_schema=False, progress_callback=None):
+        """
+        Replay snapshots into processed CSVs
+        
+        Args:
+            snapshots: RawSnapshots, e.g. from RawSnapshotStore.select()
+            chunk_size: Rows processed at a time (default Config.REPLAY_CHUNK_SIZE)
+            reinfer_schema: Infer each table's column types again before replaying
+            progress_callback: Called with (snapshots done, total) as each one finishes
+        
+        Returns:
+            List of (snapshot path, CSV path, rows written) in snapshot order
+        """
+        schemas = self._infer_schemas(snapshots, chunk_size) if reinfer_schema else {}
+        
+        workers = min(self.workers, len(snapshots))
+        results = {}
+        if workers <= 1:
+            for snapshot in snapshots:
+                results[snapshot.path] = self.processor.replay_snapshot(snapshot, chunk_size=chunk_size,
+                                                                        schema=schemas.get(_table(snapshot)))
+                if progress_callback:
+                    progress_callback(len(results), len(snapshots))
+        else:
+            # Workers open their own database connection; don't share this one across the fork
+            self.raw_store.objects.close()
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(_replay_in_worker, self.raw_store.raw_dir, snapshot.path, chunk_size,
+                                    schemas.get(_table(snapshot))): snapshot.path
+                    for snapshot in snapshots
+                }
+                for future in as_completed(futures):
+                    results[futures[future]] = future.result()
+                    if progress_callback:
+                        progress_callback(len(results), len(snapshots))
+        
+        total_rows = sum(rows for _, rows in results.values())
+        self.logger.info(f"Replayed {len(snapshots)} snapshots ({total_rows} rows) with {max(workers, 1)} workers")
+        return [(snapshot.path, *results[snapshot.path]) for snapshot in snapshots]
+    
+    def _infer_schemas(self, snapshots, chunk_size=None):
+        """
+        Infer column types once per table from the first chunk of its newest
+        snapshot, so every snapshot of a table is cleaned alike
+        
+        The types are only handed to the replays, never stored: the stored
+        schema belongs to live extractions, and workers writing it at once
+        would race on the same file.
+        """
+        newest = {}
+        for snapshot in snapshots:
+            newest[_table(snapshot)] = snapshot
+        
+        schemas = {}
+        for table, snapshot in newest.items():
+            manifest = snapshot.manifest
+            chunks = snapshot.iter_row_chunks(chunk_size or Config.REPLAY_CHUNK_SIZE)
+            df = self.processor.process_raw_data({'items': next(chunks, []),
+                                                  'column_mapping': manifest.get('column_mapping', {})})
+            chunks.close()
+            schemas[table] = self.processor.resolve_schema(df, *table, manifest.get('column_formats'),
+                                                           reinfer=True, save=False)
+        return schemas
@@ -0,0 +1,151 @@
+"""
+Materialized rollup cube over timesheet hours
+
+The cube is built once per DataFrame at day × project × person grain with
+sum/count/min/max of the hour column. Coarser questions (ISO week, month,
+project only, ...) are answered by rolling those cells up rather than
+regrouping the raw rows.
+"""
+
+import pandas as pd
+
+TIME_GRAINS = ('day', 'week', 'month')
+AGGREGATIONS = ('sum', 'count', 'min', 'max', 'mean')
+
+def iso_week_labels(dates):
+    """Label datetimes by ISO year and week, e.g. '2024-W05', so weeks never merge across years"""
+    iso = dates.dt.isocalendar()
+    labels = iso['year'].astype(str) + '-W' + iso['week'].astype(str).str.zfill(2)
+    return labels.where(dates.notna())
+
+def time_grain_labels(dates, grain):
+    """
+    Label datetimes by 'day' (midnight timestamp), 'week' ('2024-W05') or 'month' ('2024-03')
+    
+    Labels are computed for the distinct days only and broadcast back.
+    """
+    day_codes, days = pd.factorize(dates.dt.normalize(), use_na_sentinel=False)
+    days = pd.Series(days)
+    if grain == 'day':
+        labels = days
+    elif grain == 'week':
+        labels = iso_week_labels(days)
+    else:
+        labels = days.dt.strftime('%Y-%m')
+    return pd.Series(labels.to_numpy()[day_codes], index=dates.index, name=grain)
+
+class RollupCube:
+    def __init__(self, cells, value_column, date_column=None, project_column=None, person_column=None):
+        """
+        Args:
+            cells: DataFrame of cube cells with dimension columns and sum/count/min/max
+            value_column: Name of the aggregated hour column
+            date_column, project_column, person_column: Source column names of each dimension
+        """
+        self.cells = cells
+        self.value_column = value_column
+        self.date_column = date_column
+        self.project_column = project_column
+        self.person_column = person_column
+        self._results = {}
+    
+    @classmethod
+    def build(cls, df, value_column, date_column=None, project_column=None, person_column=None):
+        """
+        Build the cube from raw rows, or return None when there is no dimension to group by
+        
+        Rows with missing keys are kept in their own cells; queries drop them
+        only for the dimensions they group by, just like a groupby on raw rows.
+        """
+        keys = []
+        if date_column is not None:
+            keys.append(df[date_column].dt.normalize().rename('day'))
+        if project_column is not None:
+            keys.append(df[project_column].rename('project'))
+        if person_column is not None:
+            keys.append(df[person_column].rename('person'))
+        if not keys:
+            return None
+        
+        # Group on one combined integer code per row, which is far cheaper than a
+        # multi-key groupby over raw values, then decode the distinct cells
+        codes = 0
+        uniques = []
+        for key in keys:
+            key_codes, key_uniques = pd.factorize(key, use_na_sentinel=False)
+            codes = codes * len(key_uniques) + key_codes
+            uniques.append(key_uniques)
+        
+        cells = df[value_column].groupby(codes, sort=False).agg(['sum', 'count', 'min', 'max'])
+        remaining = cells.index.to_numpy()
+        dimensions = {}
+        for key, key_uniques in zip(reversed(keys), reversed(uniques)):
+            remaining, position = divmod(remaining, len(key_uniques))
+            dimensions[key.name] = key_uniques.take(position)
+        cells = pd.DataFrame({key.name: dimensions[key.name] for key in keys}).join(cells.reset_index(drop=True))
+        
+        # Coarser time grains are derived from the distinct days, which is cheap on the cube
+        if date_column is not None:
+            cells['week'] = time_grain_labels(cells['day'], 'week').to_numpy()
+            cells['month'] = time_grain_labels(cells['day'], 'month').to_numpy()
+        
+        return cls(cells, value_column, date_column, project_column, person_column)
+    
+    @property
+    def dimensions(self):
+        """Dimensions the cube can be grouped by"""
+        dims = list(TIME_GRAINS) if self.date_column is not None else []
+        if self.project_column is not None:
+            dims.append('project')
+        if self.person_column is not None:
+            dims.append('person')
+        return dims
+    
+    def dimension_for(self, column):
+        """Map a source column name (or a time grain) to a cube dimension, or None"""
+        if column is None:
+            return None
+        if column == self.project_column:
+            return 'project'
+        if column == self.person_column:
+            return 'person'
+        if column in TIME_GRAINS and self.date_column is not None:
+            return column
+        return None
+    
+    def query(self, dimensions, aggregation='sum'):
+        """
+        Aggregate the hour column over one or more dimensions
+        
+        Args:
+            dimensions: Dimension name or list of names from `dimensions`
+            aggregation: One of 'sum', 'count', 'min', 'max', 'mean'
+        
+        Returns a Series indexed by the dimensions. Results are memoized since
+        the cube never changes after it is built.
+        """
+        if isinstance(dimensions, str):
+            dimensions = [dimensions]
+        dimensions = list(dimensions)
+        unknown = [dim for dim in dimensions if dim not in self.dimensions]
+        if not dimensions or unknown:
+            raise ValueError(f"Cannot group rollup by {unknown or dimensions}; available: {self.dimensions}")
+        if aggregation not in AGGREGATIONS:
+            raise ValueError(f"Unknown aggregation '{aggregation}', expected one of {AGGREGATIONS}")
+        
+        key = (tuple(dimensions), aggregation)
+        if key not in self._results:
+            grouped = self.cells.groupby(dimensions if len(dimensions) > 1 else dimensions[0], observed=True)
+            if aggregation == 'sum':
+                result = grouped['sum'].sum()
+            elif aggregation == 'count':
+                result = grouped['count'].sum()
+            elif aggregation == 'min':
+                result = grouped['min'].min()
+            elif aggregation == 'max':
+                result = grouped['max'].max()
+            else:
+                result = grouped['sum'].sum() / grouped['count'].sum().replace(0, float('nan'))
+            self._results[key] = result.rename(self.value_column)
+        
+        return self._results[key].copy()
@@ -0,0 +1,411 @@
+"""
+Embedded SQLite store of processed rows, keyed by Coda row ID
+
+Each (doc, table) gets its own SQL table with one typed column per
+processed column. Extractions upsert into it, and StoredTable pushes
+filters and group-bys down into SQL so that a question about a slice of the
+data only reads that slice.
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+import numpy as np
+import pandas as pd
+from config.config import Config
+from src.filters import SQL_DATETIME_FORMAT, FilterIndex, compile_filters, filters_to_sql
+from src.metrics import find_columns
+from src.rollup import TIME_GRAINS
+
+# SQL column type per column kind; datetimes are stored as SQL_DATETIME_FORMAT text
+SQL_TYPES = {'datetime': 'TEXT', 'numeric': 'REAL', 'boolean': 'INTEGER', 'text': 'TEXT'}
+
+# SQL aggregate per aggregation; TOTAL sums an all-NULL group to 0 as pandas does
+SQL_AGGREGATES = {'sum': 'TOTAL', 'count': 'COUNT', 'min': 'MIN', 'max': 'MAX', 'mean': 'AVG'}
+
+# Rows per executemany batch when upserting
+UPSERT_BATCH_SIZE = 5000
+
+def column_kind(series):
+    """Storage kind of a processed column"""
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return 'datetime'
+    if pd.api.types.is_bool_dtype(series.dtype):
+        return 'boolean'
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        return 'numeric'
+    return 'text'
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+def _sql_values(series, kind):
+    """Column values as Python objects SQLite accepts, missing values as None"""
+    if kind == 'datetime':
+        dates = pd.to_datetime(series, errors='coerce')
+        if getattr(dates.dtype, 'tz', None) is not None:
+            dates = dates.dt.tz_convert('UTC').dt.tz_localize(None)
+        values = dates.dt.strftime(SQL_DATETIME_FORMAT)
+    elif kind == 'numeric':
+        values = pd.to_numeric(series, errors='coerce').astype(float)
+    elif kind == 'boolean':
+        values = series.astype('boolean').astype('Int64')
+    else:
+        values = series.astype(object)
+        values = values.where(values.isna(), values.astype(str))
+    values = values.astype(object)
+    return values.where(values.notna(), None).tolist()
+
+def _from_sql(values, kind):
+    """Convert a column read from SQLite back to its processed dtype"""
+    if kind == 'datetime':
+        return pd.to_datetime(values, format=SQL_DATETIME_FORMAT)
+    if kind == 'numeric':
+        return pd.to_numeric(values).astype(float)
+    if kind == 'boolean':
+        return values.astype('boolean')
+    return values.astype(object).where(values.notna(), None)
+
+def _iso_week_sql(column):
+    """ISO week label ('2024-W05') of a stored datetime, computed from the Thursday of its week"""
+    thursday = f"date({column}, 'weekday 0', '-3 days')"
+    return (f"CASE WHEN {column} IS NULL THEN NULL ELSE printf('%s-W%02d', strftime('%Y', {thursday}), "
+            f"(CAST(strftime('%j', {thursday}) AS INTEGER) - 1) / 7 + 1) END")
+
+class RowStore:
+    """
+    SQLite database of processed rows, one table per (doc, table)
+    
+    Tables are created on first upsert with a column per processed column and
+    indexes on the date, project and person columns. Columns seen later are
+    added; a column keeps the kind it was first stored with until a page's
+    values no longer fit it, when it is retyped rather than stored as NULL.
+    """
+    
+    CATALOG_TABLE = 'row_store_columns'
+    
+    def __init__(self, path=None):
+        """
+        Args:
+            path: SQLite database file (default Config.ROW_STORE_PATH)
+        """
+        self.path = path or Config.ROW_STORE_PATH
+        self._connection = None
+        self._lock = threading.RLock()
+        self.logger = logging.getLogger(__name__)
+    
+    @property
+    def connection(self):
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.CATALOG_TABLE} ("
+                "table_name TEXT NOT NULL, name TEXT NOT NULL, kind TEXT NOT NULL, position INTEGER NOT NULL, "
+                "PRIMARY KEY (table_name, name))"
+            )
+        return self._connection
+    
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+    
+    @staticmethod
+    def table_name(doc_id, table_id):
+        return re.sub(r'\W', '_', f"rows_{doc_id}_{table_id}")
+    
+    def column_kinds(self, doc_id, table_id):
+        """{column: kind} of a stored table in column order, {} if it has not been stored"""
+        with self._lock:
+            rows = self.connection.execute(
+                f"SELECT name, kind FROM {self.CATALOG_TABLE} WHERE table_name = ? ORDER BY position",
+                (self.table_name(doc_id, table_id),)
+            ).fetchall()
+        return dict(rows)
+    
+    def table(self, doc_id=None, table_id=None):
+        """StoredTable for querying a table, or None if it has not been stored"""
+        doc_id = doc_id or Config.DOC_ID
+        table_id = table_id or Config.TABLE_ID
+        kinds = self.column_kinds(doc_id, table_id)
+        if not kinds:
+            return None
+        return StoredTable(self, self.table_name(doc_id, table_id), kinds)
+    
+    def upsert(self, doc_id, table_id, df, row_ids=None):
+        """
+        Insert or update rows by Coda row ID
+        
+        Args:
+            df: Cleaned DataFrame
+            row_ids: Coda row ID per row (default df.index, as from
+                     process_raw_data(index_by_row_id=True))
+        
+        Returns:
+            Number of rows written
+        """
+        row_ids = list(df.index if row_ids is None else row_ids)
+        if len(row_ids) != len(df):
+            raise ValueError(f"Got {len(row_ids)} row IDs for {len(df)} rows")
+        if df.empty:
+            return 0
+        
+        table = self.table_name(doc_id, table_id)
+        with self._lock, self.connection:
+            kinds, columns_changed = self._ensure_columns(table, df)
+            columns = [col for col in df.columns if col in kinds]
+            values = [_sql_values(df[col], kinds[col]) for col in columns]
+            
+            names = ', '.join(_quote(col) for col in columns)
+            updates = ', '.join(f"{_quote(col)} = excluded.{_quote(col)}" for col in columns)
+            # Unchanged rows are left alone, so re-storing a full extraction only writes what changed
+            changed = ' OR '.join(f"{_quote(col)} IS NOT excluded.{_quote(col)}" for col in columns)
+            sql = (f"INSERT INTO {table} (row_id{', ' if columns else ''}{names}) "
+                   f"VALUES ({', '.join('?' * (len(columns) + 1))}) "
+                   f"ON CONFLICT(row_id) DO {f'UPDATE SET {updates} WHERE {changed}' if columns else 'NOTHING'}")
+            rows = list(zip(row_ids, *values))
+            for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+                self.connection.executemany(sql, rows[start:start + UPSERT_BATCH_SIZE])
+            
+            # Indexing after the first load is cheaper than maintaining the indexes row by row
+            if columns_changed:
+                self._create_indexes(table, df)
+        
+        self.logger.info(f"Upserted {len(rows)} rows into {table}")
+        return len(rows)
+    
+    def delete(self, doc_id, table_id, row_ids):
+        """Delete rows by Coda row ID; returns how many were deleted"""
+        table = self.table_name(doc_id, table_id)
+        row_ids = list(row_ids)
+        if not row_ids or not self.column_kinds(doc_id, table_id):
+            return 0
+        
+        deleted = 0
+        with self._lock, self.connection:
+            for start in range(0, len(row_ids), UPSERT_BATCH_SIZE):
+                batch = row_ids[start:start + UPSERT_BATCH_SIZE]
+                cursor = self.connection.execute(
+                    f"DELETE FROM {table} WHERE row_id IN ({','.join('?' * len(batch))})", batch)
+                deleted += cursor.rowcount
+        return deleted
+    
+    def retain(self, doc_id, table_id, row_ids):
+        """Delete every row whose ID is not in row_ids, after a full extraction; returns how many were deleted"""
+        table = self.table_name(doc_id, table_id)
+        if not self.column_kinds(doc_id, table_id):
+            return 0
+        
+        with self._lock, self.connection:
+            self.connection.execute("CREATE TEMP TABLE IF NOT EXISTS retained_rows (row_id TEXT PRIMARY KEY)")
+            self.connection.execute("DELETE FROM retained_rows")
+            self.connection.executemany("INSERT OR IGNORE INTO retained_rows VALUES (?)",
+                                        ((row_id,) for row_id in row_ids))
+            cursor = self.connection.execute(
+                f"DELETE FROM {table} WHERE row_id NOT IN (SELECT row_id FROM retained_rows)")
+            self.connection.execute("DELETE FROM retained_rows")
+        
+        if cursor.rowcount:
+            self.logger.info(f"Removed {cursor.rowcount} rows no longer in the table from {table}")
+        return cursor.rowcount
+    
+    def _ensure_columns(self, table, df):
+        """
+        Create the table, add df's new columns and retype those its values don't fit
+        
+        Returns:
+            ({column: kind} after the change, whether columns were added or retyped)
+        """
+        kinds = dict(self.connection.execute(
+            f"SELECT name, kind FROM {self.CATALOG_TABLE} WHERE table_name = ?", (table,)).fetchall())
+        if not kinds:
+            self.connection.execute(f"CREATE TABLE IF NOT EXISTS {table} (row_id TEXT PRIMARY KEY)")
+        
+        new_columns = [col for col in df.columns if col not in kinds]
+        for col in new_columns:
+            kinds[col] = column_kind(df[col])
+            self.connection.execute(f"ALTER TABLE {table} ADD COLUMN {_quote(col)} {SQL_TYPES[kinds[col]]}")
+            self.connection.execute(f"INSERT INTO {self.CATALOG_TABLE} VALUES (?, ?, ?, ?)",
+                                    (table, col, kinds[col], len(kinds)))
+        
+        # A page whose values don't fit a column's kind would otherwise be stored as NULL
+        retyped = [col for col in df.columns if col not in new_columns and kinds[col] != 'text'
+                   and df[col].notna().any() and column_kind(df[col]) != kinds[col]]
+        for col in retyped:
+            kinds[col] = self._retype_column(table, col, kinds[col], column_kind(df[col]))
+        return kinds, bool(new_columns or retyped)
+    
+    def _retype_column(self, table, col, kind, page_kind):
+        """
+        Change the kind of a column a page's values don't fit
+        
+        A column with no values yet, e.g. one typed by an all-empty first page,
+        takes the page's kind; otherwise it is widened to text, with the values
+        already stored converted to their text form.
+        
+        Returns:
+            The column's new kind
+        """
+        has_values = self.connection.execute(
+            f"SELECT 1 FROM {table} WHERE {_quote(col)} IS NOT NULL LIMIT 1").fetchone() is not None
+        new_kind = 'text' if has_values else page_kind
+        
+        # SQLite can't change a column's type in place, so copy it into a new column;
+        # indexes on it have to go first and are rebuilt by the caller
+        for suffix in ('date', 'project', 'person'):
+            self.connection.execute(f"DROP INDEX IF EXISTS {table}_{suffix}")
+        if kind == 'boolean':
+            converted = f"CASE WHEN {_quote(col)} THEN 'True' ELSE 'False' END"
+        else:
+            converted = f"CAST({_quote(col)} AS TEXT)"
+        retyped = f"{col}__retyped"
+        self.connection.execute(f"ALTER TABLE {table} ADD COLUMN {_quote(retyped)} {SQL_TYPES[new_kind]}")
+        if has_values:
+            self.connection.execute(f"UPDATE {table} SET {_quote(retyped)} = {converted} "
+                                    f"WHERE {_quote(col)} IS NOT NULL")
+        self.connection.execute(f"ALTER TABLE {table} DROP COLUMN {_quote(col)}")
+        self.connection.execute(f"ALTER TABLE {table} RENAME COLUMN {_quote(retyped)} TO {_quote(col)}")
+        self.connection.execute(f"UPDATE {self.CATALOG_TABLE} SET kind = ? WHERE table_name = ? AND name = ?",
+                                (new_kind, table, col))
+        
+        self.logger.warning(f"Column {col} of {table} changed from {kind} to {new_kind}")
+        return new_kind
+    
+    def _create_indexes(self, table, df):
+        """Index the date, project and person columns"""
+        _, date_column, project_column, person_column = find_columns(df)
+        # Project and person lookups usually come with a date range, so those indexes lead with them
+        indexes = {'date': [date_column], 'project': [project_column, date_column],
+                   'person': [person_column, date_column]}
+        for suffix, columns in indexes.items():
+            if columns[0] is not None:
+                columns = [col for col in columns if col is not None]
+                self.connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS {table}_{suffix} ON {table} "
+                    f"({', '.join(_quote(col) for col in columns)})")
+
+class StoredTable:
+    """
+    Query handle on one RowStore table
+    
+    where() narrows the rows by filters translated to SQL; load() and
+    aggregate() then read only the matching rows. Filters SQL cannot express
+    exactly are re-applied in pandas to the rows read.
+    """
+    
+    def __init__(self, store, name, column_kinds, filters=None):
+        self.store = store
+        self.name = name
+        self.column_kinds = column_kinds
+        self.filters = list(filters or [])
+    
+    @property
+    def columns(self):
+        return list(self.column_kinds)
+    
+    def where(self, filters):
+        """New handle limited to rows matching filters as well as this handle's filters"""
+        return StoredTable(self.store, self.name, self.column_kinds, self.filters + [filters])
+    
+    def _where_sql(self):
+        """(WHERE clause or '', params, exact) for this handle's filters"""
+        clause, params, exact = filters_to_sql(self.filters, self.column_kinds)
+        return (f" WHERE {clause}" if clause else ''), params, exact
+    
+    def load(self, columns=None):
+        """
+        Read the matching rows as a cleaned DataFrame indexed by row ID
+        
+        Args:
+            columns: Columns to read (all when omitted)
+        """
+        where, params, exact = self._where_sql()
+        if not exact:
+            # The filters still need every column they refer to
+            columns = None
+        columns = [col for col in (columns or self.columns) if col in self.column_kinds]
+        
+        names = ''.join(f", {_quote(col)}" for col in columns)
+        with self.store._lock:
+            df = pd.read_sql_query(f"SELECT row_id{names} FROM {self.name}{where} ORDER BY rowid",
+                                   self.store.connection, params=params, index_col='row_id')
+        for col in columns:
+            df[col] = _from_sql(df[col], self.column_kinds[col])
+        
+        if not exact:
+            mask = compile_filters(self.filters)(df, FilterIndex())
+            if mask is not None:
+                df = df[mask]
+        self.store.logger.info(f"Loaded {len(df)} rows from {self.name}")
+        return df
+    
+    def count(self):
+        """Number of matching rows"""
+        where, params, exact = self._where_sql()
+        if not exact:
+            return len(self.load())
+        with self.store._lock:
+            return self.store.connection.execute(f"SELECT COUNT(*) FROM {self.name}{where}", params).fetchone()[0]
+    
+    def aggregate(self, keys, named):
+        """
+        Group and aggregate in SQL
+        
+        Args:
+            keys: Columns or time grains ('day', 'week', 'month') of the date column
+            named: {output column: (column, aggregation)}
+        
+        Returns:
+            DataFrame as from TimesheetProcessor.aggregate_data, or None when
+            the query cannot be answered in SQL
+        """
+        where, params, exact = self._where_sql()
+        if not exact:
+            return None
+        
+        key_sql = [self._key_sql(key) for key in keys]
+        if None in key_sql:
+            return None
+        aggregates = []
+        for name, (column, function) in named.items():
+            if self.column_kinds.get(column) != 'numeric' or function not in SQL_AGGREGATES:
+                return None
+            aggregates.append(f"{SQL_AGGREGATES[function]}({_quote(column)}) AS {_quote(name)}")
+        
+        # groupby drops rows with a missing key
+        conditions = ' AND '.join(f"{sql} IS NOT NULL" for sql in key_sql)
+        where = f"{where} AND {conditions}" if where else f" WHERE {conditions}"
+        selects = ', '.join([f"{sql} AS {_quote(key)}" for key, sql in zip(keys, key_sql)] + aggregates)
+        group_by = ', '.join(str(position) for position in range(1, len(keys) + 1))
+        with self.store._lock:
+            result = pd.read_sql_query(
+                f"SELECT {selects} FROM {self.name}{where} GROUP BY {group_by} ORDER BY {group_by}",
+                self.store.connection, params=params)
+        
+        for key in keys:
+            kind = 'datetime' if key == 'day' else self.column_kinds.get(key, 'text')
+            result[key] = _from_sql(result[key], kind)
+        for name, (column, function) in named.items():
+            if function == 'count':
+                result[name] = result[name].astype(np.int64)
+        return result
+    
+    def _key_sql(self, key):
+        """SQL expression for a group key, or None if the table has no such column or time grain"""
+        if key in self.column_kinds:
+            return _quote(key)
+        if key not in TIME_GRAINS:
+            return None
+        date_column = next((col for col, kind in self.column_kinds.items() if kind == 'datetime'), None)
+        if date_column is None:
+            return None
+        
+        column = _quote(date_column)
+        if key == 'day':
+            return f"substr({column}, 1, 10) || ' 00:00:00.000000'"
+        if key == 'month':
+            return f"substr({column}, 1, 7)"
+        return _iso_week_sql(column)
@@ -0,0 +1,131 @@
+import json
+import os
+import logging
+from datetime import datetime, timezone
+from config.config import Config
+from src.conversions import parse_datetimes, parse_numeric
+
+# Column types a schema can assign; 'raw' leaves the decoded values untouched
+SCHEMA_TYPES = ('datetime', 'numeric', 'text', 'raw')
+
+# Coda column format types that settle a column's type without looking at the data
+FORMAT_TYPES = {
+    'date': 'datetime',
+    'dateTime': 'datetime',
+    'number': 'numeric',
+    'currency': 'numeric',
+    'percent': 'numeric',
+    'duration': 'numeric',
+    'slider': 'numeric',
+    'scale': 'numeric',
+    'text': 'text',
+    'time': 'text',
+    'person': 'text',
+    'lookup': 'text',
+    'select': 'text',
+    'email': 'text',
+    'link': 'text',
+    'checkbox': 'raw'
+}
+
+# Name keywords that make a column a candidate for conversion when Coda gives no format
+DATE_KEYWORDS = ['date', 'day', 'when', 'created', 'modified', 'time']
+NUMERIC_KEYWORDS = ['hour', 'time', 'duration', 'amount', 'cost', 'rate', 'total']
+
+# Rows sampled for inference, and the share of sampled values a conversion must parse
+SAMPLE_SIZE = 500
+MIN_PARSE_RATIO = 0.5
+
+def infer_schema(df, column_formats=None):
+    """
+    Infer a type for every column of a processed DataFrame
+    
+    Coda's column format decides when it is known. Otherwise the column name
+    keywords nominate candidate conversions, and a sample of the data picks the
+    candidate that parses best, so a "Time" column becomes either datetime or
+    numeric but is never converted twice.
+    """
+    column_formats = column_formats or {}
+    sample = df.head(SAMPLE_SIZE)
+    schema = {}
+    
+    for col in df.columns:
+        format_type = FORMAT_TYPES.get(column_formats.get(col))
+        if format_type is not None:
+            schema[col] = format_type
+            continue
+        
+        name = str(col).lower()
+        candidates = []
+        if any(keyword in name for keyword in NUMERIC_KEYWORDS):
+            candidates.append(('numeric', parse_numeric))
+        if any(keyword in name for keyword in DATE_KEYWORDS):
+            candidates.append(('datetime', parse_datetimes))
+        
+        values = sample[col].dropna()
+        best_type, best_ratio = None, 0.0
+        for column_type, convert in candidates:
+            if values.empty:
+                # Nothing to judge by: keep the keyword guess
+                best_type = best_type or column_type
+                continue
+            ratio = convert(values).notna().mean()
+            if ratio > best_ratio:
+                best_type, best_ratio = column_type, ratio
+        
+        if best_type is not None and (values.empty or best_ratio >= MIN_PARSE_RATIO):
+            schema[col] = best_type
+        else:
+            schema[col] = 'text' if df[col].dtype == 'object' else 'raw'
+    
+    return schema
+
+class SchemaStore:
+    """Persist inferred column types per (doc, table)"""
+    
+    def __init__(self, state_dir=None):
+        self.state_dir = state_dir or Config.STATE_DIR
+        self.logger = logging.getLogger(__name__)
+    
+    def _path(self, doc_id, table_id):
+        return os.path.join(self.state_dir, f"schema_{doc_id}_{table_id}.json")
+    
+    def load(self, doc_id, table_id):
+        """Return the stored schema record ({'columns': {...}, 'inferred_at': ...}) or None"""
+        path = self._path(doc_id, table_id)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+    
+    def save(self, doc_id, table_id, columns):
+        os.makedirs(self.state_dir, exist_ok=True)
+        path = self._path(doc_id, table_id)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'columns': columns, 'inferred_at': datetime.now(timezone.utc).isoformat()}, f, indent=2)
+        os.replace(tmp_path, path)
+    
+    def resolve(self, df, doc_id, table_id, column_formats=None, reinfer=False, save=True):
+        """
+        Return the schema for a table's processed DataFrame
+        
+        The stored schema is reused while the column set is unchanged; otherwise
+        (or with reinfer=True) it is inferred again and, unless save=False,
+        stored. Config overrides are applied on top every time and are never
+        persisted.
+        """
+        record = None if reinfer else self.load(doc_id, table_id)
+        if record is not None and set(record['columns']) == set(df.columns):
+            columns = record['columns']
+        else:
+            columns = infer_schema(df, column_formats)
+            if save:
+                self.save(doc_id, table_id, columns)
+            self.logger.info(f"Inferred schema for {doc_id}/{table_id}: {columns}")
+        
+        overrides = Config.load_schema_overrides(table_id)
+        for col, column_type in overrides.items():
+            if column_type not in SCHEMA_TYPES:
+                raise ValueError(f"Unknown schema type '{column_type}' for column '{col}'")
+        return {**columns, **{col: t for col, t in overrides.items() if col in df.columns}}
@@ -0,0 +1,76 @@
+import json
+import os
+from config.config import Config
+
+class SyncStateStore:
+    """Persist incremental sync state and the merged row dataset per (doc, table)"""
+    
+    def __init__(self, state_dir=None):
+        self.state_dir = state_dir or Config.STATE_DIR
+    
+    def _path(self, kind, doc_id, table_id):
+        return os.path.join(self.state_dir, f"{kind}_{doc_id}_{table_id}.json")
+    
+    def _read(self, path):
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+    
+    def _write(self, path, data):
+        """Write JSON atomically so an interrupted run never leaves a torn file"""
+        os.makedirs(self.state_dir, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    
+    def load_state(self, doc_id, table_id):
+        """
+        Load sync state, or None if the table has never been synced
+        
+        State keys:
+            watermark: Latest row updatedAt seen (ISO timestamp)
+            row_versions: Mapping of row ID to its updatedAt
+            row_count: Number of rows in the stored dataset
+            synced_at: When the last sync finished
+        """
+        return self._read(self._path('sync', doc_id, table_id))
+    
+    def save_state(self, doc_id, table_id, state):
+        self._write(self._path('sync', doc_id, table_id), state)
+    
+    def load_rows(self, doc_id, table_id):
+        """Load the stored dataset as a mapping of row ID to raw row item"""
+        return self._read(self._path('rows', doc_id, table_id)) or {}
+    
+    def save_rows(self, doc_id, table_id, rows):
+        self._write(self._path('rows', doc_id, table_id), rows)
+    
+    def aggregates_path(self, doc_id, table_id):
+        """SQLite file of the incrementally maintained aggregates (see AggregateStore)"""
+        return os.path.join(self.state_dir, f"aggregates_{doc_id}_{table_id}.sqlite")
+    
+    def load_run_record(self, doc_id, table_id):
+        """
+        Load the record of the last successful extraction, or None
+        
+        Record keys:
+            updated_at: Table updatedAt when that run started
+            row_count: Table rowCount when that run started
+            output_file: Processed output the run produced
+            options: Output format, output name and partitioning the run was given
+            completed_at: When the run finished
+        """
+        return self._read(self._path('run', doc_id, table_id))
+    
+    def save_run_record(self, doc_id, table_id, record):
+        self._write(self._path('run', doc_id, table_id), record)
+    
+    def clear(self, doc_id, table_id):
+        """Forget everything stored for a table so the next sync is a full one"""
+        paths = [self._path(kind, doc_id, table_id) for kind in ('sync', 'rows', 'run')]
+        paths.append(self.aggregates_path(doc_id, table_id))
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
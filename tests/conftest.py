@@ -0,0 +1,160 @@
+"""
+Shared fixtures: an isolated working directory and an in-memory Coda API
+
+FakeCoda serves one table through a fake requests session, so the extractor's
+real request, paging, retry and checkpoint code runs without the network.
+"""
+
+import copy
+import os
+import sys
+import pytest
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from config.config import Config
+from src.coda_extractor import CodaTimesheetExtractor
+from src.data_processor import TimesheetProcessor
+from src.rate_limiter import RateController
+
+DOC_ID = 'doc'
+TABLE_ID = 'table'
+
+COLUMNS = [
+    {'id': 'c-date', 'name': 'Date', 'format': {'type': 'date'}},
+    {'id': 'c-hours', 'name': 'Hours', 'format': {'type': 'number'}},
+    {'id': 'c-project', 'name': 'Project', 'format': {'type': 'text'}},
+    {'id': 'c-person', 'name': 'Person', 'format': {'type': 'person'}}
+]
+
+def make_row(number, updated_at=None, hours=None, project=None):
+    """Row item as Coda returns it; the update time and values vary with number unless given"""
+    return {
+        'id': f'i-{number}',
+        'index': number,
+        'updatedAt': updated_at or f'2024-02-{1 + number % 28:02d}T00:00:00.000Z',
+        'values': {
+            'c-date': f'2024-{1 + number % 12:02d}-{1 + number % 27:02d}',
+            'c-hours': number % 9 if hours is None else hours,
+            'c-project': f'Project {number % 4}' if project is None else project,
+            'c-person': {'@type': 'person', 'name': f'Person {number % 3}'}
+        }
+    }
+
+class FakeResponse:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.headers = {}
+        self._body = body
+    
+    def json(self):
+        # A fresh copy per call, as decoding a real response body would give
+        return copy.deepcopy(self._body)
+    
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.exceptions.HTTPError(f"{self.status_code} error", response=self)
+
+class FakeCoda:
+    """
+    One Coda table served from memory
+    
+    rows keeps the table's rows in order and columns its column listing.
+    Requests are logged as (path, params). fail_pages lists page tokens
+    answered with a 500 once, and expired_tokens page tokens answered with a
+    410 once.
+    """
+    
+    def __init__(self, row_count=0):
+        self.rows = [make_row(number) for number in range(row_count)]
+        self.columns = [dict(column) for column in COLUMNS]
+        self.requests = []
+        self.fail_pages = set()
+        self.expired_tokens = set()
+        self.ascending_updates = False
+        self.updated_at = '2024-03-01T00:00:00.000Z'
+    
+    def get(self, url, headers=None, params=None, timeout=None):
+        path = url.split('/apis/v1', 1)[-1]
+        params = dict(params or {})
+        self.requests.append((path, params))
+        table_path = f"/docs/{DOC_ID}/tables/{TABLE_ID}"
+        
+        if path == f"{table_path}/columns":
+            return FakeResponse(200, {'items': self.columns})
+        if path == f"{table_path}/rows":
+            return self._rows(params)
+        if path == table_path:
+            return FakeResponse(200, {'id': TABLE_ID, 'rowCount': len(self.rows), 'updatedAt': self.updated_at})
+        return FakeResponse(404, {})
+    
+    def _rows(self, params):
+        token = params.get('pageToken')
+        if token in self.expired_tokens:
+            self.expired_tokens.discard(token)
+            return FakeResponse(410, {})
+        if token in self.fail_pages:
+            self.fail_pages.discard(token)
+            return FakeResponse(500, {})
+        
+        rows = list(self.rows)
+        if params.get('sortBy') == 'updatedAt':
+            rows.sort(key=lambda row: row['updatedAt'], reverse=not self.ascending_updates)
+        if 'columns' in params:
+            wanted = params['columns'].split(',')
+            rows = [dict(row, values={k: v for k, v in row['values'].items() if k in wanted}) for row in rows]
+        
+        start = int(token or 0)
+        end = start + int(params['limit'])
+        body = {'items': rows[start:end]}
+        if end < len(rows):
+            body['nextPageToken'] = str(end)
+        return FakeResponse(200, body)
+    
+    def close(self):
+        pass
+    
+    def row_requests(self):
+        return [params for path, params in self.requests if path.endswith('/rows')]
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """Run each test in an empty directory, so data/, logs/ and state never leak between tests"""
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(Config.LOGS_DIR)
+    monkeypatch.setattr(Config, 'CODA_API_TOKEN', 'test-token')
+    monkeypatch.setattr(Config, 'DOC_ID', DOC_ID)
+    monkeypatch.setattr(Config, 'TABLE_ID', TABLE_ID)
+    monkeypatch.setattr(Config, 'METADATA_CACHE_TTL', 0)
+    return tmp_path
+
+@pytest.fixture
+def coda():
+    return FakeCoda(row_count=1200)
+
+@pytest.fixture
+def extractor(coda):
+    rate_controller = RateController(initial_rate=10000, max_rate=10000)
+    extractor = CodaTimesheetExtractor(max_retries=0, rate_controller=rate_controller)
+    extractor.session = coda
+    return extractor
+
+@pytest.fixture
+def timesheet():
+    """Cleaned timesheet DataFrame indexed by row ID, with some missing hours, dates and projects"""
+    rows = [make_row(number) for number in range(300)]
+    for row in rows[::17]:
+        row['values']['c-hours'] = ''
+    for row in rows[::23]:
+        row['values']['c-project'] = ''
+    for row in rows[::29]:
+        row['values']['c-date'] = ''
+    processor = TimesheetProcessor()
+    df = processor.process_raw_data({'items': rows, 'column_mapping': {c['id']: c['name'] for c in COLUMNS}},
+                                    index_by_row_id=True)
+    schema = {'Date': 'datetime', 'Hours': 'numeric', 'Project': 'text', 'Person': 'text'}
+    df = processor.clean_timesheet_data(df, schema)
+    df['Project'] = df['Project'].replace('', None)
+    return df
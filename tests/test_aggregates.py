@@ -0,0 +1,73 @@
+import pandas as pd
+import pytest
+from conftest import DOC_ID, TABLE_ID, make_row
+from src.aggregates import AggregateStore
+from src.data_processor import TimesheetProcessor
+from src.sync_state import SyncStateStore
+
+@pytest.fixture
+def state_store(workdir):
+    return SyncStateStore(str(workdir / 'state'))
+
+@pytest.fixture
+def processor():
+    return TimesheetProcessor()
+
+def sync_cleaned(extractor, processor, state_store):
+    """Sync the table and clean the merged dataset, indexed by row ID"""
+    data = extractor.sync_timesheet_data(DOC_ID, TABLE_ID, state_store=state_store)
+    df = processor.process_raw_data(data, index_by_row_id=True)
+    return processor.clean_timesheet_data(df, processor.resolve_schema(df, DOC_ID, TABLE_ID)), data['changes']
+
+def assert_metrics_equal(metrics, expected):
+    assert metrics['total_hours'] == pytest.approx(expected['total_hours'])
+    assert metrics['overtime_days'] == expected['overtime_days']
+    assert metrics['project_breakdown'] == pytest.approx(expected['project_breakdown'])
+    assert metrics['weekly_totals'] == pytest.approx(expected['weekly_totals'])
+
+def test_aggregate_deltas_match_a_rebuild(coda, extractor, processor, state_store):
+    path = state_store.aggregates_path(DOC_ID, TABLE_ID)
+    aggregates = AggregateStore(path)
+    df_cleaned, changes = sync_cleaned(extractor, processor, state_store)
+    processor.update_aggregates(aggregates, df_cleaned, changes)
+    aggregates.save()
+    aggregates.close()
+    
+    coda.rows[3] = make_row(3, updated_at='2024-03-05T00:00:00.000Z', hours=12, project='Project 9')
+    del coda.rows[20:25]
+    df_cleaned, changes = sync_cleaned(extractor, processor, state_store)
+    aggregates = AggregateStore(path)
+    assert processor.update_aggregates(aggregates, df_cleaned, changes, verify=True) == []
+    assert aggregates.stored(['i-3'])['i-3'][0] == 12.0
+    assert aggregates.stored(['i-20']) == {}
+    
+    rebuilt = AggregateStore()
+    rebuilt.rebuild(df_cleaned, aggregates.columns)
+    assert_metrics_equal(aggregates.metrics(), rebuilt.metrics())
+    assert_metrics_equal(aggregates.metrics(), processor.calculate_timesheet_metrics(df_cleaned))
+
+def test_unsaved_changes_are_discarded(workdir):
+    path = str(workdir / 'aggregates.sqlite')
+    frame = pd.DataFrame({'Hours': [1.0, 2.0], 'Date': pd.to_datetime(['2024-01-01', '2024-01-02']),
+                          'Project': ['A', 'B']}, index=['i-1', 'i-2'])
+    aggregates = AggregateStore(path, columns=['Hours', 'Date', 'Project'])
+    aggregates.rebuild(frame, aggregates.columns)
+    aggregates.save()
+    aggregates.apply(frame.assign(Hours=[5.0, 6.0]), ['i-2'])
+    aggregates.close()
+    
+    reopened = AggregateStore(path)
+    assert reopened.metrics()['total_hours'] == 3.0
+    assert reopened.stored(['i-1', 'i-2']) == {'i-1': [1.0, '2024-W01', 'A'], 'i-2': [2.0, '2024-W01', 'B']}
+
+def test_clear_removes_the_aggregates(state_store):
+    aggregates = AggregateStore(state_store.aggregates_path(DOC_ID, TABLE_ID),
+                                columns=['Hours', 'Date', 'Project'])
+    aggregates.rebuild(pd.DataFrame({'Hours': [1.0], 'Date': [pd.Timestamp('2024-01-01')], 'Project': ['A']},
+                                    index=['i-1']), aggregates.columns)
+    aggregates.save()
+    aggregates.close()
+    
+    state_store.clear(DOC_ID, TABLE_ID)
+    
+    assert AggregateStore(state_store.aggregates_path(DOC_ID, TABLE_ID)).metrics() == {}
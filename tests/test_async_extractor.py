@@ -0,0 +1,74 @@
+import asyncio
+import re
+import threading
+import time
+import pytest
+from conftest import TABLE_ID, FakeCoda
+from src.async_extractor import AsyncCodaExtractor
+
+class ConcurrentCoda(FakeCoda):
+    """FakeCoda serving the same rows for every table ID, slowly, counting requests in flight"""
+    
+    def __init__(self, row_count):
+        super().__init__(row_count)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+    
+    def get(self, url, headers=None, params=None, timeout=None):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(0.01)
+            return super().get(re.sub(r'/tables/[^/]+', f'/tables/{TABLE_ID}', url), headers, params, timeout)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+@pytest.fixture
+def coda():
+    return ConcurrentCoda(row_count=1200)
+
+@pytest.fixture
+def targets():
+    return [('doc', f't{number}') for number in range(6)]
+
+def test_extract_many_caps_requests_in_flight(coda, extractor, targets):
+    async def extract():
+        async with AsyncCodaExtractor(max_concurrency=3, extractor=extractor) as async_extractor:
+            return await async_extractor.extract_many(targets)
+    
+    results = asyncio.run(extract())
+    
+    assert coda.max_in_flight == 3
+    for target in targets:
+        assert len(results[target]['items']) == 1200
+        assert results[target]['column_formats']['Hours'] == 'number'
+
+def test_extractor_can_be_used_from_more_than_one_event_loop(extractor, targets):
+    async_extractor = AsyncCodaExtractor(max_concurrency=1, extractor=extractor)
+    
+    first = asyncio.run(async_extractor.extract_many(targets[:2], max_rows=10))
+    second = asyncio.run(async_extractor.extract_many(targets[2:4], max_rows=10))
+    
+    assert not any(isinstance(result, Exception) for result in [*first.values(), *second.values()])
+    async_extractor.close()
+
+def test_closing_stream_many_cancels_the_remaining_requests(coda, extractor, targets):
+    async def first_page():
+        async with AsyncCodaExtractor(max_concurrency=2, extractor=extractor) as async_extractor:
+            pages = async_extractor.stream_many(targets)
+            target, column_mapping, page = await pages.__anext__()
+            await pages.aclose()
+            requests_at_close = len(coda.row_requests())
+            await asyncio.sleep(0.1)
+            return page, requests_at_close, asyncio.all_tasks()
+    
+    page, requests_at_close, tasks = asyncio.run(first_page())
+    
+    assert len(page) == 500
+    assert len(tasks) == 1
+    # Requests already on a worker thread may finish, but nothing new is issued
+    assert len(coda.row_requests()) <= requests_at_close + 2
+    assert len(coda.row_requests()) < 3 * len(targets)
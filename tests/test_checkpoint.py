@@ -0,0 +1,72 @@
+import os
+import pytest
+from conftest import DOC_ID, TABLE_ID
+from config.config import Config
+from src.data_processor import TimesheetProcessor
+from src.pipeline import PipelinedExtraction
+
+def interrupt(coda, extractor, token='1000'):
+    coda.fail_pages.add(token)
+    with pytest.raises(Exception):
+        extractor.get_timesheet_data(DOC_ID, TABLE_ID)
+
+def state_files(workdir):
+    state_dir = workdir / Config.STATE_DIR
+    return sorted(str(path.relative_to(state_dir)) for path in state_dir.rglob('*') if path.is_file())
+
+def test_checkpoint_holds_only_the_resume_position(coda, extractor, workdir):
+    interrupt(coda, extractor)
+    
+    # The fetched rows live in the raw snapshot; nothing is copied under data/state/
+    assert state_files(workdir) == [f'checkpoint_{DOC_ID}_{TABLE_ID}/meta.json']
+    
+    extractor.get_timesheet_data(DOC_ID, TABLE_ID)
+    assert state_files(workdir) == []
+
+def test_resume_continues_after_the_last_checkpointed_page(coda, extractor):
+    interrupt(coda, extractor)
+    coda.requests.clear()
+    
+    data = extractor.get_timesheet_data(DOC_ID, TABLE_ID, resume=True)
+    
+    assert [item['id'] for item in data['items']] == [f'i-{n}' for n in range(1200)]
+    assert [params.get('pageToken') for params in coda.row_requests()] == ['1000']
+
+def test_resumed_run_leaves_one_complete_snapshot(coda, extractor):
+    interrupt(coda, extractor)
+    
+    data = extractor.get_timesheet_data(DOC_ID, TABLE_ID, resume=True)
+    
+    snapshots = extractor.raw_store.list_snapshots(DOC_ID, TABLE_ID, complete_only=False)
+    assert len(snapshots) == 1
+    assert snapshots[0].manifest['status'] == 'complete'
+    assert snapshots[0].load()['items'] == data['items']
+
+def test_resume_restarts_when_the_page_token_expired(coda, extractor):
+    interrupt(coda, extractor)
+    coda.expired_tokens.add('1000')
+    
+    data = extractor.get_timesheet_data(DOC_ID, TABLE_ID, resume=True)
+    
+    assert [item['id'] for item in data['items']] == [f'i-{n}' for n in range(1200)]
+
+def test_resume_restarts_when_the_snapshot_is_gone(coda, extractor):
+    interrupt(coda, extractor)
+    for snapshot in extractor.raw_store.list_snapshots(complete_only=False):
+        extractor.raw_store.remove(snapshot)
+    coda.requests.clear()
+    
+    data = extractor.get_timesheet_data(DOC_ID, TABLE_ID, resume=True)
+    
+    assert len(data['items']) == 1200
+    assert coda.row_requests()[0].get('pageToken') is None
+
+def test_pipelined_run_resumes(coda, extractor):
+    interrupt(coda, extractor, token='500')
+    coda.requests.clear()
+    
+    df_cleaned, raw_data = PipelinedExtraction(extractor, TimesheetProcessor()).run(DOC_ID, TABLE_ID, resume=True)
+    
+    assert len(df_cleaned) == 1200
+    assert [params.get('pageToken') for params in coda.row_requests()] == ['500', '1000']
+    assert not os.path.exists(os.path.join(Config.STATE_DIR, f'checkpoint_{DOC_ID}_{TABLE_ID}'))
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.conversions import parse_datetimes, parse_numeric, strip_text
+
+@pytest.mark.parametrize('text, expected', [
+    ('7', 7.0),
+    (' 2.25 ', 2.25),
+    ('2:30', 2.5),
+    ('-0:45', -0.75),
+    ('1:00:36', 1.01),
+    ('3.5h', 3.5),
+    ('1 hr 30 mins', 1.5),
+    ('45 min', 0.75),
+    ('$1,200', 1200.0),
+    ('-€15', -15.0),
+    ('1,234,567.5 £', 1234567.5),
+    ('$ 3.5', 3.5),
+    ('1,5', np.nan),
+    ('2 3', np.nan),
+    ('12,34', np.nan),
+    ('1,2345', np.nan),
+    ('n/a', np.nan),
+    ('', np.nan)
+])
+def test_parse_numeric(text, expected):
+    assert parse_numeric(pd.Series([text, None]))[0] == pytest.approx(expected, nan_ok=True)
+
+def test_parse_numeric_keeps_missing_values_and_the_index():
+    series = pd.Series(['2:30', None, '2:30', '4'], index=[7, 8, 9, 10], name='Hours')
+    
+    parsed = parse_numeric(series)
+    
+    assert parsed.index.tolist() == [7, 8, 9, 10]
+    assert parsed.name == 'Hours'
+    assert parsed.tolist()[:1] + parsed.tolist()[2:] == [2.5, 2.5, 4.0]
+    assert pd.isna(parsed[8])
+
+def test_parse_datetimes_reads_iso_dates_and_times():
+    parsed = parse_datetimes(pd.Series(['2024-01-05', '2024-01-06T09:30:00', None, '2024-01-05']))
+    
+    assert parsed[[0, 1, 3]].tolist() == [pd.Timestamp('2024-01-05'), pd.Timestamp('2024-01-06 09:30'),
+                                          pd.Timestamp('2024-01-05')]
+    assert pd.isna(parsed[2])
+    assert parse_datetimes(pd.Series(['2024-01-05', 'soon'])).isna().tolist() == [False, True]
+
+def test_conversions_accept_list_cells():
+    series = pd.Series([['a', 'b'], ' 2:30 ', None, ' 2024-01-05 '], index=[10, 11, 12, 13])
+    
+    text = strip_text(series)
+    assert text.index.tolist() == [10, 11, 12, 13]
+    assert text[[10, 11, 13]].tolist() == ["['a', 'b']", '2:30', '2024-01-05']
+    assert pd.isna(text[12])
+    assert parse_numeric(series).isna().tolist() == [True, False, True, True]
+    assert parse_numeric(series)[11] == 2.5
+    assert parse_datetimes(series).isna().tolist() == [True, True, True, False]
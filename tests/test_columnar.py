@@ -0,0 +1,29 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from src.columnar import read_columnar, write_columnar
+
+@pytest.mark.parametrize('file_format', ['parquet', 'arrow'])
+def test_partitioned_export_reads_back_every_row(timesheet, workdir, file_format):
+    path = str(workdir / f'export.{file_format}')
+    df = timesheet.reset_index(drop=True)
+    
+    write_columnar(df, path, file_format, partition_by=['month', 'project'])
+    loaded = read_columnar(path)
+    
+    # Rows without a date or project land in a placeholder partition and read back as missing
+    assert len(loaded) == len(df)
+    assert list(loaded.columns) == list(df.columns) + ['month']
+    assert loaded['Project'].isna().sum() == df['Project'].isna().sum()
+    assert loaded['month'].isna().sum() == df['Date'].isna().sum()
+    assert loaded['Hours'].sum() == pytest.approx(df['Hours'].sum())
+
+def test_unpartitioned_export_round_trips(timesheet, workdir):
+    path = str(workdir / 'export.parquet')
+    df = timesheet.reset_index(drop=True)
+    
+    write_columnar(df, path)
+    
+    pd.testing.assert_frame_equal(read_columnar(path), df)
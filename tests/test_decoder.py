@@ -0,0 +1,59 @@
+import pandas as pd
+import pytest
+from conftest import COLUMNS, make_row
+from scripts.benchmark_decoder import COLUMN_MAPPING, legacy_process_raw_data, make_rows
+from src.data_processor import TimesheetProcessor
+
+MAPPING = {column['id']: column['name'] for column in COLUMNS}
+
+def ragged_rows():
+    """Rows missing columns, with a column that only appears late"""
+    rows = [make_row(number) for number in range(20)]
+    del rows[3]['values']['c-hours']
+    del rows[8]['values']['c-project']
+    rows[15]['values']['c-extra'] = 'late'
+    return rows
+
+def mixed_rows():
+    """Object values mixed with plain ones, and objects carrying different keys"""
+    rows = [make_row(number) for number in range(6)]
+    rows[1]['values']['c-person'] = ''
+    rows[2]['values']['c-person'] = {'@type': 'person', 'text': 'Rich text'}
+    rows[3]['values']['c-person'] = {'@type': 'person', 'email': 'no-name@example.com'}
+    rows[4]['values']['c-hours'] = {'currency': 'USD', 'value': 5}
+    rows[5]['values']['c-hours'] = 2.5
+    return rows
+
+def shared_name_rows():
+    """Two column IDs with the same display name; the later one wins where it has a value"""
+    rows = [make_row(number) for number in range(4)]
+    for row in rows[:2]:
+        row['values']['c-hours-2'] = 99
+    return rows
+
+def empty_rows():
+    return [{'id': f'i-{number}', 'values': {}} for number in range(5)]
+
+CASES = {
+    'benchmark': (make_rows(300), COLUMN_MAPPING),
+    'ragged': (ragged_rows(), MAPPING),
+    'mixed': (mixed_rows(), MAPPING),
+    'shared_name': (shared_name_rows(), dict(MAPPING, **{'c-hours-2': 'Hours'})),
+    'empty_values': (empty_rows(), MAPPING),
+    'no_rows': ([], MAPPING)
+}
+
+@pytest.mark.parametrize('case', CASES)
+def test_columnar_decoder_matches_the_per_cell_loop(case):
+    items, column_mapping = CASES[case]
+    raw_data = {'items': items, 'column_mapping': column_mapping}
+    
+    decoded = TimesheetProcessor().process_raw_data(raw_data)
+    
+    # Frames without columns differ only in the type of their empty column index
+    pd.testing.assert_frame_equal(decoded, legacy_process_raw_data(raw_data), check_column_type=False)
+
+def test_rows_without_values_keep_their_count():
+    decoded = TimesheetProcessor().process_raw_data({'items': empty_rows()})
+    
+    assert len(decoded) == 5
@@ -0,0 +1,35 @@
+import pytest
+
+openpyxl = pytest.importorskip('openpyxl')
+
+from src.excel_export import write_excel
+
+def read_sheets(path):
+    workbook = openpyxl.load_workbook(path, read_only=True)
+    return {sheet.title: list(sheet.iter_rows(values_only=True)) for sheet in workbook.worksheets}
+
+def test_rows_past_the_sheet_limit_continue_on_new_sheets(timesheet, workdir):
+    df = timesheet.reset_index(drop=True).head(250)
+    path = str(workdir / 'export.xlsx')
+    progress = []
+    
+    sheets = write_excel(df, path, chunk_size=30, max_sheet_rows=101,
+                         progress_callback=lambda written, total: progress.append(written))
+    
+    contents = read_sheets(path)
+    assert sheets == 3
+    assert list(contents) == ['Timesheet', 'Timesheet 2', 'Timesheet 3']
+    assert [len(rows) for rows in contents.values()] == [101, 101, 51]
+    assert all(rows[0] == tuple(df.columns) for rows in contents.values())
+    assert progress[-1] == 250
+    
+    rows = [row for sheet_rows in contents.values() for row in sheet_rows[1:]]
+    assert [row[1] for row in rows] == [None if hours != hours else hours for hours in df['Hours']]
+    assert [row[2] for row in rows] == df['Project'].tolist()
+    assert not (workdir / 'export.xlsx.tmp').exists()
+
+def test_an_empty_frame_gets_a_header_only_sheet(timesheet, workdir):
+    path = str(workdir / 'empty.xlsx')
+    
+    assert write_excel(timesheet.head(0), path) == 1
+    assert read_sheets(path) == {'Timesheet': [tuple(timesheet.columns)]}
@@ -0,0 +1,23 @@
+from conftest import DOC_ID, TABLE_ID
+
+def test_row_pages_are_fetched_lazily(coda, extractor):
+    pages = extractor.iter_row_pages(DOC_ID, TABLE_ID)
+    
+    assert coda.row_requests() == []
+    first = next(pages)
+    assert [item['id'] for item in first] == [f'i-{n}' for n in range(500)]
+    assert len(coda.row_requests()) == 1
+    
+    assert [len(page) for page in pages] == [500, 200]
+    assert len(coda.row_requests()) == 3
+
+def test_max_rows_limits_the_last_request(coda, extractor):
+    pages = list(extractor.iter_row_pages(DOC_ID, TABLE_ID, max_rows=700))
+    
+    assert [len(page) for page in pages] == [500, 200]
+    assert [params['limit'] for params in coda.row_requests()] == [500, 200]
+
+def test_iter_rows_flattens_the_pages(extractor):
+    rows = extractor.iter_rows(DOC_ID, TABLE_ID, max_rows=650)
+    
+    assert [item['id'] for item in rows] == [f'i-{n}' for n in range(650)]
@@ -0,0 +1,75 @@
+import pandas as pd
+import pytest
+from src.data_processor import TimesheetProcessor
+
+FILTERS = [
+    {'column': 'Hours', 'operator': '>', 'value': 5},
+    {'column': 'Hours', 'operator': '<=', 'value': 2},
+    {'column': 'Hours', 'operator': 'between', 'value': [2, 4]},
+    {'column': 'Project', 'operator': '==', 'value': 'Project 1'},
+    {'column': 'Project', 'operator': '!=', 'value': 'Project 1'},
+    {'column': 'Project', 'operator': 'in', 'value': ['Project 0', 'Project 3']},
+    {'column': 'Person', 'operator': 'contains', 'value': 'son 2'},
+    {'column': 'Date', 'operator': 'date_range', 'value': ['2024-03-01', '2024-05-31']},
+    [{'column': 'Hours', 'operator': '>=', 'value': 3}, {'column': 'Project', 'operator': '==', 'value': 'Project 2'}],
+    {'or': [{'column': 'Hours', 'operator': '==', 'value': 8}, {'not': {'column': 'Person', 'operator': '==',
+                                                                       'value': 'Person 0'}}]},
+    {'column': 'Missing', 'operator': '>', 'value': 1}
+]
+
+@pytest.fixture
+def processor():
+    return TimesheetProcessor()
+
+def expected_rows(df, filters):
+    """The rows filters select, evaluated row by row"""
+    def matches(row, condition):
+        if isinstance(condition, list):
+            return all(matches(row, c) for c in condition)
+        if 'and' in condition:
+            return all(matches(row, c) for c in condition['and'])
+        if 'or' in condition:
+            return any(matches(row, c) for c in condition['or'])
+        if 'not' in condition:
+            return not matches(row, condition['not'])
+        column, operator, value = condition['column'], condition['operator'], condition['value']
+        if column not in row:
+            return True
+        cell = row[column]
+        if operator == 'between':
+            return not pd.isna(cell) and value[0] <= cell <= value[1]
+        if operator in ('>', '<', '>=', '<='):
+            return not pd.isna(cell) and {'>': cell > value, '<': cell < value,
+                                          '>=': cell >= value, '<=': cell <= value}[operator]
+        if operator == 'date_range':
+            return not pd.isna(cell) and pd.Timestamp(value[0]) <= cell <= pd.Timestamp(value[1])
+        text = str(cell)
+        if operator == '==':
+            return text == value
+        if operator == '!=':
+            return text != value
+        if operator == 'in':
+            return text in value
+        return not pd.isna(cell) and value.lower() in text.lower()
+    
+    return [row_id for row_id, row in df.iterrows() if matches(row, filters)]
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_filter_data_selects_matching_rows(processor, timesheet, filters):
+    result = processor.filter_data(timesheet, filters)
+    
+    assert list(result.index) == expected_rows(timesheet, filters)
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_index_gives_the_same_result_on_every_call(processor, timesheet, filters):
+    index = processor.index(timesheet)
+    
+    first = processor.filter_data(index, filters)
+    second = processor.filter_data(index, filters)
+    
+    pd.testing.assert_frame_equal(first, processor.filter_data(timesheet, filters))
+    pd.testing.assert_frame_equal(second, first)
+
+def test_unknown_operators_are_rejected(processor, timesheet):
+    with pytest.raises(ValueError):
+        processor.filter_data(timesheet, {'column': 'Hours', 'operator': '~', 'value': 1})
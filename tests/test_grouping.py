@@ -0,0 +1,34 @@
+import pandas as pd
+import pytest
+from src.data_processor import TimesheetProcessor
+
+@pytest.fixture
+def processor():
+    return TimesheetProcessor()
+
+def test_several_keys_and_aggregations_in_one_groupby(processor, timesheet):
+    result = processor.aggregate_data(timesheet, ['Project', 'Person'], 'Hours', ['sum', 'mean', 'count'])
+    
+    expected = timesheet.groupby(['Project', 'Person'])['Hours'].agg(['sum', 'mean', 'count']).reset_index()
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+def test_single_aggregation_keeps_the_value_column_name(processor, timesheet):
+    result = processor.aggregate_data(timesheet, 'Project', 'Hours', 'max')
+    
+    expected = timesheet.groupby('Project')['Hours'].max().reset_index()
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+def test_unknown_keys_give_an_empty_result(processor, timesheet):
+    assert processor.aggregate_data(timesheet, 'Client', 'Hours').empty
+
+@pytest.mark.parametrize('keys', ['Project', ['Project', 'Person'], 'month', 'week'])
+def test_aggregate_data_from_an_index_matches_a_plain_frame(processor, timesheet, keys):
+    named = {'total': ('Hours', 'sum'), 'entries': ('Hours', 'count'), 'longest': ('Hours', 'max')}
+    
+    plain = processor.aggregate_data(timesheet, keys, aggregation=named)
+    indexed = processor.aggregate_data(processor.index(timesheet), keys, aggregation=named)
+    
+    key_columns = [keys] if isinstance(keys, str) else keys
+    indexed = indexed.astype({key: plain[key].dtype for key in key_columns})
+    pd.testing.assert_frame_equal(indexed.reset_index(drop=True), plain.reset_index(drop=True),
+                                  check_dtype=False)
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+from src.memory import optimize_dtypes
+
+def test_repeated_text_becomes_categorical_with_the_same_values(timesheet):
+    optimized, report = optimize_dtypes(timesheet)
+    
+    assert optimized['Project'].dtype == 'category'
+    project = optimized['Project'].astype(object)
+    pd.testing.assert_series_equal(project.where(project.notna(), None), timesheet['Project'])
+    assert report['bytes_saved'] > 0
+    assert report['columns']['Project'] == ('object', 'category')
+
+def test_flags_integers_and_floats():
+    df = pd.DataFrame({'Billable': [True, False, None], 'Count': [1, 2, 3], 'Rate': [0.5, 1.25, np.nan]})
+    
+    optimized, _ = optimize_dtypes(df)
+    narrow, _ = optimize_dtypes(df, downcast_floats=True)
+    
+    assert optimized['Billable'].dtype == 'boolean'
+    assert optimized['Count'].dtype == np.int8
+    assert optimized['Rate'].dtype == np.float64
+    assert narrow['Rate'].dtype == np.float32
+
+def test_floats_that_would_lose_precision_stay_wide():
+    df = pd.DataFrame({'Rate': [0.1, 1 / 3]})
+    
+    assert optimize_dtypes(df, downcast_floats=True)[0]['Rate'].dtype == np.float64
+
+def test_optimize_dtypes_leaves_list_columns_alone():
+    frame = pd.DataFrame({
+        'Project': [' Alpha ', 'Beta', None, ' Alpha '],
+        'Tags': [['Billable', 'Remote'], [], None, ['Billable', 'Remote']]
+    })
+    
+    optimized, report = optimize_dtypes(frame, categorical_max_ratio=1.0)
+    
+    assert optimized['Tags'].tolist() == frame['Tags'].tolist()
+    assert 'Tags' not in report['columns']
+    assert optimized['Project'].dtype == 'category'
@@ -0,0 +1,80 @@
+from types import SimpleNamespace
+import pytest
+import src.metadata_cache
+from conftest import DOC_ID, TABLE_ID, make_row
+from src.metadata_cache import MetadataCache
+from src.sync_state import SyncStateStore
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(src.metadata_cache, 'time', SimpleNamespace(time=lambda: now[0]))
+    return now
+
+@pytest.fixture
+def cached_extractor(extractor, workdir):
+    extractor.metadata_cache = MetadataCache(str(workdir / 'metadata.json'), default_ttl=3600)
+    return extractor
+
+def column_requests(coda):
+    return sum(path.endswith('/columns') for path, _ in coda.requests)
+
+def test_entries_expire_after_their_ttl(workdir, clock):
+    cache = MetadataCache(str(workdir / 'metadata.json'), default_ttl=60)
+    cache.set('tables:doc', {'items': []})
+    cache.set('docs', {'items': []}, ttl=600)
+    
+    clock[0] += 61
+    reloaded = MetadataCache(str(workdir / 'metadata.json'))
+    
+    assert reloaded.get('tables:doc') is None
+    assert reloaded.get('docs') == {'items': []}
+
+def test_cached_values_cannot_be_mutated(workdir):
+    cache = MetadataCache(str(workdir / 'metadata.json'), default_ttl=60)
+    cache.set('docs', {'items': []})
+    
+    cache.get('docs')['items'].append('changed')
+    
+    assert cache.get('docs') == {'items': []}
+
+def test_extraction_lists_columns_once(coda, extractor):
+    data = extractor.get_timesheet_data(DOC_ID, TABLE_ID)
+    
+    assert column_requests(coda) == 1
+    assert data['column_formats']['Date'] == 'date'
+    assert data['column_mapping']['c-hours'] == 'Hours'
+
+def test_cached_columns_are_reused_until_they_expire(coda, cached_extractor, clock):
+    cached_extractor.get_columns(DOC_ID, TABLE_ID)
+    cached_extractor.get_timesheet_data(DOC_ID, TABLE_ID)
+    assert column_requests(coda) == 1
+    
+    clock[0] += 3601
+    cached_extractor.get_columns(DOC_ID, TABLE_ID)
+    assert column_requests(coda) == 2
+
+def test_unknown_column_refreshes_mapping_and_formats(coda, cached_extractor):
+    cached_extractor.get_columns(DOC_ID, TABLE_ID)
+    coda.columns.append({'id': 'c-billable', 'name': 'Billable', 'format': {'type': 'checkbox'}})
+    coda.rows[700]['values']['c-billable'] = True
+    
+    data = cached_extractor.get_timesheet_data(DOC_ID, TABLE_ID)
+    
+    assert data['column_mapping']['c-billable'] == 'Billable'
+    assert data['column_formats']['Billable'] == 'checkbox'
+    assert column_requests(coda) == 2
+    assert cached_extractor.get_columns(DOC_ID, TABLE_ID)[1]['Billable'] == 'checkbox'
+
+def test_changed_table_drops_cached_columns(coda, cached_extractor, workdir):
+    state_store = SyncStateStore(str(workdir / 'state'))
+    table_info = cached_extractor.get_table_info(DOC_ID, TABLE_ID)
+    cached_extractor.get_columns(DOC_ID, TABLE_ID)
+    cached_extractor.record_successful_run(table_info, None, None, DOC_ID, TABLE_ID, state_store)
+    
+    # A rename keeps the column ID, so the rows alone never reveal it
+    coda.columns[2]['name'] = 'Client'
+    coda.updated_at = '2024-03-02T00:00:00.000Z'
+    cached_extractor.check_freshness(DOC_ID, TABLE_ID, state_store)
+    
+    assert cached_extractor.get_columns(DOC_ID, TABLE_ID)[0]['c-project'] == 'Client'
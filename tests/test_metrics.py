@@ -0,0 +1,70 @@
+import pandas as pd
+import pytest
+from src.data_processor import TimesheetProcessor
+from src.rollup import iso_week_labels
+
+@pytest.fixture
+def processor():
+    return TimesheetProcessor()
+
+def test_metrics_match_a_direct_computation(processor, timesheet):
+    metrics = processor.calculate_timesheet_metrics(timesheet)
+    
+    hours = timesheet['Hours']
+    weekly = hours.groupby(iso_week_labels(timesheet['Date'])).sum()
+    projects = hours.groupby(timesheet['Project']).sum()
+    assert metrics['total_hours'] == pytest.approx(hours.sum())
+    assert metrics['average_daily_hours'] == pytest.approx(hours.mean())
+    assert metrics['max_daily_hours'] == hours.max()
+    assert metrics['min_daily_hours'] == hours.min()
+    assert metrics['overtime_days'] == (hours > 8).sum()
+    assert metrics['weekly_totals'] == pytest.approx(weekly.to_dict())
+    assert metrics['average_weekly_hours'] == pytest.approx(weekly.mean())
+    assert metrics['project_breakdown'] == pytest.approx(projects.to_dict())
+
+def test_summary_matches_a_direct_computation(processor, timesheet):
+    summary = processor.generate_summary(timesheet)
+    
+    dates = timesheet['Date']
+    assert summary['total_rows'] == len(timesheet)
+    assert summary['total_hours'] == pytest.approx(timesheet['Hours'].sum())
+    assert summary['date_range'] == f"{dates.min().date()} to {dates.max().date()}"
+    assert summary['date_span_days'] == (dates.max() - dates.min()).days
+    assert summary['null_percentages']['Hours'] == pytest.approx(timesheet['Hours'].isna().mean() * 100)
+
+def test_frames_without_an_hour_column_get_no_hour_metrics(processor, timesheet):
+    df = timesheet.drop(columns=['Hours'])
+    
+    assert processor.calculate_timesheet_metrics(df) == {}
+    assert processor.generate_summary(df)['total_hours'] is None
+
+def test_plain_frames_modified_in_place_are_not_cached(processor, timesheet):
+    filters = {'column': 'Hours', 'operator': '>', 'value': 7}
+    before = len(processor.filter_data(timesheet, filters))
+    summary_before = processor.generate_summary(timesheet)['total_hours']
+    
+    timesheet['Hours'] = timesheet['Hours'] + 10
+    
+    assert len(processor.filter_data(timesheet, filters)) > before
+    assert processor.generate_summary(timesheet)['total_hours'] > summary_before
+
+def test_index_invalidate_drops_built_structures(processor, timesheet):
+    index = processor.index(timesheet)
+    filters = {'column': 'Hours', 'operator': '>', 'value': 7}
+    before = len(processor.filter_data(index, filters))
+    total_before = processor.calculate_timesheet_metrics(index)['total_hours']
+    
+    timesheet['Hours'] = timesheet['Hours'] + 10
+    index.invalidate()
+    
+    assert len(processor.filter_data(index, filters)) > before
+    assert processor.calculate_timesheet_metrics(index)['total_hours'] > total_before
+
+def test_index_is_not_shared_between_frames(processor, timesheet):
+    other = timesheet.copy()
+    other['Hours'] = other['Hours'] * 2
+    processor.calculate_timesheet_metrics(processor.index(timesheet))
+    
+    metrics = processor.calculate_timesheet_metrics(processor.index(other))
+    
+    assert metrics['total_hours'] == pytest.approx(other['Hours'].sum())
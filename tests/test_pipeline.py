@@ -0,0 +1,74 @@
+import os
+import threading
+import pandas as pd
+import pytest
+from conftest import DOC_ID, TABLE_ID, make_row
+from src.data_processor import TimesheetProcessor
+from src.pipeline import PipelinedExtraction
+
+@pytest.fixture
+def pipeline(extractor):
+    return PipelinedExtraction(extractor, TimesheetProcessor(), queue_size=1)
+
+def fetcher_running():
+    return any(thread.name == 'coda-page-fetcher' for thread in threading.enumerate())
+
+def test_pipelined_run_matches_a_sequential_extraction(coda, extractor, pipeline):
+    df_cleaned, raw_data = pipeline.run(DOC_ID, TABLE_ID)
+    
+    processor = TimesheetProcessor()
+    data = extractor.get_timesheet_data(DOC_ID, TABLE_ID)
+    df = processor.process_raw_data(data)
+    expected = processor.clean_timesheet_data(df, processor.resolve_schema(df, DOC_ID, TABLE_ID,
+                                                                          data['column_formats']))
+    
+    # Pages are cleaned in the order they were fetched
+    assert [item['id'] for item in raw_data['items']] == [f'i-{n}' for n in range(1200)]
+    pd.testing.assert_frame_equal(df_cleaned, expected)
+    assert not fetcher_running()
+
+def test_closing_the_page_stream_stops_the_fetcher(coda, pipeline):
+    coda.rows = [make_row(number) for number in range(5000)]
+    column_mapping, column_formats = pipeline.extractor.get_columns(DOC_ID, TABLE_ID)
+    pages = pipeline._iter_cleaned_pages(DOC_ID, TABLE_ID, None, None, column_mapping, column_formats,
+                                         resume=False, reinfer_schema=False)
+    
+    page, df_page = next(pages)
+    pages.close()
+    
+    assert len(page) == len(df_page) == 500
+    assert not fetcher_running()
+    # The bounded queue kept the fetcher from running ahead through the whole table
+    assert len(coda.row_requests()) < 10
+
+def test_fetch_errors_reach_the_consumer(coda, pipeline):
+    coda.fail_pages.add('500')
+    
+    with pytest.raises(Exception):
+        pipeline.run(DOC_ID, TABLE_ID)
+    assert not fetcher_running()
+
+def test_streamed_csv_matches_a_whole_frame_export(pipeline):
+    df_cleaned, _ = pipeline.run(DOC_ID, TABLE_ID)
+    expected = pipeline.processor.export_to_csv(df_cleaned, 'whole.csv')
+    
+    path, rows_written = pipeline.stream_to_csv('streamed.csv', DOC_ID, TABLE_ID)
+    
+    assert rows_written == 1200
+    with open(path) as streamed, open(expected) as whole:
+        assert streamed.read() == whole.read()
+    assert not os.path.exists(f'{path}.tmp')
+
+def test_failed_stream_leaves_the_previous_file_alone(coda, pipeline):
+    path, _ = pipeline.stream_to_csv('out.csv', DOC_ID, TABLE_ID, max_rows=10)
+    with open(path) as f:
+        previous = f.read()
+    coda.fail_pages.add('500')
+    
+    with pytest.raises(Exception):
+        pipeline.stream_to_csv('out.csv', DOC_ID, TABLE_ID)
+    
+    with open(path) as f:
+        assert f.read() == previous
+    assert not os.path.exists(f'{path}.tmp')
+    assert not fetcher_running()
@@ -0,0 +1,65 @@
+import time
+from types import SimpleNamespace
+import pytest
+import src.rate_limiter
+from src.rate_limiter import RateController
+
+def test_healthy_responses_raise_the_rate_additively():
+    controller = RateController(initial_rate=4, min_rate=1, max_rate=100, increase=2, decrease=0.5)
+    
+    controller.on_success()
+    assert controller.rate == pytest.approx(4.5)
+    controller.on_success()
+    assert controller.rate == pytest.approx(4.5 + 2 / 4.5)
+
+def test_rate_never_exceeds_the_maximum():
+    controller = RateController(initial_rate=9.9, min_rate=1, max_rate=10, increase=5, decrease=0.5)
+    
+    for _ in range(10):
+        controller.on_success()
+    
+    assert controller.rate == 10
+
+def test_throttling_halves_the_rate_down_to_the_minimum(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(src.rate_limiter, 'time', SimpleNamespace(monotonic=lambda: clock[0]))
+    controller = RateController(initial_rate=8, min_rate=1.5, max_rate=16, increase=1, decrease=0.5)
+    
+    rates = []
+    for _ in range(4):
+        clock[0] += 10
+        controller.on_throttle()
+        rates.append(controller.rate)
+    
+    assert rates == [4, 2, 1.5, 1.5]
+    assert controller.stats()['throttle_events'] == 4
+
+def test_a_burst_of_throttles_counts_once(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(src.rate_limiter, 'time', SimpleNamespace(monotonic=lambda: clock[0]))
+    controller = RateController(initial_rate=8, min_rate=1, max_rate=16, increase=1, decrease=0.5)
+    
+    for _ in range(5):
+        controller.on_throttle()
+    
+    assert controller.rate == 4
+
+def test_retry_after_pauses_every_caller():
+    controller = RateController(initial_rate=1000, min_rate=1, max_rate=1000, increase=1, decrease=0.5)
+    controller.on_throttle(retry_after=0.2)
+    
+    started = time.monotonic()
+    controller.acquire()
+    
+    assert time.monotonic() - started >= 0.2
+
+def test_acquire_paces_requests_at_the_current_rate():
+    controller = RateController(initial_rate=100, min_rate=1, max_rate=100, increase=0.001, decrease=0.5)
+    
+    started = time.monotonic()
+    for _ in range(21):
+        controller.acquire()
+    
+    # The bucket starts with a single token, so the other 20 requests wait 1/100s each
+    assert time.monotonic() - started >= 0.19
+    assert controller.stats()['requests'] == 21
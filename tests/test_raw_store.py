@@ -0,0 +1,108 @@
+import os
+import time
+import pytest
+from conftest import DOC_ID, TABLE_ID, make_row
+import src.raw_store
+from src.raw_store import RawSnapshotStore
+
+@pytest.fixture
+def raw_store(workdir, monkeypatch):
+    # Collect unreferenced row versions straight away
+    monkeypatch.setattr(src.raw_store, 'GC_GRACE_SECONDS', -1)
+    return RawSnapshotStore(str(workdir / 'raw'), keep_count=0, keep_days=0, incomplete_max_hours=24)
+
+def store_snapshot(raw_store, rows, page_size=100, complete=True):
+    snapshot = raw_store.create(DOC_ID, TABLE_ID)
+    for start in range(0, len(rows), page_size):
+        snapshot.append_page(rows[start:start + page_size])
+    if complete:
+        snapshot.complete()
+    return snapshot
+
+def make_stale(snapshot, hours=25):
+    stale = time.time() - hours * 3600
+    os.utime(snapshot.manifest_path, (stale, stale))
+
+def object_count(raw_store):
+    return raw_store.objects.connection.execute("SELECT COUNT(*) FROM objects").fetchone()[0]
+
+def test_snapshot_round_trips_rows(raw_store):
+    rows = [make_row(n) for n in range(250)]
+    snapshot = store_snapshot(raw_store, rows)
+    
+    assert raw_store.get(os.path.basename(snapshot.path)).load()['items'] == rows
+    assert [len(chunk) for chunk in snapshot.iter_row_chunks(chunk_size=100, max_rows=220)] == [100, 100, 20]
+
+def test_unchanged_rows_are_stored_once(raw_store):
+    rows = [make_row(n) for n in range(250)]
+    assert store_snapshot(raw_store, rows).manifest['new_row_versions'] == 250
+    
+    rows[7] = make_row(7, updated_at='2024-03-05T00:00:00.000Z', hours=3)
+    snapshot = store_snapshot(raw_store, rows)
+    
+    assert snapshot.manifest['new_row_versions'] == 1
+    assert snapshot.load()['items'] == rows
+    assert object_count(raw_store) == 251
+
+def test_row_inserted_at_the_top_stores_one_version(raw_store):
+    rows = [make_row(n) for n in range(250)]
+    store_snapshot(raw_store, rows)
+    
+    # Every later row's index shifts by one; only the new row is new content
+    shifted = [make_row(1000)] + [dict(row, index=row['index'] + 1) for row in rows]
+    shifted[0]['index'] = 0
+    snapshot = store_snapshot(raw_store, shifted)
+    
+    assert snapshot.manifest['new_row_versions'] == 1
+    assert snapshot.load()['items'] == shifted
+
+def test_missing_row_version_is_an_error(raw_store):
+    snapshot = store_snapshot(raw_store, [make_row(n) for n in range(10)])
+    raw_store.objects.connection.execute("DELETE FROM objects WHERE id = (SELECT MIN(id) FROM objects)")
+    
+    with pytest.raises(ValueError):
+        snapshot.load()
+
+def test_retention_keeps_the_newest_snapshots(raw_store):
+    raw_store.keep_count = 2
+    snapshots = [store_snapshot(raw_store, [make_row(n, hours=version) for n in range(10)])
+                 for version in range(3)]
+    
+    removed = raw_store.apply_retention(DOC_ID, TABLE_ID)
+    
+    assert removed == [snapshots[0].path]
+    assert [s.path for s in raw_store.list_snapshots(DOC_ID, TABLE_ID)] == [s.path for s in snapshots[1:]]
+    # Row versions only the removed snapshot used are collected
+    assert object_count(raw_store) == 20
+
+def test_stale_incomplete_snapshots_are_removed_and_not_kept_alive(raw_store):
+    abandoned = store_snapshot(raw_store, [make_row(n, project='Interrupted') for n in range(10)], complete=False)
+    make_stale(abandoned)
+    store_snapshot(raw_store, [make_row(n) for n in range(10)])
+    
+    assert [s.path for s in raw_store.abandoned_snapshots(DOC_ID, TABLE_ID)] == [abandoned.path]
+    raw_store.apply_retention(DOC_ID, TABLE_ID)
+    
+    assert not os.path.exists(abandoned.path)
+    assert object_count(raw_store) == 10
+
+def test_incomplete_snapshot_still_being_written_is_live(raw_store):
+    in_progress = store_snapshot(raw_store, [make_row(n, project='Running') for n in range(10)], complete=False)
+    make_stale(in_progress, hours=23)
+    # A later extraction of the same table finishing first must not condemn the slower run
+    store_snapshot(raw_store, [make_row(n) for n in range(10)])
+    
+    assert raw_store.abandoned_snapshots(DOC_ID, TABLE_ID) == []
+    raw_store.apply_retention(DOC_ID, TABLE_ID)
+    raw_store.garbage_collect()
+    
+    in_progress.append_page([make_row(10, project='Running')])
+    assert [row['values']['c-project'] for row in in_progress.load()['items']] == ['Running'] * 11
+
+def test_snapshot_is_abandoned_only_after_the_time_limit(raw_store):
+    snapshot = store_snapshot(raw_store, [make_row(n) for n in range(10)], complete=False)
+    
+    make_stale(snapshot, hours=23)
+    assert raw_store.abandoned_snapshots(DOC_ID, TABLE_ID) == []
+    make_stale(snapshot, hours=25)
+    assert [s.path for s in raw_store.abandoned_snapshots(DOC_ID, TABLE_ID)] == [snapshot.path]
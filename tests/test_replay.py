@@ -0,0 +1,67 @@
+import os
+import pytest
+from conftest import COLUMNS, DOC_ID, TABLE_ID, make_row
+from src.data_processor import TimesheetProcessor
+from src.pipeline import PipelinedExtraction
+from src.replay import SnapshotReplay
+
+SCHEMA_PATH = os.path.join('data', 'state', f'schema_{DOC_ID}_{TABLE_ID}.json')
+
+@pytest.fixture
+def processor():
+    return TimesheetProcessor()
+
+@pytest.fixture
+def live_csv(extractor, processor):
+    """CSV of a live extraction, which also stores a raw snapshot and the table's schema"""
+    df_cleaned, _ = PipelinedExtraction(extractor, processor).run(DOC_ID, TABLE_ID)
+    with open(processor.export_to_csv(df_cleaned, 'live.csv')) as f:
+        return f.read()
+
+def read_file(path):
+    with open(path) as f:
+        return f.read()
+
+def store_snapshot_with_extra_column(raw_store):
+    """A snapshot of the same table whose rows carry a column the stored schema lacks"""
+    mapping = {**{c['id']: c['name'] for c in COLUMNS}, 'c-note': 'Note'}
+    formats = {**{c['name']: c['format']['type'] for c in COLUMNS}, 'Note': 'text'}
+    rows = [make_row(number) for number in range(50)]
+    for row in rows:
+        row['values']['c-note'] = f'note {row["index"]}'
+    snapshot = raw_store.create(DOC_ID, TABLE_ID, mapping, formats)
+    snapshot.append_page(rows)
+    snapshot.complete()
+    return snapshot
+
+def test_replay_matches_a_live_run(extractor, processor, live_csv):
+    snapshot = extractor.raw_store.list_snapshots(DOC_ID, TABLE_ID)[-1]
+    
+    path, rows_written = processor.replay_snapshot(snapshot, 'replayed.csv', chunk_size=300)
+    
+    assert rows_written == 1200
+    assert read_file(path) == live_csv
+
+def test_replay_never_rewrites_the_stored_schema(extractor, processor, live_csv):
+    stored_schema = read_file(SCHEMA_PATH)
+    snapshot = store_snapshot_with_extra_column(extractor.raw_store)
+    
+    processor.replay_snapshot(snapshot, 'changed_columns.csv')
+    processor.replay_snapshot(snapshot, 'reinferred.csv', reinfer_schema=True)
+    SnapshotReplay(processor, extractor.raw_store, workers=1).run([snapshot], reinfer_schema=True)
+    
+    assert read_file(SCHEMA_PATH) == stored_schema
+    assert read_file(os.path.join('data', 'processed', 'reinferred.csv')).splitlines()[1].endswith(',note 0')
+
+def test_parallel_replay_matches_a_serial_one(extractor, processor, live_csv):
+    stored_schema = read_file(SCHEMA_PATH)
+    snapshots = [extractor.raw_store.list_snapshots(DOC_ID, TABLE_ID)[-1],
+                 store_snapshot_with_extra_column(extractor.raw_store)]
+    
+    serial = SnapshotReplay(processor, extractor.raw_store, workers=1).run(snapshots, reinfer_schema=True)
+    serial_outputs = [read_file(path) for _, path, _ in serial]
+    parallel = SnapshotReplay(processor, extractor.raw_store, workers=2).run(snapshots, reinfer_schema=True)
+    
+    assert [rows for _, _, rows in parallel] == [1200, 50]
+    assert [read_file(path) for _, path, _ in parallel] == serial_outputs
+    assert read_file(SCHEMA_PATH) == stored_schema
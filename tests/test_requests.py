@@ -0,0 +1,110 @@
+from types import SimpleNamespace
+import pytest
+import requests
+import src.coda_extractor
+from conftest import DOC_ID, TABLE_ID, FakeResponse
+
+class ScriptedSession:
+    """Session answering every request with the next (status, headers) pair, then 200"""
+    
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = 0
+    
+    def get(self, url, headers=None, params=None, timeout=None):
+        self.calls += 1
+        status_code, response_headers = self.responses.pop(0) if self.responses else (200, {})
+        response = FakeResponse(status_code, {'id': TABLE_ID})
+        response.headers = response_headers
+        return response
+    
+    def close(self):
+        pass
+
+class RecordingController:
+    """Rate controller that never waits and records throttle events"""
+    
+    def __init__(self):
+        self.throttles = []
+    
+    def acquire(self):
+        return 0.0
+    
+    def on_success(self):
+        pass
+    
+    def on_throttle(self, retry_after=None):
+        self.throttles.append(retry_after)
+
+@pytest.fixture
+def delays(monkeypatch):
+    """Backoff sleeps taken by the extractor, with jitter pinned to its upper bound"""
+    slept = []
+    monkeypatch.setattr(src.coda_extractor, 'time', SimpleNamespace(sleep=slept.append))
+    monkeypatch.setattr(src.coda_extractor.random, 'uniform', lambda low, high: high)
+    return slept
+
+@pytest.fixture
+def retrying(extractor):
+    extractor.max_retries = 5
+    extractor.backoff_base = 1.0
+    extractor.backoff_max = 60.0
+    extractor._rate_controller = RecordingController()
+    return extractor
+
+@pytest.mark.parametrize('status_code', [429, 500, 502, 503, 504])
+def test_throttling_and_server_errors_are_retried(retrying, delays, status_code):
+    retrying.session = ScriptedSession((status_code, {}), (status_code, {}))
+    
+    assert retrying.get_table_info(DOC_ID, TABLE_ID) == {'id': TABLE_ID}
+    assert retrying.session.calls == 3
+    assert delays == [1.0, 2.0]
+
+def test_client_errors_are_not_retried(retrying, delays):
+    retrying.session = ScriptedSession((404, {}))
+    
+    with pytest.raises(requests.exceptions.HTTPError):
+        retrying.get_table_info(DOC_ID, TABLE_ID)
+    assert retrying.session.calls == 1
+    assert delays == []
+
+def test_retry_after_is_honored(retrying, delays):
+    retrying.session = ScriptedSession((429, {'Retry-After': '7'}), (503, {'Retry-After': '0'}))
+    
+    retrying.get_table_info(DOC_ID, TABLE_ID)
+    
+    # The server's wait wins over a shorter backoff, never the other way round
+    assert delays == [7.0, 2.0]
+    assert retrying.rate_controller.throttles == [7.0]
+
+def test_backoff_is_capped(retrying, delays):
+    retrying.backoff_max = 5.0
+    retrying.session = ScriptedSession(*[(500, {})] * 5)
+    
+    retrying.get_table_info(DOC_ID, TABLE_ID)
+    
+    assert delays == [1.0, 2.0, 4.0, 5.0, 5.0]
+
+def test_gives_up_after_max_retries(retrying, delays):
+    retrying.max_retries = 2
+    retrying.session = ScriptedSession(*[(503, {})] * 5)
+    
+    with pytest.raises(requests.exceptions.HTTPError):
+        retrying.get_table_info(DOC_ID, TABLE_ID)
+    assert retrying.session.calls == 3
+
+def test_connection_errors_are_retried(retrying, delays):
+    session = ScriptedSession()
+    answer = session.get
+    failures = [requests.exceptions.ConnectionError('reset')]
+    
+    def get(*args, **kwargs):
+        if failures:
+            raise failures.pop()
+        return answer(*args, **kwargs)
+    
+    session.get = get
+    retrying.session = session
+    
+    assert retrying.get_table_info(DOC_ID, TABLE_ID) == {'id': TABLE_ID}
+    assert delays == [1.0]
@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+from src.rollup import AGGREGATIONS, RollupCube, time_grain_labels
+
+DIMENSIONS = ['day', 'week', 'month', 'project', 'person', ['project', 'person'], ['month', 'project']]
+
+@pytest.fixture
+def cube(timesheet):
+    return RollupCube.build(timesheet, 'Hours', 'Date', 'Project', 'Person')
+
+def raw_keys(df, dimensions):
+    """The groupby keys on raw rows that a cube query over dimensions stands for"""
+    keys = []
+    for dimension in [dimensions] if isinstance(dimensions, str) else dimensions:
+        if dimension == 'project':
+            keys.append(df['Project'].rename('project'))
+        elif dimension == 'person':
+            keys.append(df['Person'].rename('person'))
+        else:
+            keys.append(time_grain_labels(df['Date'], dimension))
+    return keys
+
+@pytest.mark.parametrize('aggregation', AGGREGATIONS)
+@pytest.mark.parametrize('dimensions', DIMENSIONS)
+def test_query_matches_a_groupby_on_raw_rows(cube, timesheet, dimensions, aggregation):
+    result = cube.query(dimensions, aggregation)
+    
+    expected = timesheet['Hours'].groupby(raw_keys(timesheet, dimensions)).agg(aggregation)
+    pd.testing.assert_series_equal(result.sort_index(), expected.sort_index(), check_dtype=False,
+                                   check_names=False, check_index_type=False)
+
+def test_cells_account_for_every_row(cube, timesheet):
+    assert cube.cells['count'].sum() == timesheet['Hours'].count()
+    assert cube.cells['sum'].sum() == pytest.approx(timesheet['Hours'].sum())
+
+def test_unknown_dimensions_and_aggregations_are_rejected(cube):
+    with pytest.raises(ValueError):
+        cube.query('quarter')
+    with pytest.raises(ValueError):
+        cube.query('project', 'median')
+
+def test_results_are_not_shared_with_callers(cube):
+    result = cube.query('project')
+    result[:] = 0
+    
+    assert cube.query('project').sum() > 0
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import DOC_ID, TABLE_ID
+from test_filters import FILTERS
+from src.data_processor import TimesheetProcessor
+from src.row_store import RowStore
+
+@pytest.fixture
+def row_store(workdir):
+    store = RowStore(str(workdir / 'rows.sqlite'))
+    yield store
+    store.close()
+
+@pytest.fixture
+def stored(row_store, timesheet):
+    row_store.upsert(DOC_ID, TABLE_ID, timesheet)
+    return row_store.table(DOC_ID, TABLE_ID)
+
+def comparable(df):
+    """Rows by ID with missing text as None, so SQL and pandas results compare equal"""
+    df = df.sort_index()
+    return df.astype({'Project': object}).where(df.notna(), None)
+
+def test_load_round_trips_the_cleaned_frame(stored, timesheet):
+    pd.testing.assert_frame_equal(comparable(stored.load()), comparable(timesheet), check_names=False)
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_filters_pushed_to_sql_select_the_same_rows(stored, timesheet, filters):
+    processor = TimesheetProcessor()
+    
+    from_sql = processor.filter_data(stored.where(filters), filters)
+    in_pandas = processor.filter_data(timesheet, filters)
+    
+    pd.testing.assert_frame_equal(comparable(from_sql), comparable(in_pandas), check_names=False)
+    assert stored.where(filters).count() == len(in_pandas)
+
+@pytest.mark.parametrize('keys', ['Project', ['Project', 'Person'], 'day', 'week', 'month'])
+def test_group_by_in_sql_matches_pandas(stored, timesheet, keys):
+    processor = TimesheetProcessor()
+    named = {'total': ('Hours', 'sum'), 'entries': ('Hours', 'count'), 'average': ('Hours', 'mean')}
+    filters = {'column': 'Hours', 'operator': '>=', 'value': 2}
+    
+    from_sql = stored.where(filters).aggregate([keys] if isinstance(keys, str) else keys, named)
+    in_pandas = processor.aggregate_data(processor.filter_data(timesheet, filters), keys, aggregation=named)
+    
+    assert from_sql is not None
+    key_columns = [keys] if isinstance(keys, str) else keys
+    in_pandas = in_pandas.astype({key: from_sql[key].dtype for key in key_columns})
+    pd.testing.assert_frame_equal(from_sql.reset_index(drop=True), in_pandas.reset_index(drop=True),
+                                  check_dtype=False)
+
+def test_upsert_updates_rows_and_delete_removes_them(row_store, stored, timesheet):
+    changed = timesheet.loc[['i-1', 'i-2']].assign(Hours=[11.0, 12.0])
+    
+    row_store.upsert(DOC_ID, TABLE_ID, changed)
+    row_store.delete(DOC_ID, TABLE_ID, ['i-3', 'i-4'])
+    
+    loaded = stored.load()
+    assert len(loaded) == len(timesheet) - 2
+    assert loaded.loc[['i-1', 'i-2'], 'Hours'].tolist() == [11.0, 12.0]
+    assert 'i-3' not in loaded.index
+
+def test_retain_drops_rows_missing_from_a_full_extraction(row_store, stored, timesheet):
+    kept = list(timesheet.index[:100])
+    
+    assert row_store.retain(DOC_ID, TABLE_ID, kept) == len(timesheet) - 100
+    assert sorted(stored.load().index) == sorted(kept)
+
+def test_column_empty_on_the_first_page_takes_the_kind_of_later_values(row_store):
+    first = pd.DataFrame({'Hours': [1.0, 2.0], 'Note': [np.nan, np.nan]}, index=['i-0', 'i-1'])
+    later = pd.DataFrame({'Hours': [3.0], 'Note': ['late entry']}, index=['i-2'])
+    
+    row_store.upsert(DOC_ID, TABLE_ID, first)
+    row_store.upsert(DOC_ID, TABLE_ID, later)
+    
+    assert row_store.column_kinds(DOC_ID, TABLE_ID) == {'Hours': 'numeric', 'Note': 'text'}
+    assert row_store.table(DOC_ID, TABLE_ID).load()['Note'].tolist() == [None, None, 'late entry']
+
+def test_values_that_no_longer_fit_widen_the_column_to_text(row_store):
+    row_store.upsert(DOC_ID, TABLE_ID, pd.DataFrame({'Code': [7.5, np.nan]}, index=['i-0', 'i-1']))
+    row_store.upsert(DOC_ID, TABLE_ID, pd.DataFrame({'Code': [['A', 'B']]}, index=['i-2']))
+    
+    assert row_store.column_kinds(DOC_ID, TABLE_ID) == {'Code': 'text'}
+    assert row_store.table(DOC_ID, TABLE_ID).load()['Code'].tolist() == ['7.5', None, "['A', 'B']"]
@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+from conftest import DOC_ID, TABLE_ID
+from src.data_processor import TimesheetProcessor
+from src.schema import SchemaStore, infer_schema
+
+@pytest.fixture
+def frame():
+    """Decoded rows where multi-select and lookup columns hold lists"""
+    return pd.DataFrame({
+        'Date': ['2024-01-05', '2024-01-06T09:30:00', None, '2024-01-05'],
+        'Hours': ['2:30', '3.5h', '', '2:30'],
+        'Project': [' Alpha ', 'Beta', None, ' Alpha '],
+        'Tags': [['Billable', 'Remote'], [], None, ['Billable', 'Remote']],
+        'Reviewers': [[{'name': 'Ann'}], 'Bob', None, [{'name': 'Ann'}]]
+    })
+
+@pytest.fixture
+def store(workdir):
+    return SchemaStore(str(workdir / 'state'))
+
+def test_column_formats_decide_before_the_data():
+    df = pd.DataFrame({'Hours': ['not a number'], 'Logged': ['2024-01-05'], 'Done': [True]})
+    
+    schema = infer_schema(df, {'Hours': 'number', 'Logged': 'text', 'Done': 'checkbox'})
+    
+    assert schema == {'Hours': 'numeric', 'Logged': 'text', 'Done': 'raw'}
+
+def test_the_data_picks_between_keyword_candidates():
+    df = pd.DataFrame({
+        'Time Spent': ['2:30', '1:15', '0:45'],
+        'Start Time': ['2024-01-05T09:00:00', '2024-01-06T10:00:00', '2024-01-07T11:00:00'],
+        'Total': ['lots', 'some', 'none'],
+        'Notes': ['a', 'b', 'c']
+    })
+    
+    assert infer_schema(df) == {'Time Spent': 'numeric', 'Start Time': 'datetime', 'Total': 'text',
+                                'Notes': 'text'}
+
+def test_stored_schema_is_reused_while_the_columns_are_unchanged(store, frame):
+    store.save(DOC_ID, TABLE_ID, {column: 'text' for column in frame.columns})
+    
+    assert store.resolve(frame, DOC_ID, TABLE_ID)['Hours'] == 'text'
+    assert store.resolve(frame, DOC_ID, TABLE_ID, reinfer=True)['Hours'] == 'numeric'
+    assert store.load(DOC_ID, TABLE_ID)['columns']['Hours'] == 'numeric'
+
+def test_a_new_column_triggers_inference(store, frame):
+    store.resolve(frame, DOC_ID, TABLE_ID)
+    
+    schema = store.resolve(frame.assign(Rate=['10', '12', None, '$1,000']), DOC_ID, TABLE_ID)
+    
+    assert schema['Rate'] == 'numeric'
+    assert set(store.load(DOC_ID, TABLE_ID)['columns']) == set(frame.columns) | {'Rate'}
+
+def test_cleaning_handles_list_columns_the_same_with_and_without_a_schema(frame):
+    processor = TimesheetProcessor()
+    schema = {'Date': 'datetime', 'Hours': 'numeric', 'Project': 'text', 'Tags': 'text', 'Reviewers': 'text'}
+    
+    guessed = processor.clean_timesheet_data(frame)
+    typed = processor.clean_timesheet_data(frame, schema)
+    
+    pd.testing.assert_frame_equal(guessed, typed)
+    assert typed['Project'].tolist()[:2] == ['Alpha', 'Beta']
+    assert typed['Hours'].tolist()[:2] == [2.5, 3.5]
+    assert typed['Tags'][0] == "['Billable', 'Remote']"
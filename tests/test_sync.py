@@ -0,0 +1,79 @@
+import logging
+import pytest
+from conftest import DOC_ID, TABLE_ID, make_row
+from src.sync_state import SyncStateStore
+
+@pytest.fixture
+def state_store(workdir):
+    return SyncStateStore(str(workdir / 'state'))
+
+def sync(extractor, state_store, full=False):
+    return extractor.sync_timesheet_data(DOC_ID, TABLE_ID, state_store=state_store, full=full)
+
+def test_first_sync_is_full(extractor, state_store):
+    data = sync(extractor, state_store)
+    
+    assert data['changes']['full_sync']
+    assert len(data['items']) == 1200
+    assert state_store.load_state(DOC_ID, TABLE_ID)['row_count'] == 1200
+
+def test_delta_sync_stops_at_the_watermark(coda, extractor, state_store):
+    sync(extractor, state_store)
+    coda.rows[5] = make_row(5, updated_at='2024-03-05T00:00:00.000Z', hours=7)
+    coda.requests.clear()
+    
+    data = sync(extractor, state_store)
+    
+    assert data['changes'] == {'upserted': ['i-5'], 'deleted': [], 'full_sync': False}
+    assert len(data['items']) == 1200
+    # Newest rows come first, so the first page reaches rows older than the watermark
+    row_requests = coda.row_requests()
+    assert len(row_requests) == 1
+    assert row_requests[0]['sortBy'] == 'updatedAt'
+
+def test_delta_sync_scans_everything_when_rows_arrive_oldest_first(coda, extractor, state_store, caplog):
+    sync(extractor, state_store)
+    coda.ascending_updates = True
+    coda.rows[700] = make_row(700, updated_at='2024-03-05T00:00:00.000Z')
+    
+    with caplog.at_level(logging.WARNING):
+        data = sync(extractor, state_store)
+    
+    assert data['changes']['upserted'] == ['i-700']
+    assert 'oldest first' in caplog.text
+
+def test_deletion_sweep_requests_only_one_column(coda, extractor, state_store):
+    sync(extractor, state_store)
+    del coda.rows[10:15]
+    coda.requests.clear()
+    
+    data = sync(extractor, state_store)
+    
+    assert sorted(data['changes']['deleted']) == sorted(f'i-{n}' for n in range(10, 15))
+    assert len(data['items']) == 1195
+    sweep = [params for params in coda.row_requests() if 'sortBy' not in params]
+    assert sweep and all(params['columns'] == 'c-date' for params in sweep)
+
+def test_freshness_requires_the_same_output_options(extractor, state_store, workdir):
+    output = workdir / 'out.csv'
+    output.write_text('')
+    options = {'format': 'csv', 'output': None, 'partition_by': None}
+    table_info = extractor.get_table_info(DOC_ID, TABLE_ID)
+    extractor.record_successful_run(table_info, str(output), options, DOC_ID, TABLE_ID, state_store)
+    
+    assert extractor.check_freshness(DOC_ID, TABLE_ID, state_store, options)['unchanged']
+    other = dict(options, format='parquet')
+    assert not extractor.check_freshness(DOC_ID, TABLE_ID, state_store, other)['unchanged']
+
+def test_freshness_sees_table_changes_and_missing_output(coda, extractor, state_store, workdir):
+    output = workdir / 'out.csv'
+    output.write_text('')
+    table_info = extractor.get_table_info(DOC_ID, TABLE_ID)
+    extractor.record_successful_run(table_info, str(output), None, DOC_ID, TABLE_ID, state_store)
+    
+    coda.updated_at = '2024-03-02T00:00:00.000Z'
+    assert not extractor.check_freshness(DOC_ID, TABLE_ID, state_store)['unchanged']
+    
+    coda.updated_at = table_info['updatedAt']
+    output.unlink()
+    assert not extractor.check_freshness(DOC_ID, TABLE_ID, state_store)['unchanged']
@@ -22,7 +22,10 @@ except ImportError:
 
 try:
     from src.coda_extractor import CodaTimesheetExtractor
+    from src.columnar import HAS_PYARROW, write_columnar
     from src.data_processor import TimesheetProcessor
+    from src.excel_export import write_excel
+    from src.pipeline import PipelinedExtraction
     from config.config import Config
 except ImportError as e:
     print(f"Error importing modules: {e}")
@@ -40,6 +43,7 @@ class TimesheetExtractorGUI:
         self.table_id = tk.StringVar()
         self.status_text = tk.StringVar(value="Ready")
         self.max_rows_var = tk.StringVar(value="")
+        self.pipelined_var = tk.BooleanVar(value=True)
         
         # Data
         self.current_df = None
@@ -81,10 +85,13 @@ class TimesheetExtractorGUI:
         ttk.Label(config_frame, text="Max Rows:").grid(row=3, column=0, sticky=tk.W, pady=2)
         ttk.Entry(config_frame, textvariable=self.max_rows_var, width=20).grid(row=3, column=1, sticky=tk.W, pady=2, padx=(10, 0))
         
+        ttk.Checkbutton(config_frame, text="Process pages while fetching (pipelined)", variable=self.pipelined_var).grid(row=4, column=1, sticky=tk.W, pady=2, padx=(10, 0))
+        
         config_btn_frame = ttk.Frame(config_frame)
-        config_btn_frame.grid(row=4, column=0, columnspan=2, pady=10)
+        config_btn_frame.grid(row=5, column=0, columnspan=2, pady=10)
         ttk.Button(config_btn_frame, text="Load from .env", command=self.load_from_env).pack(side=tk.LEFT, padx=5)
         ttk.Button(config_btn_frame, text="Save Config", command=self.save_config).pack(side=tk.LEFT, padx=5)
+        ttk.Button(config_btn_frame, text="Clear Metadata Cache", command=self.clear_metadata_cache).pack(side=tk.LEFT, padx=5)
         
         # Actions
         action_frame = ttk.LabelFrame(main_frame, text="Actions", padding="10")
@@ -138,6 +145,9 @@ class TimesheetExtractorGUI:
         self.export_excel_btn = ttk.Button(export_frame, text="Export Excel", command=self.export_excel, state='disabled')
         self.export_excel_btn.pack(side=tk.LEFT, padx=5)
         
+        self.export_parquet_btn = ttk.Button(export_frame, text="Export Parquet", command=self.export_parquet, state='disabled')
+        self.export_parquet_btn.pack(side=tk.LEFT, padx=5)
+        
         ttk.Button(export_frame, text="Show Metrics", command=self.show_metrics, state='disabled').pack(side=tk.LEFT, padx=5)
     
     def create_data_tab(self):
@@ -207,11 +217,12 @@ class TimesheetExtractorGUI:
                     self.doc_id.set(config.get('doc_id', ''))
                     self.table_id.set(config.get('table_id', ''))
                     self.max_rows_var.set(config.get('max_rows', ''))
+                    self.pipelined_var.set(config.get('pipelined', True))
             except:
                 pass
     
     def save_config(self):
-        config = {'doc_id': self.doc_id.get(), 'table_id': self.table_id.get(), 'max_rows': self.max_rows_var.get()}
+        config = {'doc_id': self.doc_id.get(), 'table_id': self.table_id.get(), 'max_rows': self.max_rows_var.get(), 'pipelined': self.pipelined_var.get()}
         try:
             with open("gui_config.json", 'w') as f:
                 json.dump(config, f, indent=2)
@@ -262,6 +273,16 @@ class TimesheetExtractorGUI:
         extractor.headers = {"Authorization": f"Bearer {self.api_token.get()}", "Content-Type": "application/json"}
         return extractor
     
+    def clear_metadata_cache(self):
+        if not self.api_token.get():
+            messagebox.showerror("Error", "API Token required!")
+            return
+        try:
+            self._create_extractor().invalidate_metadata()
+            self.log_message("Metadata cache cleared")
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not clear cache: {e}")
+    
     def list_documents(self):
         if not self.api_token.get():
             messagebox.showerror("Error", "API Token required!")
@@ -353,13 +374,28 @@ class TimesheetExtractorGUI:
                 except:
                     self.log_message("Invalid max rows, extracting all")
             
-            raw_data = extractor.get_timesheet_data(self.doc_id.get(), self.table_id.get(), max_rows=max_rows)
-            self.log_message(f"Extracted {len(raw_data.get('items', []))} rows")
-            
             processor = TimesheetProcessor()
-            df = processor.process_raw_data(raw_data)
-            df_cleaned = processor.clean_timesheet_data(df)
-            metrics = processor.calculate_timesheet_metrics(df_cleaned)
+            if self.pipelined_var.get():
+                pipeline = PipelinedExtraction(extractor, processor)
+                df_cleaned, raw_data = pipeline.run(
+                    self.doc_id.get(), self.table_id.get(), max_rows=max_rows,
+                    progress_callback=lambda rows: self.update_status(f"Extracting data... {rows} rows processed")
+                )
+                self.log_message(f"Extracted {len(raw_data.get('items', []))} rows")
+            else:
+                raw_data = extractor.get_timesheet_data(self.doc_id.get(), self.table_id.get(), max_rows=max_rows)
+                self.log_message(f"Extracted {len(raw_data.get('items', []))} rows")
+                
+                df = processor.process_raw_data(raw_data)
+                schema = processor.resolve_schema(df, self.doc_id.get(), self.table_id.get(), raw_data.get('column_formats'))
+                df_cleaned = processor.clean_timesheet_data(df, schema)
+                extractor.store_rows(df_cleaned, raw_data, self.doc_id.get(), self.table_id.get(),
+                                     complete=max_rows is None)
+            df_cleaned, memory_report = processor.optimize_memory(df_cleaned)
+            self.log_message(f"Compacted data in memory, saved {memory_report['bytes_saved'] / 1e6:.1f} MB")
+            # Metrics and summary share one scan of the frame
+            frame_index = processor.index(df_cleaned)
+            metrics = processor.calculate_timesheet_metrics(frame_index)
             
             self.current_df = df_cleaned
             self.current_metrics = metrics
@@ -367,7 +403,7 @@ class TimesheetExtractorGUI:
             self.display_data(df_cleaned)
             self.display_metrics(metrics)
             
-            summary = processor.generate_summary(df_cleaned)
+            summary = processor.generate_summary(frame_index)
             summary_text = f"Rows: {summary['total_rows']}, Columns: {len(summary['columns'])}"
             if summary.get('total_hours'):
                 summary_text += f", Total Hours: {summary['total_hours']:.1f}"
@@ -377,7 +413,10 @@ class TimesheetExtractorGUI:
             self.summary_label.config(text=summary_text)
             self.export_csv_btn.config(state='normal')
             self.export_excel_btn.config(state='normal')
+            self.export_parquet_btn.config(state='normal')
             
+            rate_stats = extractor.rate_controller.stats()
+            self.log_message(f"API requests: {rate_stats['requests']}, throttled: {rate_stats['throttle_events']}, rate: {rate_stats['current_rate']}/s")
             self.log_message("Extraction completed!")
             self.update_status(f"Extracted {len(df_cleaned)} rows")
             messagebox.showinfo("Success", f"Extracted {len(df_cleaned)} rows with proper column names!")
@@ -476,9 +515,45 @@ class TimesheetExtractorGUI:
             initialname=f"timesheet_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
         )
         
+        if filename:
+            # Large workbooks take a while; keep the window responsive
+            self.export_excel_btn.config(state='disabled')
+            threading.Thread(target=self._export_excel_thread, args=(self.current_df, filename), daemon=True).start()
+    
+    def _export_excel_thread(self, df, filename):
+        self.progress.start()
+        try:
+            sheets = write_excel(
+                df, filename,
+                progress_callback=lambda done, total: self.update_status(f"Exporting to Excel... {done}/{total} rows")
+            )
+            self.log_message(f"Exported to: {filename}" + (f" ({sheets} sheets)" if sheets > 1 else ""))
+            self.update_status(f"Exported {len(df)} rows to Excel")
+            messagebox.showinfo("Success", f"Data exported to {filename}")
+        except Exception as e:
+            self.log_message(f"Error: {e}")
+            messagebox.showerror("Error", f"Export failed: {e}")
+        finally:
+            self.progress.stop()
+            self.export_excel_btn.config(state='normal')
+    
+    def export_parquet(self):
+        if self.current_df is None:
+            messagebox.showerror("Error", "No data to export!")
+            return
+        if not HAS_PYARROW:
+            messagebox.showerror("Error", "Parquet export needs pyarrow: pip install pyarrow")
+            return
+        
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".parquet",
+            filetypes=[("Parquet files", "*.parquet")],
+            initialname=f"timesheet_{datetime.now().strftime('%Y%m%d_%H%M%S')}.parquet"
+        )
+        
         if filename:
             try:
-                self.current_df.to_excel(filename, index=False)
+                write_columnar(self.current_df, filename)
                 self.log_message(f"Exported to: {filename}")
                 messagebox.showinfo("Success", f"Data exported to {filename}")
             except Exception as e: